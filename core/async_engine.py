@@ -0,0 +1,372 @@
+import asyncio
+import threading
+import time
+from logger import logger
+from core.cdp_client import CDPClient, CDPError, handle_to_target_id
+from core.page_scripts import LOCATE_SCRIPT, JS_CLICK_SCRIPT, WAIT_FOR_ELEMENT_SCRIPT, PRESENCE_SCRIPT, as_expression
+
+
+class AsyncCDP:
+    """CDPClient的异步封装
+
+    命令通过CDPClient.send_future发送，响应由CDP的读取线程回填，
+    等待期间只占用一个协程，不占用线程。
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    async def send(self, method, params=None, session_id=None, timeout=10):
+        future = self.client.send_future(method, params, session_id)
+        try:
+            # 超时时取消等待，同时从CDPClient的待响应列表中移除
+            response = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            raise CDPError(f"CDP命令超时: {method}")
+        return CDPClient.unwrap_response(method, response)
+
+    async def attach(self, target_id):
+        """附加到标签页并返回sessionId，与同步接口共用已附加的会话"""
+        session_id = self.client.get_session(target_id)
+        if session_id:
+            return session_id
+        result = await self.send("Target.attachToTarget", {"targetId": target_id, "flatten": True})
+        self.client.set_session(target_id, result["sessionId"])
+        return result["sessionId"]
+
+    async def send_to_target(self, target_id, method, params=None, timeout=10):
+        """向指定标签页发送命令，会话失效时重新附加一次"""
+        session_id = await self.attach(target_id)
+        try:
+            return await self.send(method, params, session_id=session_id, timeout=timeout)
+        except CDPError as e:
+            if "session" not in str(e).lower():
+                raise
+            self.client.set_session(target_id, None)
+            session_id = await self.attach(target_id)
+            return await self.send(method, params, session_id=session_id, timeout=timeout)
+
+    async def evaluate(self, target_id, expression, timeout=10, await_promise=False):
+        result = await self.send_to_target(target_id, "Runtime.evaluate", {
+            "expression": expression,
+            "returnByValue": True,
+            "awaitPromise": await_promise,
+        }, timeout=timeout)
+        if "exceptionDetails" in result:
+            raise CDPError(f"页面脚本执行出错: {result['exceptionDetails'].get('text', '')}")
+        return result.get("result", {}).get("value")
+
+    async def wait_ready(self, target_id, by, value, timeout=10):
+        """由页面内的MutationObserver等待元素就绪"""
+        expression = as_expression(WAIT_FOR_ELEMENT_SCRIPT, by, value, int(timeout * 1000), False)
+        return await self.evaluate(target_id, expression, timeout=timeout + 2, await_promise=True) or {}
+
+    async def locate(self, target_id, by, value, timeout=10):
+        """等待元素就绪后滚动到可见区域，返回元素中心坐标 (x, y)"""
+        ready = await self.wait_ready(target_id, by, value, timeout)
+        if not ready.get("ready"):
+            logger.error(f"CDP定位元素失败: {by}, {value}, 原因: {ready.get('reason')}")
+            return None
+        info = await self.evaluate(target_id, as_expression(LOCATE_SCRIPT, by, value)) or {}
+        if info.get("reason") != "ok":
+            logger.error(f"CDP定位元素失败: {by}, {value}, 原因: {info.get('reason')}")
+            return None
+        return info["x"], info["y"]
+
+    async def resolve_presence(self, target_id, locators):
+        """一次调用检查多个 (by, value) 是否存在、可见、可点击"""
+        return await self.evaluate(target_id, as_expression(PRESENCE_SCRIPT, [list(locator) for locator in locators])) or []
+
+    async def move_mouse(self, target_id, x, y):
+        await self.send_to_target(target_id, "Input.dispatchMouseEvent", {"type": "mouseMoved", "x": x, "y": y})
+
+    async def press(self, target_id, x, y):
+        """在 (x, y) 处按下并松开鼠标左键"""
+        for event_type in ("mousePressed", "mouseReleased"):
+            await self.send_to_target(target_id, "Input.dispatchMouseEvent", {
+                "type": event_type, "x": x, "y": y, "button": "left", "clickCount": 1
+            })
+
+    async def js_click(self, target_id, by, value):
+        return bool(await self.evaluate(target_id, as_expression(JS_CLICK_SCRIPT, by, value)))
+
+    async def heartbeat(self, timeout=3):
+        await self.send("Browser.getVersion", timeout=timeout)
+        return True
+
+
+class JobGroup:
+    """类似asyncio.TaskGroup的任务监督
+
+    跟踪所有运行中的任务，可按名称取消，shutdown时统一取消并等待结束。
+    与TaskGroup不同，单个任务出错只记录日志，不会取消其他任务。
+    """
+
+    def __init__(self):
+        self._tasks = {}  # 名称 -> asyncio.Task
+
+    async def run(self, name, coro):
+        task = asyncio.current_task()
+        previous = self._tasks.get(name)
+        if previous is not None and previous is not task:
+            previous.cancel()
+        self._tasks[name] = task
+        try:
+            return await coro
+        except asyncio.CancelledError:
+            logger.info(f"异步任务已取消: {name}")
+            raise
+        except Exception as e:
+            logger.error(f"异步任务 {name} 出错: {str(e)}")
+        finally:
+            if self._tasks.get(name) is task:
+                del self._tasks[name]
+
+    def cancel(self, name):
+        task = self._tasks.get(name)
+        if task is not None:
+            task.cancel()
+            return True
+        return False
+
+    def names(self):
+        return list(self._tasks)
+
+    async def shutdown(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class AsyncClickEngine:
+    """基于asyncio的点击任务执行引擎
+
+    在一个独立线程中运行事件循环，所有点击任务、元素就绪等待、点击间隔和健康检查都是协程，
+    CDP命令通过WebSocket直接发往各个标签页（不切换窗口、不经过msedgedriver），
+    同时等待的数百个操作只占用协程，不占用线程。
+    界面线程通过submit提交协程，并用bridge_to_ui在Tk主线程中处理结果。
+    """
+
+    def __init__(self, browser_connector, health_interval=5.0):
+        self.browser_connector = browser_connector
+        self.health_interval = health_interval
+        self.loop = None
+        self.cdp = None
+        self._group = None
+        self._thread = None
+        self._started = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """启动事件循环线程"""
+        with self._lock:
+            if self.is_running():
+                return
+            self._started.clear()
+            self._thread = threading.Thread(target=self._run_loop, name="AsyncClickEngine", daemon=True)
+            self._thread.start()
+            self._started.wait()
+        self.submit(self._group.run("health", self._health_loop()))
+        logger.info("异步点击引擎已启动")
+
+    def stop(self):
+        """取消所有任务并停止事件循环"""
+        with self._lock:
+            loop, thread = self.loop, self._thread
+            if loop is None:
+                return
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=5)
+            self.loop = None
+        logger.info("异步点击引擎已停止")
+
+    def is_running(self):
+        return self.loop is not None and self._thread is not None and self._thread.is_alive()
+
+    def submit(self, coro):
+        """在事件循环中执行协程，返回concurrent.futures.Future，取消它即取消对应的任务"""
+        if not self.is_running():
+            self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    @staticmethod
+    def bridge_to_ui(future, widget, callback):
+        """future完成后通过widget.after回到Tk主线程调用callback(future)"""
+        future.add_done_callback(lambda f: widget.after(0, callback, f))
+
+    def start_job(self, job):
+        """在事件循环中运行点击任务，job.stop_auto_delivery()会取消对应的协程"""
+        if not self.is_running():
+            self.start()
+        job.begin_run()
+        job.auto_delivery_timer = self.submit(self._group.run(job.job_id, self._run_job(job)))
+        logger.info(f"[{job.name}] 已在异步引擎中启动")
+        return job.auto_delivery_timer
+
+    def running_jobs(self):
+        return [name for name in self._group.names() if name != "health"] if self._group else []
+
+    def _run_loop(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._group = JobGroup()
+        self.loop = loop
+        self._started.set()
+        try:
+            loop.run_forever()
+        finally:
+            try:
+                loop.run_until_complete(self._group.shutdown())
+            finally:
+                loop.close()
+
+    async def _get_cdp(self):
+        client = self.browser_connector.get_cdp_client()
+        if not client.is_connected():
+            # 建立连接需要HTTP请求和WebSocket握手，放到线程池中执行
+            await asyncio.get_running_loop().run_in_executor(None, client.connect)
+        if self.cdp is None or self.cdp.client is not client:
+            self.cdp = AsyncCDP(client)
+        return self.cdp
+
+    async def _resolve_target(self, cdp, job):
+        """返回任务目标标签页的targetId，已固定的标签页在点击失败或导航之前直接使用"""
+        pinned = job.pinned_tab()
+        if pinned is not None:
+            return handle_to_target_id(pinned)
+        pattern = job.target_tab_pattern
+        if pattern is None:
+            handle = self.browser_connector.current_handle
+        else:
+            if self.browser_connector.is_tab_index_live():
+                tabs = self.browser_connector.tab_index.find_by_url_pattern(pattern)
+            else:
+                targets = await asyncio.get_running_loop().run_in_executor(None, cdp.client.list_targets)
+                tabs = [target for target in targets if pattern.matches(target.get("url", ""))]
+            if not tabs:
+                return None
+            handle = self.browser_connector.handle_for_target(tabs[0]["id"])
+        if handle:
+            job.pin_tab(handle)
+        return handle_to_target_id(handle)
+
+    async def _click_once(self, cdp, job, step):
+        target_id = await self._resolve_target(cdp, job)
+        if not target_id:
+            logger.error(f"[{job.name}] 未找到匹配 {job.target_tab_url} 的标签页")
+            return False
+
+        live = None
+        if job.has_multiple_targets():
+            try:
+                live = job.live_targets(await cdp.resolve_presence(target_id, job.target_locators()))
+            except CDPError as e:
+                logger.warning(f"[{job.name}] 批量检查定位表达式失败: {str(e)}")
+        locator = job.next_locator(live)
+        if locator is None:
+            logger.error("未设置有效的定位方式和路径")
+            return False
+        by, value = locator
+
+        cache = self.browser_connector.element_cache
+        tab = target_id.upper()
+        if await self._skip_missing(cdp, target_id, by, value):
+            return False
+
+        if job.click_strategy == "direct":
+            ready = await cdp.wait_ready(target_id, by, value)
+            if not ready.get("ready"):
+                logger.error(f"等待元素就绪失败: {by}, {value}, 原因: {ready.get('reason')}")
+                if ready.get("reason") in ("timeout", "invalid_locator"):
+                    cache.mark_missing(tab, by, value)
+                return False
+            return await cdp.js_click(target_id, by, value)
+
+        point = await cdp.locate(target_id, by, value)
+        if point is None:
+            cache.mark_missing(tab, by, value)
+            return False
+        x, y = point
+        if step is not None:
+            x += step.x_offset
+            y += step.y_offset
+        await cdp.move_mouse(target_id, x, y)
+        if step is not None and step.hover_pause > 0:
+            # 悬停时间只占用协程，不计入点击耗时
+            paused = time.monotonic()
+            await asyncio.sleep(step.hover_pause)
+            job.exclude_pause(time.monotonic() - paused)
+        await cdp.press(target_id, x, y)
+        logger.info(f"点击元素: {by}, {value} (异步CDP)")
+        return True
+
+    async def _probe(self, cdp, job):
+        """熔断探测：CDP连接存活、目标标签页存在、至少一个目标元素可点击"""
+        try:
+            await cdp.heartbeat()
+            target_id = await self._resolve_target(cdp, job)
+            if not target_id:
+                return False
+            presence = await cdp.resolve_presence(target_id, job.probe_locators())
+            return any(state and state.get("clickable") for state in presence)
+        except Exception as e:
+            logger.warning(f"[{job.name}] 熔断探测失败: {str(e)}")
+            return False
+
+    async def _skip_missing(self, cdp, target_id, by, value):
+        """与BrowserConnector.skip_missing相同：负缓存命中且元素仍不可用时跳过等待"""
+        cache = self.browser_connector.element_cache
+        tab = target_id.upper()
+        if not cache.is_missing(tab, by, value):
+            return False
+        presence = await cdp.resolve_presence(target_id, [(by, value)])
+        if presence and presence[0].get("visible") and presence[0].get("enabled"):
+            cache.clear_missing(tab, by, value)
+            return False
+        logger.info(f"元素近期未找到且仍不可用，跳过等待: {by}, {value}")
+        return True
+
+    async def _run_job(self, job):
+        while job.auto_delivery_enabled and not job.check_limits():
+            # 每次都重新获取：重新连接浏览器或健康检查重连后，连接器中的CDP客户端会被替换
+            try:
+                cdp = await self._get_cdp()
+            except Exception as e:
+                logger.warning(f"[{job.name}] 获取CDP连接失败: {str(e)}")
+                cdp = None
+            if job.breaker.is_open():
+                # 熔断打开时只做廉价探测，不执行点击
+                job.breaker.record_probe(cdp is not None and await self._probe(cdp, job))
+                await asyncio.sleep(max(0, job.next_wakeup() - time.monotonic()))
+                continue
+            step = job.timeline.next_step() if job.timeline else None
+            job.current_step = step
+            # 全局限流：令牌不足时在协程中排队等待
+            delay = self.browser_connector.rate_limiter.reserve_click(job.job_id, job.rate_weight)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            job.mark_dispatch()
+            try:
+                if cdp is None:
+                    raise CDPError("CDP未连接")
+                keep_running = job.record_click_result(await self._click_once(cdp, job, step))
+            except Exception as e:
+                logger.error(f"[{job.name}] 异步点击执行错误: {str(e)}")
+                keep_running = job.record_click_error()
+            if not keep_running:
+                break
+            # 与调度线程使用相同的间隔计算（退避、思考时间、固定频率、运行结束时刻）
+            await asyncio.sleep(max(0, job.next_wakeup() - time.monotonic()))
+
+    async def _health_loop(self):
+        """定期检查CDP连接，断开时重新连接"""
+        while True:
+            await asyncio.sleep(self.health_interval)
+            if not self.running_jobs():
+                continue
+            try:
+                cdp = await self._get_cdp()
+                await cdp.heartbeat()
+            except Exception as e:
+                logger.warning(f"异步引擎健康检查失败: {str(e)}")
@@ -1,31 +1,65 @@
 import customtkinter as ctk
+import itertools
 import os
-import random
+import threading
 from logger import logger
 from core.browser_connector import BrowserConnector
-import threading
-from selenium.webdriver.common.by import By
-import time
+from core.click_job import ClickJob
+from core.async_engine import AsyncClickEngine
+from core.timed_click import TimedClick
+from core.scheduler import ClickScheduler
+
+
+def _default_job_attribute(name):
+    """把旧的单任务属性转发到默认任务，兼容现有界面代码"""
+    return property(
+        lambda self: getattr(self.default_job, name),
+        lambda self, value: setattr(self.default_job, name, value),
+    )
 
 
 class AutoClickManager:
+    """管理多个自动点击任务(ClickJob)，所有任务共用同一个浏览器连接和调度器
+
+    旧的单任务接口（set_target_xpath、toggle_auto_delivery等）作用于默认任务
+    """
+
+    DEFAULT_JOB_ID = "default"
+
+    # 以下属性转发到默认任务
+    auto_delivery_enabled = _default_job_attribute("auto_delivery_enabled")
+    auto_delivery_timer = _default_job_attribute("auto_delivery_timer")
+    delivery_interval = _default_job_attribute("delivery_interval")
+    enable_random_interval = _default_job_attribute("enable_random_interval")
+    min_random_interval = _default_job_attribute("min_random_interval")
+    max_random_interval = _default_job_attribute("max_random_interval")
+    retry_count = _default_job_attribute("retry_count")
+    target_xpath = _default_job_attribute("target_xpath")
+    target_xpaths = _default_job_attribute("target_xpaths")
+    target_selector = _default_job_attribute("target_selector")
+    xpath_selector = _default_job_attribute("xpath_selector")
+    target_url = _default_job_attribute("target_url")
+    locator_type = _default_job_attribute("locator_type")
+    target_tab_url = _default_job_attribute("target_tab_url")
+    target_tab_pattern = _default_job_attribute("target_tab_pattern")
+    start_time = _default_job_attribute("start_time")
+    click_count = _default_job_attribute("click_count")
+    click_strategy = _default_job_attribute("click_strategy")
+    use_fast_click = _default_job_attribute("use_fast_click")
+    humanization_seed = _default_job_attribute("humanization_seed")
+    timeline = _default_job_attribute("timeline")
+    current_step = _default_job_attribute("current_step")
+    schedule_mode = _default_job_attribute("schedule_mode")
+
     def __init__(self, browser_connector):
         self.browser_connector = browser_connector
-        self.auto_delivery_enabled = False
-        self.auto_delivery_timer = None
-        self.delivery_interval = 3  # 固定间隔时间（秒）
-        self.enable_random_interval = False  # 是否启用随机间隔
-        self.min_random_interval = 1  # 最小随机间隔时间（秒）
-        self.max_random_interval = 5  # 最大随机间隔时间（秒）
-        self.retry_count = 0
-        self.target_xpath = ""
-        self.target_xpaths = []  # 新增：存储多个XPath
-        self.target_selector = ""
-        self.target_url = ""
-        self.locator_type = "xpath"
-        self.target_tab_url = ""
-        self.start_time = None
-        self.click_count = 0
+        self.scheduler = ClickScheduler()  # 所有任务共用的单线程调度器
+        self._jobs_lock = threading.Lock()
+        self.jobs = {}  # job_id -> ClickJob
+        self._job_seq = itertools.count(1)
+        self.default_job = self.create_job(self.DEFAULT_JOB_ID, "默认任务")
+        self.async_engine = None  # 按需创建的asyncio执行引擎
+        self.timed_clicks = {}  # job_id -> TimedClick
 
     def connect_to_browser(self, driver_path=None, max_retries=3):
         """连接到浏览器，增强版"""
@@ -41,6 +75,8 @@ class AutoClickManager:
             )
             
             logger.info("浏览器连接成功")
+            # 启动后台健康检查，会话丢失时自动重连
+            self.browser_connector.start_health_monitor()
             return result
                 
         except ConnectionError as ce:
@@ -65,244 +101,201 @@ class AutoClickManager:
         return self.browser_connector.get_current_url()
 
     def close_browser(self):
+        if self.async_engine:
+            self.async_engine.stop()
+        self.browser_connector.stop_health_monitor()
         self.browser_connector.close_driver()
 
-    def set_target_url(self, url):
-        self.target_url = url
+    def create_job(self, job_id=None, name=None):
+        """创建一个新的点击任务，job_id已存在时抛出ValueError"""
+        with self._jobs_lock:
+            if job_id is None:
+                job_id = f"job-{next(self._job_seq)}"
+            if job_id in self.jobs:
+                raise ValueError(f"点击任务已存在: {job_id}")
+            return self._create_job_locked(job_id, name)
 
-    def set_target_xpath(self, xpath, locator_type=None):
-        self.target_xpath = xpath
-        self.target_xpaths = [xpath]  # 同步到多XPath列表
-        if locator_type:
-            self.locator_type = locator_type
-
-    # 新增：设置多个XPath
-    def set_target_xpaths(self, xpaths):
-        self.target_xpaths = xpaths
-        # 同时设置第一个XPath为默认的单XPath（保持兼容性）
-        if xpaths:
-            self.target_xpath = xpaths[0]
+    def _create_job_locked(self, job_id, name):
+        job = ClickJob(job_id, self.browser_connector, self.scheduler, name)
+        self.jobs[job_id] = job
+        logger.info(f"创建点击任务: {job.name} ({job_id})")
+        return job
+
+    def get_job(self, job_id):
+        with self._jobs_lock:
+            return self.jobs.get(job_id)
+
+    def get_or_create_job(self, job_id, name=None):
+        """返回指定的任务，不存在时创建，界面面板用它获取各自独立的任务"""
+        with self._jobs_lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                job = self._create_job_locked(job_id, name)
+            return job
+
+    def remove_job(self, job_id):
+        """停止并删除任务，默认任务不能删除"""
+        if job_id == self.DEFAULT_JOB_ID:
+            logger.warning("默认任务不能删除")
+            return False
+        with self._jobs_lock:
+            job = self.jobs.pop(job_id, None)
+        if job is None:
+            return False
+        job.stop_auto_delivery()
+        logger.info(f"删除点击任务: {job.name} ({job_id})")
+        return True
+
+    def list_jobs(self):
+        """返回所有任务的状态摘要"""
+        with self._jobs_lock:
+            jobs = list(self.jobs.values())
+        return [job.get_status() for job in jobs]
+
+    def running_jobs(self):
+        with self._jobs_lock:
+            return [job for job in self.jobs.values() if job.auto_delivery_enabled]
+
+    def get_async_engine(self):
+        """返回asyncio执行引擎，首次调用时创建"""
+        if self.async_engine is None:
+            self.async_engine = AsyncClickEngine(self.browser_connector)
+        return self.async_engine
+
+    def start_job(self, job_id, use_asyncio=False):
+        """启动任务；use_asyncio=True时在asyncio引擎中通过CDP直连执行，需要websocket-client"""
+        job = self.get_job(job_id)
+        if job is None:
+            logger.error(f"点击任务不存在: {job_id}")
+            return False
+        if not job.auto_delivery_enabled:
+            if use_asyncio:
+                self.get_async_engine().start_job(job)
+            else:
+                job.start()
+        return True
+
+    def stop_job(self, job_id):
+        job = self.get_job(job_id)
+        if job is None:
+            return False
+        job.stop_auto_delivery()
+        return True
+
+    def schedule_timed_click(self, fire_at, job_id=None, prepare_lead=2.0, on_done=None):
+        """预约在指定时刻点击一次
+
+        fire_at支持 "HH:MM:SS.mmm"、"YYYY-MM-DD HH:MM:SS.mmm"、datetime或时间戳，
+        默认使用默认任务的目标设置，同一任务重复预约时取消之前的预约。
+        完成后TimedClick.report中记录实际的触发偏差。
+        """
+        job = self.default_job if job_id is None else self.get_job(job_id)
+        if job is None:
+            logger.error(f"点击任务不存在: {job_id}")
+            return None
+        self.cancel_timed_click(job.job_id)
+        timed_click = TimedClick(job, fire_at, prepare_lead=prepare_lead, on_done=on_done)
+        self.timed_clicks[job.job_id] = timed_click
+        return timed_click.arm()
+
+    def cancel_timed_click(self, job_id=None):
+        timed_click = self.timed_clicks.pop(job_id or self.DEFAULT_JOB_ID, None)
+        if timed_click is None:
+            return False
+        timed_click.cancel()
+        return True
+
+    def set_adaptive_interval(self, enabled, min_interval=None, max_interval=None):
+        self.default_job.set_adaptive_interval(enabled, min_interval, max_interval)
+
+    def set_rate_limits(self, clicks_per_sec=None, commands_per_sec=None, burst=None):
+        """设置所有任务共用的点击频率和WebDriver命令频率上限，None表示不限制"""
+        self.browser_connector.rate_limiter.configure(clicks_per_sec, commands_per_sec, burst)
+
+    def get_job_telemetry(self, job_id=None):
+        """任务的调度遥测：调度延迟(mean/p50/p95/p99)、点击耗时、漂移、实际与配置的点击频率"""
+        job = self.default_job if job_id is None else self.get_job(job_id)
+        return job.get_telemetry() if job else None
+
+    def get_all_telemetry(self):
+        with self._jobs_lock:
+            jobs = list(self.jobs.values())
+        return {job.job_id: job.get_telemetry() for job in jobs}
+
+    def stop_all_jobs(self):
+        """停止所有任务，并取消所有定时点击"""
+        for timed_click in list(self.timed_clicks.values()):
+            timed_click.cancel()
+        self.timed_clicks.clear()
+        with self._jobs_lock:
+            jobs = list(self.jobs.values())
+        for job in jobs:
+            if job.auto_delivery_enabled:
+                job.stop_auto_delivery()
 
-    def set_locator_type(self, locator_type):
-        self.locator_type = locator_type
-        
-    def set_target_tab_url(self, tab_url):
-        """设置目标标签页URL模式"""
-        self.target_tab_url = tab_url
-        
     def get_all_tabs(self):
         """获取所有标签页信息"""
         return self.browser_connector.get_all_tabs()
-        
+
     def switch_to_tab(self, url_pattern):
         """切换到指定URL模式的标签页"""
         return self.browser_connector.switch_to_tab_by_url(url_pattern)
-        
+
     def switch_to_tab_by_index(self, index):
         """根据索引切换到指定标签页"""
         return self.browser_connector.switch_to_tab_by_index(index)
 
+    # 以下为旧的单任务接口，作用于默认任务
+    def set_target_url(self, url):
+        self.default_job.set_target_url(url)
+
+    def set_target_xpath(self, xpath, locator_type=None):
+        self.default_job.set_target_xpath(xpath, locator_type)
+
+    def set_target_xpaths(self, xpaths, weights=None):
+        self.default_job.set_target_xpaths(xpaths, weights)
+
+    def set_click_strategy(self, strategy):
+        self.default_job.set_click_strategy(strategy)
+
+    def set_fast_click(self, enabled):
+        self.default_job.set_fast_click(enabled)
+
+    def set_locator_type(self, locator_type):
+        self.default_job.set_locator_type(locator_type)
+
+    def set_target_tab_url(self, tab_url):
+        self.default_job.set_target_tab_url(tab_url)
+
     def get_delivery_interval(self):
-        return self.delivery_interval
+        return self.default_job.get_delivery_interval()
 
     def toggle_auto_delivery(self):
-        self.auto_delivery_enabled = not self.auto_delivery_enabled
-
-        if self.auto_delivery_enabled:
-            # 重置统计数据
-            self.start_time = time.time()
-            self.click_count = 0
-            logger.info("重置点击统计数据")
-            # 修复调用时缺少参数的问题
-            self.start_auto_delivery(
-                target_url=self.target_url,
-                xpath=self.target_xpath,
-                interval=self.delivery_interval,
-                random_interval=self.enable_random_interval,
-                min_interval=self.min_random_interval,
-                max_interval=self.max_random_interval
-            )
-        else:
-            self.stop_auto_delivery()
-
-        return self.auto_delivery_enabled
+        return self.default_job.toggle_auto_delivery()
 
     def set_random_interval_range(self, min_interval, max_interval):
-        """设置随机间隔时间范围"""
-        try:
-            self.min_random_interval = float(min_interval)
-            self.max_random_interval = float(max_interval)
-            
-            # 确保最小值不大于最大值
-            if self.min_random_interval > self.max_random_interval:
-                self.min_random_interval, self.max_random_interval = self.max_random_interval, self.min_random_interval
-        except ValueError:
-            # 如果输入无效，使用默认值
-            self.min_random_interval = 1
-            self.max_random_interval = 5
-            logger.warning("无效的随机间隔时间范围，使用默认值(1-5秒)")
-    
+        self.default_job.set_random_interval_range(min_interval, max_interval)
+
+    def get_planned_timeline(self, count=20):
+        return self.default_job.get_planned_timeline(count)
+
     def get_next_interval(self):
-        """获取下一次点击的间隔时间"""
-        if self.enable_random_interval:
-            # 生成随机间隔时间
-            interval = random.uniform(self.min_random_interval, self.max_random_interval)
-            logger.info(f"下次点击将在 {interval:.2f} 秒后执行(随机间隔)")
-            return interval
-        else:
-            # 使用固定间隔时间
-            interval = self.delivery_interval
-            logger.info(f"下次点击将在 {interval} 秒后执行(固定间隔)")
-            return interval
+        return self.default_job.get_next_interval()
+
+    def set_schedule_mode(self, mode):
+        self.default_job.set_schedule_mode(mode)
+
+    def set_run_limits(self, max_clicks=None, max_duration=None, stop_at=None, max_failures=None):
+        self.default_job.set_run_limits(max_clicks, max_duration, stop_at, max_failures)
 
     def stop_auto_delivery(self):
-        if self.auto_delivery_timer:
-            self.auto_delivery_timer.cancel()
-            logger.info("自动投放已停止")
-            self.auto_delivery_timer = None
-            
+        self.default_job.stop_auto_delivery()
+
     def perform_click(self):
-        """执行点击操作"""
-        try:
-            if self.locator_type == "xpath" and self.target_xpath:
-                logger.info(f"使用XPath定位: {self.target_xpath}")
-                return self.browser_connector.click_element(By.XPATH, self.target_xpath, timeout=10)
-            elif self.locator_type == "css" and self.target_selector:
-                logger.info(f"使用CSS选择器定位: {self.target_selector}")
-                return self.browser_connector.click_element(By.CSS_SELECTOR, self.target_selector, timeout=10)
-            else:
-                logger.error("未设置有效的定位方式和路径")
-                return False
-        except Exception as e:
-            logger.error(f"执行点击操作时出错: {str(e)}")
-            return False
+        return self.default_job.perform_click()
 
-    # 新增：执行随机点击操作
     def perform_random_click(self):
-        """从多个XPath中随机选择一个执行点击操作"""
-        if not self.target_xpaths:
-            logger.error("未设置有效的XPath列表")
-            return False
-        
-        # 随机选择一个XPath
-        selected_xpath = random.choice(self.target_xpaths)
-        logger.info(f"随机选择XPath: {selected_xpath}")
-        
-        try:
-            return self.browser_connector.click_element(By.XPATH, selected_xpath, timeout=10)
-        except Exception as e:
-            logger.error(f"执行随机点击操作时出错: {str(e)}")
-            return False
-
-    def start_auto_delivery(self, target_url, xpath, interval, random_interval=False, min_interval=0, max_interval=0):
-        # 如果未启用自动投放，则直接返回
-        if not self.auto_delivery_enabled:
-            return
-
-        try:
-            # 初始化开始时间（如果尚未初始化）
-            if self.start_time is None:
-                self.start_time = time.time()
-                logger.info("开始记录点击统计数据")
-
-            # 检查浏览器连接状态
-            if not self.browser_connector.is_connected():
-                logger.warning("浏览器未连接，尝试重新连接...")
-                try:
-                    # 使用重试机制重新连接浏览器
-                    if not self.browser_connector.connect_to_existing_browser(max_retries=2):
-                        logger.error("重新连接浏览器失败")
-                        self.auto_delivery_enabled = False
-                        return
-                except Exception as e:
-                    logger.error(f"自动投放过程中重新连接浏览器失败: {str(e)}")
-                    self.auto_delivery_enabled = False
-                    return
-
-            # 检查目标网址
-            if not self.target_url:
-                logger.error("未设置目标网址")
-                self.auto_delivery_enabled = False
-                return
-                
-            # 获取当前页面URL用于调试
-            try:
-                current_url = self.browser_connector.get_current_url()
-                logger.info(f"当前页面URL: {current_url}")
-                
-                # 如果设置了目标标签页URL模式，且当前URL不包含目标模式，则尝试切换标签页
-                if self.target_tab_url and (not current_url or self.target_tab_url not in current_url):
-                    logger.info(f"尝试切换到包含 {self.target_tab_url} 的标签页")
-                    if not self.browser_connector.switch_to_tab_by_url(self.target_tab_url):
-                        logger.warning(f"未找到包含 {self.target_tab_url} 的标签页，将在当前标签页操作")
-                    else:
-                        # 切换标签页后重新获取URL
-                        current_url = self.browser_connector.get_current_url()
-                        logger.info(f"切换后的页面URL: {current_url}")
-            except Exception as url_error:
-                logger.warning(f"获取或切换URL时出错: {str(url_error)}")
-                # 继续执行，不因URL错误而中断自动点击
-
-            logger.info(f"执行自动投放点击，定位方式: {self.locator_type}")
-
-            # 尝试点击目标元素
-            if len(self.target_xpaths) > 1:
-                # 多个XPath时使用随机点击
-                success = self.perform_random_click()
-            else:
-                # 单个XPath时使用普通点击
-                success = self.perform_click()
-
-            if success:
-                logger.info("自动投放点击成功")
-                # 增加点击计数
-                self.click_count += 1
-                logger.info(f"当前点击次数: {self.click_count}")
-                # 重置重试计数
-                self.retry_count = 0
-            else:
-                self.retry_count += 1
-                logger.warning(f"自动投放点击失败，第{self.retry_count}次重试")
-                # 如果连续失败5次，暂停
-                if self.retry_count >= 5:
-                    logger.error("连续5次点击失败，暂停自动投放")
-                    self.auto_delivery_enabled = False
-                    return
-        except Exception as e:
-            logger.error(f"自动投放执行错误: {str(e)}")
-            # 发生异常时增加重试计数
-            self.retry_count += 1
-            if self.retry_count >= 5:
-                logger.error("连续5次错误，暂停自动投放")
-                self.auto_delivery_enabled = False
-                return
-
-        # 设置下一次点击
-        # 如果启用了随机间隔，每次都重新生成随机间隔
-        if self.enable_random_interval:
-            delay = self.get_next_interval()
-        else:
-            # 实现指数退避策略，最多延迟到30秒
-            base_interval = self.get_next_interval()
-            delay = min(base_interval * (2 ** min(self.retry_count, 5)), 30)
-
-        # 使用threading.Timer替代wx.CallLater
-        if self.auto_delivery_timer:
-            self.auto_delivery_timer.cancel()
-        # 修复递归调用时缺少参数的问题
-        self.auto_delivery_timer = threading.Timer(delay, lambda: self.start_auto_delivery(
-            target_url=self.target_url,
-            xpath=self.target_xpath,
-            interval=self.delivery_interval,
-            random_interval=self.enable_random_interval,
-            min_interval=self.min_random_interval,
-            max_interval=self.max_random_interval
-        ))
-        self.auto_delivery_timer.daemon = True  # 设置为守护线程，主线程结束时自动结束
-        self.auto_delivery_timer.start()
+        return self.default_job.perform_random_click()
 
     def get_statistics(self):
-        if self.start_time is None:
-            return 0, 0
-        elapsed_time = time.time() - self.start_time
-        return elapsed_time, self.click_count
\ No newline at end of file
+        return self.default_job.get_statistics()
@@ -4,14 +4,46 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import StaleElementReferenceException, ElementNotInteractableException, TimeoutException
 from logger import logger  # 修正导入路径
+from core.cdp_client import CDPClient, handle_to_target_id
+from core.cdp_click_engine import CDPClickEngine
+from core.tab_index import TabIndex
+from core.element_cache import ElementCache
+from core.click_strategies import DEFAULT_CLICK_STRATEGIES
+from core.url_matcher import compile_url_pattern
+from core.page_scripts import (
+    LOCATE_AND_CLICK_SCRIPT, DOM_VERSION_SCRIPT, WAIT_FOR_ELEMENT_SCRIPT, PRESENCE_SCRIPT, ELEMENT_READY_SCRIPT,
+    as_selenium_script, as_selenium_async_script
+)
+from core.connection_monitor import ConnectionMonitor, SingleFlight, is_session_lost_error
+from core.rate_limiter import RateLimiter
+from core.cancellation import ClickCancelled, current_token, cancellable_wait, NEVER_CANCELLED
+import random
 import socket
+import threading
 import time
 
 class BrowserConnector:
     def __init__(self):
         self.driver = None
         self.target_tab_url = None  # 存储目标标签页的URL
+        self.debugger_address = "localhost:9222"
+        self.current_handle = None  # 驱动当前所在的标签页句柄
+        self.cdp_client = None  # 调试端口的CDP客户端（按需创建）
+        self.cdp_engine = None  # CDP直连点击引擎（按需创建）
+        self.tab_index = TabIndex()  # 由Target事件实时维护的标签页索引
+        self.element_cache = ElementCache()  # 已定位元素的缓存
+        self.stale_retry_timeout = 1  # 缓存元素失效后重新定位的超时时间（秒）
+        self.readiness_mode = "observer"  # 等待元素就绪的方式: "observer"(页面内监听) 或 "poll"(WebDriverWait)
+        self._script_timeout = 30  # 驱动当前的异步脚本超时时间（秒）
+        self.click_strategies = {strategy.name: strategy for strategy in DEFAULT_CLICK_STRATEGIES}
+        self.driver_path = None  # 缓存的驱动路径，供自动重连使用
+        self._reconnect_flight = SingleFlight()
+        self.health_monitor = None
+        self.rate_limiter = RateLimiter()  # 所有任务共用的点击/WebDriver命令限流
+        # 调度线程和定时点击线程共用同一个WebDriver，从切换标签页到点击完成的整个过程都要持有此锁
+        self.driver_lock = threading.RLock()
 
     def connect_to_existing_browser(self, debugger_address="localhost:9222", driver_path=None, max_retries=3):
         """连接到已打开的Edge浏览器
@@ -26,6 +58,9 @@ class BrowserConnector:
             logger.info("关闭现有浏览器连接以确保干净的连接状态")
             self.close_driver()
         
+        # 未指定时使用上次成功连接时的驱动路径
+        driver_path = driver_path or self.driver_path
+        
         # 检查驱动路径是否提供
         if not driver_path:
             error_msg = "未提供msedgedriver路径，请使用'选择msedgedriver路径'按钮指定驱动位置"
@@ -59,12 +94,17 @@ class BrowserConnector:
         while retry_count < max_retries:
             try:
                 logger.info(f"正在连接到浏览器，调试地址: {debugger_address} (尝试 {retry_count+1}/{max_retries})")
-                self.driver = webdriver.Edge(service=service, options=edge_options)
+                self.driver = self.rate_limiter.wrap_driver(webdriver.Edge(service=service, options=edge_options))
                 logger.info("Edge驱动实例创建成功")
                 
                 # 立即验证连接是否成功
                 current_url = self.driver.current_url
                 logger.info(f"已成功连接到Edge浏览器，当前URL: {current_url}")
+                self.debugger_address = debugger_address
+                self.driver_path = driver_path
+                self._script_timeout = 30
+                self.current_handle = self.driver.current_window_handle
+                self.start_tab_index()
                 return True
                 
             except Exception as e:
@@ -150,6 +190,12 @@ class BrowserConnector:
             raise ConnectionError(error_msg)
 
     def close_driver(self):
+        self.tab_index.live = False
+        self.element_cache.clear()
+        if self.cdp_client:
+            self.cdp_client.close()
+            self.cdp_client = None
+            self.cdp_engine = None
         if self.driver:
             try:
                 self.driver.quit()
@@ -157,51 +203,482 @@ class BrowserConnector:
             except Exception as e:
                 logger.error(f"关闭Edge浏览器时出错: {str(e)}")
             self.driver = None
+            self.current_handle = None
 
     def is_connected(self):
         return self.driver is not None
 
-    def find_element(self, by, value, timeout=10):
-        """查找元素，支持多种定位方式"""
+    def can_reconnect(self):
+        """是否具备自动重连所需的驱动路径"""
+        return bool(self.driver_path)
+
+    def heartbeat(self):
+        """心跳检查：读取窗口句柄列表，会话丢失时抛出异常"""
+        driver = self.driver
+        if driver is None:
+            raise ConnectionError("浏览器未连接")
+        return driver.window_handles
+
+    def reconnect(self, max_attempts=3, base_delay=0.5, max_delay=8):
+        """使用缓存的调试地址和驱动路径重新连接浏览器
+        
+        并发调用（界面刷新、定时点击、健康检查）共享同一次重连尝试，
+        每次失败后按带随机抖动的指数退避等待
+        """
+        if not self.can_reconnect():
+            logger.error("没有可用的驱动路径，无法自动重连浏览器")
+            return False
+        return self._reconnect_flight.do(
+            lambda: self._reconnect_with_backoff(max_attempts, base_delay, max_delay)
+        )
+
+    def _reconnect_with_backoff(self, max_attempts, base_delay, max_delay):
+        for attempt in range(max_attempts):
+            try:
+                logger.info(f"正在自动重连浏览器 (尝试 {attempt+1}/{max_attempts})")
+                self.connect_to_existing_browser(
+                    debugger_address=self.debugger_address,
+                    driver_path=self.driver_path,
+                    max_retries=1
+                )
+                logger.info("自动重连浏览器成功")
+                return True
+            except Exception as e:
+                logger.error(f"自动重连浏览器失败: {str(e)}")
+                if attempt + 1 < max_attempts:
+                    delay = min(max_delay, base_delay * (2 ** attempt)) * random.uniform(0.5, 1.5)
+                    time.sleep(delay)
+        return False
+
+    def start_health_monitor(self, interval=5.0):
+        """启动后台连接健康检查"""
+        if self.health_monitor is None:
+            self.health_monitor = ConnectionMonitor(self, interval)
+        self.health_monitor.interval = interval
+        self.health_monitor.start()
+
+    def stop_health_monitor(self):
+        if self.health_monitor:
+            self.health_monitor.stop()
+
+    def _switch_window(self, handle):
+        """切换驱动所在的标签页，并记录当前句柄"""
+        self.driver.switch_to.window(handle)
+        self.current_handle = handle
+
+    def get_cdp_client(self):
+        """获取调试端口的CDP客户端，复用connect_to_existing_browser使用的调试地址"""
+        if self.cdp_client is None or self.cdp_client.debugger_address != self.debugger_address:
+            if self.cdp_client:
+                self.cdp_client.close()
+            self.cdp_client = CDPClient(self.debugger_address)
+            self.cdp_engine = None
+            self.tab_index.live = False
+            self.cdp_client.on("Target.targetCreated", self.tab_index.on_target_created)
+            self.cdp_client.on("Target.targetInfoChanged", self.tab_index.on_target_info_changed)
+            self.cdp_client.on("Target.targetDestroyed", self.tab_index.on_target_destroyed)
+            self.cdp_client.on("Target.targetInfoChanged", self.element_cache.on_target_info_changed)
+            self.cdp_client.on("Target.targetDestroyed", self.element_cache.on_target_destroyed)
+            # 每次(重新)连接后重新订阅并建立索引，连接断开时索引立即失效
+            self.cdp_client.on_connection(self._index_tabs, self._on_cdp_disconnected)
+        return self.cdp_client
+
+    def start_tab_index(self):
+        """订阅CDP的Target事件并建立标签页索引
+        
+        失败时不影响连接，标签页相关操作会回退到逐个切换的方式
+        """
+        try:
+            client = self.get_cdp_client()
+            if not client.is_connected():
+                # 连接成功后由连接回调建立索引
+                client.connect()
+                return self.tab_index.live
+        except Exception as e:
+            self.tab_index.live = False
+            logger.warning(f"无法建立标签页索引，将使用逐个切换的方式查找标签页: {str(e)}")
+            return False
+        return self._index_tabs()
+
+    def _index_tabs(self):
+        """在当前CDP连接上订阅Target事件并重建标签页索引"""
+        client = self.cdp_client
+        try:
+            client.send("Target.setDiscoverTargets", {"discover": True})
+            targets = client.send("Target.getTargets").get("targetInfos", [])
+            self.tab_index.reset(targets)
+            for tab in self.tab_index.all():
+                self.element_cache.note_url(tab['id'], tab['url'])
+            self.tab_index.live = True
+            logger.info(f"标签页索引已建立，共 {len(self.tab_index)} 个标签页")
+            return True
+        except Exception as e:
+            self.tab_index.live = False
+            logger.warning(f"无法建立标签页索引，将使用逐个切换的方式查找标签页: {str(e)}")
+            return False
+
+    def _on_cdp_disconnected(self):
+        if self.tab_index.live:
+            self.tab_index.live = False
+            logger.warning("CDP连接已断开，标签页索引暂停使用，重新连接后将重新建立")
+
+    def is_tab_index_live(self):
+        """标签页索引是否正在实时更新"""
+        return self.tab_index.live and self.cdp_client is not None and self.cdp_client.is_connected()
+
+    def active_handle(self):
+        """驱动当前所在标签页的窗口句柄，已知时不与驱动交互"""
+        if not self.current_handle:
+            self.current_handle = self.driver.current_window_handle
+        return self.current_handle
+
+    def activate_handle(self, handle):
+        """切换到指定窗口句柄，已在该标签页时不与驱动交互"""
+        if self.current_handle != handle:
+            self._switch_window(handle)
+
+    def get_tab_url(self, handle):
+        """返回指定标签页的URL，标签页索引可用时不与驱动交互，标签页不存在时返回None"""
+        if self.is_tab_index_live():
+            tab = self.tab_index.get(handle_to_target_id(handle))
+            return tab['url'] if tab else None
+        self.activate_handle(handle)
+        return self.driver.current_url
+
+    def tab_navigation_count(self, handle):
+        """标签页的导航次数（来自CDP的Target事件），标签页已关闭时返回None，索引不可用时返回-1"""
+        if not self.is_tab_index_live():
+            return -1
+        return self.tab_index.navigation_count(handle_to_target_id(handle))
+
+    def handle_for_target(self, target_id):
+        """将targetId转换回驱动使用的窗口句柄格式"""
+        if self.current_handle and self.current_handle.startswith("CDwindow-"):
+            return f"CDwindow-{target_id}"
+        return target_id
+
+    def get_cdp_engine(self):
+        """获取CDP直连点击引擎"""
+        client = self.get_cdp_client()
+        if self.cdp_engine is None:
+            self.cdp_engine = CDPClickEngine(client)
+        if not client.is_connected():
+            client.connect()
+        return self.cdp_engine
+
+    def _get_dom_version(self):
+        """读取页面DOM版本号，用于判断缓存的元素是否可能已失效"""
+        return self.driver.execute_script(as_selenium_script(DOM_VERSION_SCRIPT))
+
+    def find_element(self, by, value, timeout=10, use_cache=True):
+        """查找元素，支持多种定位方式
+        
+        use_cache为True时优先返回缓存中的元素，命中时只用一次脚本调用确认元素仍可见、可用，
+        否则移出缓存并以stale_retry_timeout快速重新定位一次，避免把已隐藏或已禁用的元素当作成功点击
+        """
         if not self.driver:
             logger.error("浏览器未初始化或未连接")
             return None
 
+        tab = handle_to_target_id(self.current_handle)
+        if use_cache:
+            cached = self.element_cache.get(tab, by, value)
+            if cached is not None:
+                element, dom_version = cached
+                try:
+                    if not self.element_cache.check_dom_version or self._get_dom_version() == dom_version:
+                        if self.driver.execute_script(as_selenium_script(ELEMENT_READY_SCRIPT), element):
+                            return element
+                        logger.info(f"缓存的元素已不可点击，重新定位: {by}, {value}")
+                except Exception as e:
+                    logger.warning(f"检查缓存的元素失败，重新定位: {str(e)}")
+                self.element_cache.invalidate(tab, by, value)
+                # 与缓存元素失效时一样只快速重新定位一次，不等待完整超时
+                timeout = min(timeout, self.stale_retry_timeout)
+
+        if self.skip_missing(tab, by, value):
+            return None
+
         try:
-            element = WebDriverWait(self.driver, timeout).until(
-                EC.element_to_be_clickable((by, value))
-            )
-            logger.info(f"找到可点击元素: {by}, {value}")
+            element = None
+            if self.readiness_mode == "observer":
+                try:
+                    result = self.wait_for_element_ready(by, value, timeout)
+                    if not result.get('ready'):
+                        logger.error(f"查找可点击元素失败: {by}, {value}, 原因: {result.get('reason')}")
+                        if result.get('reason') in ("timeout", "invalid_locator"):
+                            self.element_cache.mark_missing(tab, by, value)
+                        return None
+                    element = result.get('element')
+                    logger.info(f"找到可点击元素: {by}, {value} (等待 {result.get('waited_ms', 0):.0f}ms)")
+                except ClickCancelled:
+                    raise
+                except Exception as e:
+                    logger.warning(f"页面内等待元素失败，改用WebDriverWait: {str(e)}")
+
+            if element is None:
+                token = current_token()
+                clickable = EC.element_to_be_clickable((by, value))
+
+                def condition(driver):
+                    token.raise_if_cancelled()
+                    return clickable(driver)
+                # 每次轮询前检查令牌，停止后最多再等一个轮询间隔
+                element = WebDriverWait(self.driver, timeout).until(condition)
+                logger.info(f"找到可点击元素: {by}, {value}")
+            if use_cache:
+                dom_version = self._get_dom_version() if self.element_cache.check_dom_version else None
+                self.element_cache.put(tab, by, value, element, dom_version)
             return element
+        except ClickCancelled:
+            raise
         except Exception as e:
             logger.error(f"查找可点击元素失败: {by}, {value}, 错误: {str(e)}")
+            if isinstance(e, TimeoutException):
+                self.element_cache.mark_missing(tab, by, value)
             return None
 
-    def click_element(self, by, value, timeout=10):
-        """点击元素，添加反检测措施"""
+    def skip_missing(self, tab, by, value, backend="selenium"):
+        """元素近期未找到时做一次不等待的检查，仍不可用时返回True，调用方应立即失败而不是等待完整超时
+        
+        元素已经出现时清除负缓存并返回False，按正常流程定位。
+        """
+        if not self.element_cache.is_missing(tab, by, value):
+            return False
+        presence = self.resolve_presence([(by, value)], backend=backend)
+        if presence and presence[0].get('visible') and presence[0].get('enabled'):
+            logger.info(f"元素已出现，清除负缓存: {by}, {value}")
+            self.element_cache.clear_missing(tab, by, value)
+            return False
+        logger.info(f"元素近期未找到且仍不可用，跳过等待: {by}, {value}")
+        return True
+
+    def wait_for_element_ready(self, by, value, timeout=10, backend="selenium"):
+        """在页面内注入MutationObserver等待元素就绪（存在、可见、可用）
+        
+        元素一出现即返回，不受WebDriverWait 500ms轮询间隔的限制。
+        点击任务被停止时通过CDP从外部中断页面内的等待，等待本身只有一次驱动调用（见core.cancellation）。
+        
+        Returns:
+            dict: ready、reason、waited_ms，selenium后端就绪时还包含element
+        """
+        if backend == "cdp":
+            target_id = handle_to_target_id(self.current_handle or self.driver.current_window_handle)
+            return self.get_cdp_engine().wait_ready(target_id, by, value, timeout)
+
+        # 异步脚本的超时时间必须大于等待时间，只在需要时调整一次
+        if self._script_timeout < timeout + 2:
+            self.driver.set_script_timeout(timeout + 2)
+            self._script_timeout = timeout + 2
+
+        def wait_once(seconds, wait_id):
+            return self.driver.execute_async_script(
+                as_selenium_async_script(WAIT_FOR_ELEMENT_SCRIPT), by, value, int(seconds * 1000), True, wait_id
+            )
+        return cancellable_wait(wait_once, timeout, self._wait_aborter())
+
+    def _wait_aborter(self):
+        """当前标签页内等待的中断回调，只在有可取消的令牌且CDP已连接时提供"""
+        if current_token() is NEVER_CANCELLED or self.cdp_client is None or not self.cdp_client.is_connected():
+            return None
+        return self.get_cdp_engine().wait_aborter(handle_to_target_id(self.active_handle()))
+
+    def register_click_strategy(self, strategy):
+        """注册点击策略，同名策略会被替换"""
+        self.click_strategies[strategy.name] = strategy
+
+    def click_element(self, by, value, timeout=10, strategy="humanlike"):
+        """点击元素
+
+        Args:
+            strategy: 点击策略名称，内置策略：
+                      "humanlike" 模拟人类操作（随机延迟、鼠标移动、悬停），
+                      "direct" 通过脚本直接调用element.click()，
+                      "cdp" 通过远程调试端口直接派发鼠标事件，绕过msedgedriver
+        """
+        click_strategy = self.click_strategies.get(strategy)
+        if click_strategy is None:
+            logger.error(f"未知的点击策略: {strategy}")
+            return False
+        return click_strategy.click(self, by, value, timeout)
+
+    def begin_click(self, by, value, timeout=10, strategy="humanlike", step=None):
+        """开始一次分阶段点击：完成定位、移动等准备工作，返回完成点击的回调
+        
+        step为预先生成的拟人化参数（HumanizationStep），调用方按其中的悬停时间
+        安排回调的执行时间，准备和点击之间不占用线程。准备失败时返回None。
+        """
+        click_strategy = self.click_strategies.get(strategy)
+        if click_strategy is None:
+            logger.error(f"未知的点击策略: {strategy}")
+            return None
+        return click_strategy.begin(self, by, value, timeout, step)
+
+    def click_located_element(self, by, value, timeout, perform, description=""):
+        """定位元素并调用perform(connector, element)完成点击"""
+        if self.perform_on_element(by, value, timeout, perform):
+            logger.info(f"点击元素: {by}, {value} ({description})")
+            return True
+        return False
+
+    def perform_on_element(self, by, value, timeout, perform):
+        """定位元素并调用perform(connector, element)，返回是否成功
+        
+        缓存的元素已失效时清除缓存并快速重新定位一次
+        """
+        tab = handle_to_target_id(self.current_handle)
         element = self.find_element(by, value, timeout)
         if element:
             try:
-                # 添加随机延迟，模拟人类思考时间
-                import random
-                time.sleep(random.uniform(0.3, 1.5))
-
-                # 模拟鼠标移动到元素（带随机偏移）
-                action = webdriver.ActionChains(self.driver)
-                # 随机偏移量，模拟人类点击不精确性
-                x_offset = random.randint(-5, 5)
-                y_offset = random.randint(-5, 5)
-                action.move_to_element_with_offset(element, x_offset, y_offset)
-                action.pause(random.uniform(0.1, 0.5))  # 悬停片刻
-                action.click()
-                action.perform()
-
-                logger.info(f"点击元素: {by}, {value} (带反检测措施)")
+                try:
+                    # 任务已停止时不再执行点击
+                    current_token().raise_if_cancelled()
+                    perform(self, element)
+                except (StaleElementReferenceException, ElementNotInteractableException):
+                    # 缓存的元素已失效，清除后快速重新定位一次，而不是等待完整超时
+                    logger.info(f"缓存的元素已失效，重新定位: {by}, {value}")
+                    self.element_cache.invalidate(tab, by, value)
+                    element = self.find_element(by, value, min(timeout, self.stale_retry_timeout))
+                    if not element:
+                        return False
+                    current_token().raise_if_cancelled()
+                    perform(self, element)
                 return True
+            except ClickCancelled:
+                raise
             except Exception as e:
+                self.element_cache.invalidate(tab, by, value)
                 logger.error(f"点击元素失败: {by}, {value}, 错误: {str(e)}")
         return False
 
+    def cdp_click_element(self, by, value, timeout=10):
+        """通过CDP直连点击元素，CDP不可用时回退到Selenium点击"""
+        if not self.driver:
+            logger.error("浏览器未初始化或未连接")
+            return False
+
+        try:
+            engine = self.get_cdp_engine()
+        except Exception as e:
+            logger.warning(f"CDP直连不可用，回退到脚本直接点击: {str(e)}")
+            return self.click_element(by, value, timeout, strategy="direct")
+
+        try:
+            if not self.current_handle:
+                self.current_handle = self.driver.current_window_handle
+            target_id = handle_to_target_id(self.current_handle)
+            if self.skip_missing(target_id, by, value, backend="cdp"):
+                return False
+            if engine.click(target_id, by, value, timeout):
+                logger.info(f"点击元素: {by}, {value} (CDP直连)")
+                return True
+            self.element_cache.mark_missing(target_id, by, value)
+        except ClickCancelled:
+            raise
+        except Exception as e:
+            logger.error(f"CDP点击元素失败: {by}, {value}, 错误: {str(e)}")
+        return False
+
+    def cdp_begin_click(self, by, value, timeout=10, step=None):
+        """通过CDP预先定位元素并计算坐标，返回只派发鼠标事件的回调，CDP不可用时回退到脚本点击"""
+        if not self.driver:
+            logger.error("浏览器未初始化或未连接")
+            return None
+
+        try:
+            engine = self.get_cdp_engine()
+        except Exception as e:
+            logger.warning(f"CDP直连不可用，回退到脚本直接点击: {str(e)}")
+            return self.begin_click(by, value, timeout, strategy="direct", step=step)
+
+        try:
+            if not self.current_handle:
+                self.current_handle = self.driver.current_window_handle
+            target_id = handle_to_target_id(self.current_handle)
+            if self.skip_missing(target_id, by, value, backend="cdp"):
+                return None
+            point = engine.locate(target_id, by, value, timeout)
+        except ClickCancelled:
+            raise
+        except Exception as e:
+            logger.error(f"CDP定位元素失败: {by}, {value}, 错误: {str(e)}")
+            return None
+        if point is None:
+            self.element_cache.mark_missing(target_id, by, value)
+            return None
+        x, y = point
+        if step is not None:
+            x += step.x_offset
+            y += step.y_offset
+
+        def finish():
+            try:
+                engine.dispatch_click(target_id, x, y)
+                logger.info(f"点击元素: {by}, {value} (CDP直连)")
+                return True
+            except ClickCancelled:
+                raise
+            except Exception as e:
+                logger.error(f"CDP点击元素失败: {by}, {value}, 错误: {str(e)}")
+                return False
+        return finish
+
+    def locate_and_click(self, by, value, backend="selenium"):
+        """单次往返完成 定位 + 可见/可用/遮挡检查 + 滚动 + 点击
+        
+        不做任何等待：元素不存在时立即返回。
+        
+        Returns:
+            dict: found(是否找到)、clicked(是否已点击)、reason(结果原因)、
+                  elapsed_ms(页面内耗时)、round_trip_ms(含通信的总耗时)
+        """
+        if not self.driver:
+            logger.error("浏览器未初始化或未连接")
+            return {'found': False, 'clicked': False, 'reason': 'not_connected'}
+        
+        # 任务已停止时不再执行点击
+        current_token().raise_if_cancelled()
+        start = time.perf_counter()
+        try:
+            if backend == "cdp":
+                target_id = handle_to_target_id(self.current_handle or self.driver.current_window_handle)
+                result = self.get_cdp_engine().locate_and_click(target_id, by, value)
+            else:
+                result = self.driver.execute_script(as_selenium_script(LOCATE_AND_CLICK_SCRIPT), by, value)
+        except Exception as e:
+            logger.error(f"快速点击元素失败: {by}, {value}, 错误: {str(e)}")
+            result = {'found': False, 'clicked': False, 'reason': f"error: {str(e)}"}
+        
+        result = dict(result or {})
+        result['round_trip_ms'] = (time.perf_counter() - start) * 1000
+        if result.get('clicked'):
+            logger.info(f"点击元素: {by}, {value} (快速点击，耗时 {result['round_trip_ms']:.1f}ms)")
+        else:
+            logger.warning(f"快速点击未执行: {by}, {value}, 原因: {result.get('reason')}")
+        return result
+
+    def resolve_presence(self, locators, backend="selenium"):
+        """单次往返检查多个 (by, value) 在当前标签页中是否存在、可见、可用、未被遮挡
+
+        不做任何等待，出错时返回None。
+        
+        Returns:
+            list: 与locators顺序一致的 {present, visible, enabled, clickable, reason}
+        """
+        if not self.driver:
+            logger.error("浏览器未初始化或未连接")
+            return None
+        
+        locators = [[by, value] for by, value in locators]
+        try:
+            if backend == "cdp":
+                target_id = handle_to_target_id(self.current_handle or self.driver.current_window_handle)
+                return self.get_cdp_engine().resolve_presence(target_id, locators)
+            return self.driver.execute_script(as_selenium_script(PRESENCE_SCRIPT), locators)
+        except Exception as e:
+            logger.error(f"批量检查定位表达式失败: {str(e)}")
+            return None
+
     def get_current_url(self):
         """获取当前页面URL"""
         if not self.driver:
@@ -216,28 +693,29 @@ class BrowserConnector:
             logger.error(f"获取当前URL失败: {error_msg}")
             
             # 处理各种可能的错误情况
-            if "no such window" in error_msg or "web view not found" in error_msg:
-                logger.info("尝试重新连接浏览器...")
-                try:
-                    if self.connect_to_existing_browser():
-                        try:
-                            url = self.driver.current_url
-                            logger.info(f"重新连接后获取URL: {url}")
-                            return url
-                        except Exception as re:
-                            logger.error(f"重新连接后获取URL仍失败: {str(re)}")
-                except Exception as conn_error:
-                    logger.error(f"重新连接浏览器失败: {str(conn_error)}")
-            elif "chrome not reachable" in error_msg.lower():
+            if "chrome not reachable" in error_msg.lower():
                 logger.error("浏览器无法访问，可能已关闭或崩溃")
-                self.driver = None  # 重置驱动状态
             elif "invalid session id" in error_msg.lower():
                 logger.error("会话ID无效，浏览器可能已关闭")
-                self.driver = None  # 重置驱动状态
+            
+            if "no such window" in error_msg or "web view not found" in error_msg or is_session_lost_error(e):
+                logger.info("尝试重新连接浏览器...")
+                if self.reconnect():
+                    try:
+                        url = self.driver.current_url
+                        logger.info(f"重新连接后获取URL: {url}")
+                        return url
+                    except Exception as re:
+                        logger.error(f"重新连接后获取URL仍失败: {str(re)}")
             return None
             
     def get_all_tabs(self):
         """获取所有标签页的句柄、标题和URL"""
+        # 回退方式会逐个切换标签页，持有驱动锁，不与调度线程中正在执行的点击交错
+        with self.driver_lock:
+            return self._get_all_tabs()
+
+    def _get_all_tabs(self):
         if not self.driver:
             logger.error("浏览器未初始化或未连接")
             return []
@@ -254,9 +732,8 @@ class BrowserConnector:
                 # 处理会话失效的情况
                 if "invalid session id" in error_msg or "no such window" in error_msg:
                     logger.error("浏览器会话已失效，尝试重新连接")
-                    self.driver = None
                     try:
-                        if self.connect_to_existing_browser():
+                        if self.reconnect():
                             # 重新获取句柄
                             current_handle = self.driver.current_window_handle
                             window_handles = self.driver.window_handles
@@ -268,6 +745,11 @@ class BrowserConnector:
                 else:
                     return []
             
+            # 优先通过DevTools的 /json/list 一次性读取，无需逐个切换标签页
+            tabs = self._get_tabs_from_devtools(window_handles, current_handle)
+            if tabs is not None:
+                return tabs
+            
             # 获取标签页信息，包括标题和URL
             tabs = []
             original_handle = current_handle
@@ -275,7 +757,7 @@ class BrowserConnector:
             for handle in window_handles:
                 try:
                     # 切换到标签页获取标题和URL
-                    self.driver.switch_to.window(handle)
+                    self._switch_window(handle)
                     title = self.driver.title
                     url = self.driver.current_url
                     
@@ -298,7 +780,7 @@ class BrowserConnector:
             
             # 切回原始标签页
             try:
-                self.driver.switch_to.window(original_handle)
+                self._switch_window(original_handle)
             except Exception as switch_error:
                 logger.warning(f"切回原始标签页失败: {str(switch_error)}")
                     
@@ -307,14 +789,54 @@ class BrowserConnector:
             logger.error(f"获取标签页信息失败: {str(e)}")
             return []
     
+    def _get_tabs_from_devtools(self, window_handles, current_handle):
+        """通过调试端口的 /json/list 获取标签页信息，按窗口句柄顺序返回
+        
+        获取失败时返回None，由调用方回退到逐个切换标签页的方式
+        """
+        try:
+            targets = self.get_cdp_client().list_targets()
+        except Exception as e:
+            logger.warning(f"通过DevTools获取标签页列表失败，回退到逐个切换标签页: {str(e)}")
+            return None
+        
+        targets_by_id = {target['id']: target for target in targets}
+        tabs = []
+        for handle in window_handles:
+            target = targets_by_id.get(handle_to_target_id(handle))
+            if target is None:
+                logger.warning(f"DevTools中未找到标签页 {handle} 的信息")
+            tabs.append({
+                'id': handle,
+                'handle': handle,
+                'title': target.get('title', '') if target else f"标签页 {len(tabs)+1}",
+                'url': target.get('url', '') if target else "未获取",
+                'is_current': handle == current_handle
+            })
+        return tabs
+    
     def switch_to_tab_by_url(self, url_pattern):
-        """根据URL模式切换到指定标签页"""
+        """根据URL模式切换到指定标签页
+        
+        Args:
+            url_pattern: URL模式字符串或已编译的UrlPattern，支持精确/前缀/通配符/正则/子串匹配
+        """
+        # 界面线程也会切换标签页，持有驱动锁，不会切走调度线程中正在点击的标签页
+        with self.driver_lock:
+            return self._switch_to_tab_by_url(url_pattern)
+
+    def _switch_to_tab_by_url(self, url_pattern):
         if not self.driver:
             logger.error("浏览器未初始化或未连接")
             return False
             
         try:
             self.target_tab_url = url_pattern
+            pattern = compile_url_pattern(url_pattern)
+            
+            # 标签页索引可用时直接在内存中查找，无需逐个切换
+            if self.is_tab_index_live():
+                return self._switch_to_tab_by_url_indexed(pattern)
             
             # 获取当前窗口句柄和所有窗口句柄
             try:
@@ -327,9 +849,8 @@ class BrowserConnector:
                 # 处理会话失效的情况
                 if "invalid session id" in error_msg or "no such window" in error_msg:
                     logger.error("浏览器会话已失效，尝试重新连接")
-                    self.driver = None
                     try:
-                        if self.connect_to_existing_browser():
+                        if self.reconnect():
                             current_handle = self.driver.current_window_handle
                             window_handles = self.driver.window_handles
                         else:
@@ -343,8 +864,8 @@ class BrowserConnector:
             # 首先检查当前标签页是否匹配URL模式，避免不必要的切换
             try:
                 current_url = self.driver.current_url
-                if url_pattern in current_url:
-                    logger.info(f"当前标签页已匹配URL模式: {url_pattern}")
+                if pattern.matches(current_url):
+                    logger.info(f"当前标签页已匹配URL模式: {pattern.raw}")
                     return True
             except Exception as url_error:
                 logger.warning(f"获取当前URL失败: {str(url_error)}")
@@ -360,11 +881,11 @@ class BrowserConnector:
                     
                 try:
                     # 切换到标签页并获取URL
-                    self.driver.switch_to.window(handle)
+                    self._switch_window(handle)
                     tab_url = self.driver.current_url
                     
                     # 检查URL是否匹配模式
-                    if url_pattern in tab_url:
+                    if pattern.matches(tab_url):
                         logger.info(f"找到匹配URL模式的标签页: {tab_url}")
                         found = True
                         target_handle = handle
@@ -375,14 +896,14 @@ class BrowserConnector:
             
             # 如果没有找到匹配的标签页，切回原标签页
             if not found:
-                logger.warning(f"未找到包含 {url_pattern} 的标签页，切回原标签页")
+                logger.warning(f"未找到匹配 {pattern.raw} 的标签页，切回原标签页")
                 try:
                     if current_handle in window_handles:
-                        self.driver.switch_to.window(current_handle)
+                        self._switch_window(current_handle)
                         logger.info("已切回原标签页")
                     else:
                         # 如果原句柄无效，切换到第一个可用标签页
-                        self.driver.switch_to.window(window_handles[0])
+                        self._switch_window(window_handles[0])
                         logger.info("原标签页无效，已切换到第一个标签页")
                 except Exception as switch_error:
                     logger.error(f"切换回原标签页失败: {str(switch_error)}")
@@ -394,8 +915,35 @@ class BrowserConnector:
             logger.error(f"切换标签页失败: {str(e)}")
             return False
             
+    def _switch_to_tab_by_url_indexed(self, pattern):
+        """通过标签页索引查找匹配的标签页，只在需要时切换一次"""
+        matches = self.tab_index.find_by_url_pattern(pattern)
+        if not matches:
+            logger.warning(f"未找到匹配 {pattern.raw} 的标签页")
+            return False
+        
+        current_id = handle_to_target_id(self.current_handle)
+        if any(tab['id'] == current_id for tab in matches):
+            logger.info(f"当前标签页已匹配URL模式: {pattern.raw}")
+            return True
+        
+        if len(matches) > 1:
+            logger.warning(f"有 {len(matches)} 个标签页匹配 {pattern.raw}，选择第一个: {matches[0]['url']}")
+        target = matches[0]
+        try:
+            self._switch_window(self.handle_for_target(target['id']))
+            logger.info(f"找到匹配URL模式的标签页: {target['url']}")
+            return True
+        except Exception as e:
+            logger.error(f"切换到标签页 {target['id']} 失败: {str(e)}")
+            return False
+            
     def switch_to_tab_by_index(self, index):
         """根据索引切换到指定标签页"""
+        with self.driver_lock:
+            return self._switch_to_tab_by_index(index)
+
+    def _switch_to_tab_by_index(self, index):
         if not self.driver:
             logger.error("浏览器未初始化或未连接")
             return False
@@ -413,9 +961,8 @@ class BrowserConnector:
                 # 处理会话失效的情况
                 if "invalid session id" in error_msg or "no such window" in error_msg:
                     logger.error("浏览器会话已失效，尝试重新连接")
-                    self.driver = None
                     try:
-                        if self.connect_to_existing_browser():
+                        if self.reconnect():
                             handles = self.driver.window_handles
                             current_handle = self.driver.current_window_handle
                         else:
@@ -437,7 +984,7 @@ class BrowserConnector:
                     
                 try:
                     # 使用try-except块保护切换操作
-                    self.driver.switch_to.window(target_handle)
+                    self._switch_window(target_handle)
                     logger.info(f"已切换到第 {index+1} 个标签页")
                     
                     # 不主动获取URL，避免可能的连接问题
@@ -448,7 +995,7 @@ class BrowserConnector:
                     # 尝试切回原标签页
                     try:
                         if current_handle in handles:
-                            self.driver.switch_to.window(current_handle)
+                            self._switch_window(current_handle)
                             logger.info("已切回原标签页")
                     except Exception as restore_error:
                         logger.error(f"切回原标签页失败: {str(restore_error)}")
@@ -463,14 +1010,28 @@ class BrowserConnector:
             
     def switch_to_tab_by_id(self, tab_id):
         """根据标签页ID切换到指定标签页"""
+        with self.driver_lock:
+            return self._switch_to_tab_by_id(tab_id)
+
+    def _switch_to_tab_by_id(self, tab_id):
         if not self.driver:
             logger.error("浏览器未初始化或未连接")
             return False
             
         try:
+            # 标签页索引可用时直接校验，无需获取所有窗口句柄
+            if self.is_tab_index_live():
+                tab = self.tab_index.get(handle_to_target_id(tab_id))
+                if not tab:
+                    logger.warning(f"未找到ID为 {tab_id} 的标签页")
+                    return False
+                self._switch_window(tab_id)
+                logger.info(f"已切换到标签页ID {tab_id}: {tab['url']}")
+                return True
+            
             # 在Chrome/Edge中，tab_id通常是window handle
             if tab_id in self.driver.window_handles:
-                self.driver.switch_to.window(tab_id)
+                self._switch_window(tab_id)
                 logger.info(f"已切换到标签页ID {tab_id}: {self.driver.current_url}")
                 return True
             else:
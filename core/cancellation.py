@@ -0,0 +1,137 @@
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from logger import logger
+
+# 没有中断页面内等待的通道（CDP未连接）时，可被取消的等待每段的最长时间（秒）
+FALLBACK_WAIT_SLICE = 0.5
+
+# 页面内等待的编号，中断时用来找到对应的等待；带上进程号，多个实例连接同一浏览器时不会冲突
+_wait_ids = itertools.count(1)
+_wait_prefix = f"{os.getpid()}-"
+
+
+class ClickCancelled(Exception):
+    """点击在执行过程中被取消（任务已停止）"""
+
+
+class CancelToken:
+    """协作式取消令牌
+
+    停止任务时调用cancel()，正在执行的点击在下一个等待点或真正点击之前检查令牌并立即退出。
+    所有等待都通过wait实现，取消时立即唤醒，而不是睡满剩余时间；
+    无法在本地唤醒的等待（例如页面内的等待）通过add_callback注册中断回调。
+    """
+
+    def __init__(self, event=None):
+        # 可以包装已有的threading.Event，与其他取消机制共用同一个信号，取消时应调用cancel()以触发回调
+        self._event = event if event is not None else threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        with self._lock:
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"执行取消回调时出错: {str(e)}")
+
+    def add_callback(self, callback):
+        """注册取消时调用的回调（在调用cancel()的线程中执行），已取消时立即调用"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def is_cancelled(self):
+        return self._event.is_set()
+
+    def wait(self, seconds):
+        """等待seconds秒，期间被取消时立即返回True"""
+        if seconds <= 0:
+            return self._event.is_set()
+        return self._event.wait(seconds)
+
+    def sleep(self, seconds):
+        """可中断的sleep，被取消时抛出ClickCancelled"""
+        if self.wait(seconds):
+            raise ClickCancelled()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise ClickCancelled()
+
+
+# 不会被取消的令牌，没有设置取消范围时使用
+NEVER_CANCELLED = CancelToken()
+
+_local = threading.local()
+
+
+def current_token():
+    """当前线程正在执行的点击所属的取消令牌"""
+    return getattr(_local, "token", None) or NEVER_CANCELLED
+
+
+def cancellable_wait(wait_once, timeout, abort=None):
+    """执行一次最长timeout秒的页面内等待，当前令牌被取消时从外部中断它
+
+    wait_once(seconds, wait_id)执行页面内等待并返回 {ready, reason, ...}，wait_id为None时等待不可中断；
+    abort(wait_id)通过另一条通道（CDP）让页面内的这次等待立即以reason='cancelled'结束，
+    等待期间不产生额外的驱动调用。没有中断通道时退化为每FALLBACK_WAIT_SLICE秒一段的等待。
+    被取消时抛出ClickCancelled。
+    """
+    token = current_token()
+    if token is NEVER_CANCELLED:
+        return wait_once(timeout, None) or {}
+    token.raise_if_cancelled()
+    if abort is None:
+        return _wait_in_slices(token, wait_once, timeout)
+
+    wait_id = f"{_wait_prefix}{next(_wait_ids)}"
+
+    def interrupt():
+        abort(wait_id)
+    token.add_callback(interrupt)
+    try:
+        result = wait_once(timeout, wait_id) or {}
+    finally:
+        token.remove_callback(interrupt)
+    token.raise_if_cancelled()
+    return result
+
+
+def _wait_in_slices(token, wait_once, timeout):
+    start = time.perf_counter()
+    while True:
+        token.raise_if_cancelled()
+        remaining = timeout - (time.perf_counter() - start)
+        result = wait_once(max(min(remaining, FALLBACK_WAIT_SLICE), 0.001), None) or {}
+        if result.get('ready') or result.get('reason') != 'timeout' or remaining <= FALLBACK_WAIT_SLICE:
+            result['waited_ms'] = (time.perf_counter() - start) * 1000
+            return result
+
+
+@contextmanager
+def cancel_scope(token):
+    """在with块中把token设为当前线程的取消令牌，连接器和点击策略中的等待都会检查它
+
+    点击任务在调度线程中串行执行，令牌随线程传递，不需要修改每个连接器方法的参数。
+    """
+    previous = getattr(_local, "token", None)
+    _local.token = token
+    try:
+        yield token
+    finally:
+        _local.token = previous
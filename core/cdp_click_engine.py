@@ -0,0 +1,113 @@
+from logger import logger
+from core.cdp_client import CDPError
+from core.cancellation import current_token, cancellable_wait
+from core.page_scripts import (
+    LOCATE_SCRIPT, JS_CLICK_SCRIPT, LOCATE_AND_CLICK_SCRIPT, WAIT_FOR_ELEMENT_SCRIPT, ABORT_WAIT_SCRIPT, PRESENCE_SCRIPT,
+    as_expression
+)
+
+
+class CDPClickEngine:
+    """基于CDP直连的点击引擎
+
+    不经过msedgedriver：通过 Runtime.evaluate 定位元素，
+    再用 Input.dispatchMouseEvent (mode="input") 或 element.click() (mode="js") 完成点击。
+    """
+
+    def __init__(self, client, mode="input"):
+        self.client = client
+        self.mode = mode
+
+    def is_connected(self):
+        return self.client.is_connected()
+
+    def connect(self):
+        return self.client.connect()
+
+    def evaluate(self, target_id, expression, timeout=10, await_promise=False):
+        """在指定标签页执行表达式并按值返回结果"""
+        result = self.client.send_to_target(target_id, "Runtime.evaluate", {
+            "expression": expression,
+            "returnByValue": True,
+            "awaitPromise": await_promise,
+        }, timeout=timeout)
+        if "exceptionDetails" in result:
+            raise CDPError(f"页面脚本执行出错: {result['exceptionDetails'].get('text', '')}")
+        return result.get("result", {}).get("value")
+
+    def wait_ready(self, target_id, by, value, timeout=10):
+        """通过页面内的MutationObserver等待元素就绪，元素一出现立即返回，任务停止时从外部中断等待"""
+        def wait_once(seconds, wait_id):
+            expression = as_expression(WAIT_FOR_ELEMENT_SCRIPT, by, value, int(seconds * 1000), False, wait_id)
+            return self.evaluate(target_id, expression, timeout=seconds + 2, await_promise=True)
+        return cancellable_wait(wait_once, timeout, self.wait_aborter(target_id))
+
+    def wait_aborter(self, target_id):
+        """返回中断标签页内等待的回调abort(wait_id)，CDP不可用时返回None
+
+        回调在停止任务的线程中执行，只发送命令不等待响应；会话预先附加好，回调中不会阻塞
+        """
+        if not self.is_connected():
+            return None
+        try:
+            session_id = self.client.attach(target_id)
+        except Exception as e:
+            logger.warning(f"附加标签页失败，页面内等待将不能立即中断: {str(e)}")
+            return None
+
+        def abort(wait_id):
+            self.client.send_future("Runtime.evaluate", {
+                "expression": as_expression(ABORT_WAIT_SCRIPT, wait_id),
+            }, session_id=session_id)
+        return abort
+
+    def locate(self, target_id, by, value, timeout=10):
+        """等待元素就绪后滚动到可见区域，返回元素中心坐标 (x, y)"""
+        ready = self.wait_ready(target_id, by, value, timeout)
+        if not ready.get("ready"):
+            logger.error(f"CDP定位元素失败: {by}, {value}, 原因: {ready.get('reason')}")
+            return None
+        info = self.evaluate(target_id, as_expression(LOCATE_SCRIPT, by, value)) or {}
+        if info.get("reason") != "ok":
+            logger.error(f"CDP定位元素失败: {by}, {value}, 原因: {info.get('reason')}")
+            return None
+        return info["x"], info["y"]
+
+    def dispatch_click(self, target_id, x, y):
+        """在页面坐标 (x, y) 处派发一次完整的鼠标点击"""
+        current_token().raise_if_cancelled()
+        for event_type in ("mouseMoved", "mousePressed", "mouseReleased"):
+            params = {"type": event_type, "x": x, "y": y}
+            if event_type != "mouseMoved":
+                params.update({"button": "left", "clickCount": 1})
+            self.client.send_to_target(target_id, "Input.dispatchMouseEvent", params)
+
+    def click(self, target_id, by, value, timeout=10):
+        """在指定标签页中点击元素"""
+        if not self.is_connected():
+            self.connect()
+
+        if self.mode == "js":
+            expression = as_expression(JS_CLICK_SCRIPT, by, value)
+            if self.locate(target_id, by, value, timeout) is None:
+                return False
+            current_token().raise_if_cancelled()
+            return bool(self.evaluate(target_id, expression))
+
+        point = self.locate(target_id, by, value, timeout)
+        if point is None:
+            return False
+        self.dispatch_click(target_id, *point)
+        return True
+
+    def locate_and_click(self, target_id, by, value):
+        """一次Runtime.evaluate完成定位、检查和点击，返回页面脚本的结构化结果"""
+        if not self.is_connected():
+            self.connect()
+        return self.evaluate(target_id, as_expression(LOCATE_AND_CLICK_SCRIPT, by, value))
+
+    def resolve_presence(self, target_id, locators):
+        """一次Runtime.evaluate检查多个 (by, value) 是否存在、可见、可点击"""
+        if not self.is_connected():
+            self.connect()
+        return self.evaluate(target_id, as_expression(PRESENCE_SCRIPT, [list(locator) for locator in locators])) or []
@@ -0,0 +1,264 @@
+import json
+import itertools
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+import urllib.request
+from logger import logger
+
+try:
+    import websocket  # websocket-client，用于直接连接浏览器的远程调试端口
+except ImportError:
+    websocket = None
+
+
+class CDPError(RuntimeError):
+    """CDP命令执行失败"""
+
+
+def handle_to_target_id(handle):
+    """将Selenium的窗口句柄转换为CDP的targetId
+
+    Edge/Chrome驱动返回的窗口句柄就是targetId，旧版本驱动会带有"CDwindow-"前缀
+    """
+    if not handle:
+        return handle
+    if handle.startswith("CDwindow-"):
+        handle = handle[len("CDwindow-"):]
+    return handle.upper()
+
+
+class CDPClient:
+    """直接通过远程调试端口(--remote-debugging-port)的WebSocket与浏览器通信
+
+    绕过msedgedriver，命令直接发送到浏览器的DevTools协议端点。
+    使用flatten模式的会话(sessionId)在一条浏览器级连接上操作多个标签页。
+    """
+
+    def __init__(self, debugger_address="localhost:9222"):
+        self.debugger_address = debugger_address
+        self.ws = None
+        self._ids = itertools.count(1)
+        self._pending = {}  # 命令id -> Future（结果为响应消息）
+        self._pending_lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._listeners = {}  # 事件名 -> 回调列表
+        self._connection_listeners = []  # (连接建立回调, 连接断开回调)，回调无参数
+        self._sessions = {}  # targetId -> sessionId
+        self._reader_thread = None
+
+    @staticmethod
+    def is_available():
+        """websocket-client 是否已安装"""
+        return websocket is not None
+
+    def http_get_json(self, path, timeout=3):
+        """请求调试端口的HTTP接口，例如 /json/version、/json/list"""
+        url = f"http://{self.debugger_address}{path}"
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return json.loads(response.read().decode("utf-8"))
+
+    def list_targets(self, timeout=3):
+        """通过 /json/list 一次HTTP请求获取所有标签页(page类型的target)"""
+        targets = []
+        for target in self.http_get_json("/json/list", timeout=timeout):
+            if target.get("type") != "page":
+                continue
+            target["id"] = target["id"].upper()
+            targets.append(target)
+        return targets
+
+    def connect(self, timeout=5):
+        """连接到浏览器级别的WebSocket调试端点"""
+        if self.is_connected():
+            return True
+        if not self.is_available():
+            raise CDPError("未安装websocket-client，无法使用CDP直连，请执行: pip install websocket-client")
+
+        version_info = self.http_get_json("/json/version", timeout=timeout)
+        ws_url = version_info.get("webSocketDebuggerUrl")
+        if not ws_url:
+            raise CDPError("调试端口未返回webSocketDebuggerUrl")
+
+        # 不发送Origin头，避免新版Edge的 --remote-allow-origins 限制
+        self.ws = websocket.create_connection(ws_url, timeout=timeout, suppress_origin=True)
+        self.ws.settimeout(None)
+        self._sessions = {}
+        self._reader_thread = threading.Thread(target=self._reader_loop, daemon=True)
+        self._reader_thread.start()
+        logger.info(f"已通过CDP直连浏览器: {ws_url}")
+        self._notify_connection(True)
+        return True
+
+    def is_connected(self):
+        return self.ws is not None and self.ws.connected
+
+    def close(self):
+        ws = self.ws
+        self.ws = None
+        self._sessions = {}
+        if ws:
+            try:
+                ws.close()
+                logger.info("CDP连接已关闭")
+            except Exception as e:
+                logger.error(f"关闭CDP连接时出错: {str(e)}")
+        self._fail_pending("CDP连接已关闭")
+        if ws:
+            self._notify_connection(False)
+
+    def on(self, event, callback):
+        """注册CDP事件回调，回调参数为 (params, session_id)"""
+        self._listeners.setdefault(event, []).append(callback)
+
+    def off(self, event, callback):
+        callbacks = self._listeners.get(event, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def on_connection(self, connected, disconnected):
+        """注册连接状态回调：每次connect()成功后调用connected，连接断开或关闭后调用disconnected
+
+        重新连接后浏览器不会保留之前的订阅（例如Target.setDiscoverTargets），需要在connected中重新发送
+        """
+        self._connection_listeners.append((connected, disconnected))
+
+    def _notify_connection(self, connected):
+        for on_connected, on_disconnected in list(self._connection_listeners):
+            try:
+                (on_connected if connected else on_disconnected)()
+            except Exception as e:
+                logger.error(f"处理CDP连接状态变化时出错: {str(e)}")
+
+    def send_future(self, method, params=None, session_id=None):
+        """发送CDP命令但不等待，返回concurrent.futures.Future，结果为原始响应消息
+
+        取消Future即放弃等待该命令的响应；asyncio中可用asyncio.wrap_future等待，不占用线程
+        """
+        if not self.is_connected():
+            raise CDPError("CDP未连接")
+
+        command_id = next(self._ids)
+        message = {"id": command_id, "method": method, "params": params or {}}
+        if session_id:
+            message["sessionId"] = session_id
+
+        future = Future()
+        with self._pending_lock:
+            self._pending[command_id] = future
+        future.add_done_callback(lambda _: self._forget_pending(command_id))
+        try:
+            with self._send_lock:
+                self.ws.send(json.dumps(message))
+        except Exception:
+            future.cancel()
+            raise
+        return future
+
+    def send(self, method, params=None, session_id=None, timeout=10):
+        """发送CDP命令并等待响应，返回result字段"""
+        future = self.send_future(method, params, session_id)
+        try:
+            response = future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise CDPError(f"CDP命令超时: {method}")
+        return self.unwrap_response(method, response)
+
+    @staticmethod
+    def unwrap_response(method, response):
+        """返回响应的result字段，命令失败时抛出CDPError"""
+        if "error" in response:
+            raise CDPError(f"{method} 失败: {response['error'].get('message', response['error'])}")
+        return response.get("result", {})
+
+    def get_session(self, target_id):
+        """返回已附加的sessionId，未附加时返回None"""
+        return self._sessions.get(target_id)
+
+    def set_session(self, target_id, session_id):
+        if session_id:
+            self._sessions[target_id] = session_id
+        else:
+            self._sessions.pop(target_id, None)
+
+    def attach(self, target_id):
+        """附加到标签页并返回sessionId（已附加的直接复用）"""
+        session_id = self._sessions.get(target_id)
+        if session_id:
+            return session_id
+        result = self.send("Target.attachToTarget", {"targetId": target_id, "flatten": True})
+        session_id = result["sessionId"]
+        self._sessions[target_id] = session_id
+        return session_id
+
+    def send_to_target(self, target_id, method, params=None, timeout=10):
+        """向指定标签页发送命令，会话失效时重新附加一次"""
+        session_id = self.attach(target_id)
+        try:
+            return self.send(method, params, session_id=session_id, timeout=timeout)
+        except CDPError as e:
+            if "session" not in str(e).lower():
+                raise
+            self._sessions.pop(target_id, None)
+            session_id = self.attach(target_id)
+            return self.send(method, params, session_id=session_id, timeout=timeout)
+
+    def _reader_loop(self):
+        ws = self.ws
+        while ws is not None and ws.connected:
+            try:
+                raw = ws.recv()
+            except Exception as e:
+                if self.ws is ws:
+                    logger.warning(f"CDP连接已断开: {str(e)}")
+                break
+            if not raw:
+                continue
+            try:
+                message = json.loads(raw)
+            except ValueError:
+                continue
+
+            if "id" in message:
+                with self._pending_lock:
+                    future = self._pending.get(message["id"])
+                if future:
+                    self._resolve(future, message)
+            elif "method" in message:
+                self._dispatch(message["method"], message.get("params", {}), message.get("sessionId"))
+        lost = ws is not None and self.ws is ws
+        if lost:
+            self.ws = None
+        self._fail_pending("CDP连接已断开")
+        if lost:
+            self._notify_connection(False)
+
+    def _dispatch(self, method, params, session_id):
+        if method == "Target.detachedFromTarget":
+            detached = params.get("sessionId")
+            for target_id, attached in list(self._sessions.items()):
+                if attached == detached or target_id == params.get("targetId"):
+                    self._sessions.pop(target_id, None)
+        for callback in list(self._listeners.get(method, [])):
+            try:
+                callback(params, session_id)
+            except Exception as e:
+                logger.error(f"处理CDP事件 {method} 时出错: {str(e)}")
+
+    def _forget_pending(self, command_id):
+        with self._pending_lock:
+            self._pending.pop(command_id, None)
+
+    @staticmethod
+    def _resolve(future, message):
+        # 等待方可能已超时取消
+        try:
+            future.set_result(message)
+        except Exception:
+            pass
+
+    def _fail_pending(self, reason):
+        with self._pending_lock:
+            futures = list(self._pending.values())
+        for future in futures:
+            self._resolve(future, {"error": {"message": reason}})
@@ -0,0 +1,112 @@
+import threading
+import time
+from logger import logger
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+STATE_NAMES = {
+    CLOSED: "正常",
+    OPEN: "熔断",
+    HALF_OPEN: "试探恢复",
+}
+
+
+class CircuitBreaker:
+    """点击任务的熔断器
+
+    closed: 正常点击，连续失败failure_threshold次后打开；
+    open: 暂停点击，每隔open_timeout秒做一次廉价探测（端口存活、元素是否存在），不执行真正的点击，
+          探测失败时间隔加倍（最多max_open_timeout秒），探测成功后进入half_open；
+    half_open: 放行一次真正的点击，成功则关闭熔断并恢复正常间隔，失败则重新打开。
+    """
+
+    def __init__(self, failure_threshold=5, open_timeout=5.0, max_open_timeout=300.0, name=""):
+        self.failure_threshold = failure_threshold
+        self.open_timeout = open_timeout
+        self.max_open_timeout = max_open_timeout
+        self.name = name
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self.probe_at = None  # 下一次探测的time.monotonic时刻
+            self._timeout = self.open_timeout
+            self._opened_at = None
+            self.open_count = 0  # 本次运行中熔断打开的次数
+            self.probe_count = 0
+            self.downtime = 0.0  # 本次运行中处于熔断状态的总秒数
+
+    def is_open(self):
+        return self.state == OPEN
+
+    def record_success(self):
+        """记录一次成功的点击"""
+        with self._lock:
+            recovered = self.state != CLOSED
+            if recovered:
+                self.downtime += time.monotonic() - self._opened_at
+                self._opened_at = None
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self._timeout = self.open_timeout
+        if recovered:
+            logger.info(f"[{self.name}] 点击恢复成功，熔断关闭")
+
+    def record_failure(self):
+        """记录一次失败的点击或异常，返回熔断器是否因此打开"""
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN:
+                # 试探点击失败，加大探测间隔后重新打开
+                self._timeout = min(self._timeout * 2, self.max_open_timeout)
+            elif self.consecutive_failures < self.failure_threshold or self.state == OPEN:
+                return False
+            self._open_locked()
+            timeout = self._timeout
+        logger.error(f"[{self.name}] 连续{self.consecutive_failures}次点击失败，熔断打开，{timeout:.0f}秒后探测")
+        return True
+
+    def record_probe(self, ok):
+        """记录一次探测的结果：成功时进入half_open放行下一次点击，失败时延长探测间隔"""
+        with self._lock:
+            if self.state != OPEN:
+                return
+            self.probe_count += 1
+            if ok:
+                self.state = HALF_OPEN
+                self.probe_at = None
+            else:
+                self._timeout = min(self._timeout * 2, self.max_open_timeout)
+                self.probe_at = time.monotonic() + self._timeout
+            timeout = self._timeout
+        if ok:
+            logger.info(f"[{self.name}] 探测成功，放行一次试探点击")
+        else:
+            logger.warning(f"[{self.name}] 探测失败，{timeout:.0f}秒后再次探测")
+
+    def _open_locked(self):
+        now = time.monotonic()
+        if self._opened_at is None:
+            self._opened_at = now
+            self.open_count += 1
+        self.state = OPEN
+        self.probe_at = now + self._timeout
+
+    def get_stats(self):
+        with self._lock:
+            downtime = self.downtime
+            if self._opened_at is not None:
+                downtime += time.monotonic() - self._opened_at
+            return {
+                'state': self.state,
+                'state_text': STATE_NAMES[self.state],
+                'consecutive_failures': self.consecutive_failures,
+                'open_count': self.open_count,
+                'probe_count': self.probe_count,
+                'downtime': downtime,
+            }
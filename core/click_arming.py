@@ -0,0 +1,162 @@
+import time
+from selenium import webdriver
+from logger import logger
+from core.cdp_client import handle_to_target_id
+from core.page_scripts import ELEMENT_CENTER_SCRIPT, as_selenium_script
+
+
+class ArmedClick:
+    """准备完毕的点击：触发时只剩最终的派发操作
+
+    report记录各准备阶段的耗时(ms)和结果：
+        ok、reason、stages({阶段名: 耗时})、total_ms、point(视口坐标)
+    """
+
+    def __init__(self, connector, by, value, strategy):
+        self.connector = connector
+        self.by = by
+        self.value = value
+        self.strategy = strategy
+        self.element = None
+        self.handle = None  # 准备时所在标签页的窗口句柄
+        self.target_id = None
+        self.point = None
+        self.cdp_engine = None
+        self.report = {'ok': False, 'reason': None, 'stages': {}, 'total_ms': 0.0, 'point': None}
+
+    def warm(self):
+        """发送一次很轻的请求，使到驱动(HTTP)或浏览器(WebSocket)的连接保持活跃"""
+        if self.cdp_engine is not None:
+            self.cdp_engine.client.send("Browser.getVersion", timeout=3)
+            # 预先附加会话，触发时不再需要Target.attachToTarget
+            self.cdp_engine.client.attach(self.target_id)
+        else:
+            self.connector.driver.execute_script("return 1;")
+
+    def fire(self):
+        """执行最终的点击，准备失败或预先定位的元素已失效时回退为一次快速的重新定位和点击
+
+        调用方应持有connector.driver_lock；准备之后调度线程可能切换过标签页，点击前先切回准备时的标签页
+        """
+        if self.by is None:
+            return False
+        if self.handle is not None:
+            self.connector.activate_handle(self.handle)
+        if not self.report['ok']:
+            return self.connector.click_element(self.by, self.value, timeout=1, strategy="direct")
+        try:
+            if self.strategy == "cdp" and self.cdp_engine is not None:
+                self.cdp_engine.dispatch_click(self.target_id, *self.point)
+            elif self.strategy == "humanlike":
+                # 鼠标在准备阶段已移动到元素上，其他任务可能移动过鼠标，在同一个动作中移回并点击
+                action = webdriver.ActionChains(self.connector.driver)
+                action.move_to_element(self.element)
+                action.click()
+                action.perform()
+            else:
+                self.connector.driver.execute_script("arguments[0].click();", self.element)
+            logger.info(f"点击元素: {self.by}, {self.value} (预先准备)")
+            return True
+        except Exception as e:
+            logger.warning(f"预先准备的点击失败，重新定位后点击: {str(e)}")
+            self.report['fallback'] = True
+            return self.connector.click_element(self.by, self.value, timeout=1, strategy="direct")
+
+
+class ClickArming:
+    """定时点击的准备流水线
+
+    在触发时刻之前依次完成：切换标签页、选择定位表达式、定位并校验元素、滚动到可见区域、
+    预热驱动/CDP连接、计算点击坐标（拟人化点击还会预先移动鼠标），
+    触发时刻只需调用ArmedClick.fire()。整个流水线持有connector.driver_lock执行。
+    """
+
+    STAGES = ("switch_tab", "locator", "resolve", "scroll", "warm", "coordinates")
+
+    def __init__(self, job, timeout=10):
+        self.job = job
+        self.connector = job.browser_connector
+        self.timeout = timeout
+
+    def run(self):
+        """执行准备流水线，返回ArmedClick；失败时其report['ok']为False、reason为失败的阶段"""
+        armed = ArmedClick(self.connector, None, None, self.job.click_strategy)
+        start = time.perf_counter()
+        with self.connector.driver_lock:
+            for stage in self.STAGES:
+                stage_start = time.perf_counter()
+                try:
+                    ok = getattr(self, f"_stage_{stage}")(armed)
+                except Exception as e:
+                    logger.error(f"[{self.job.name}] 准备阶段 {stage} 出错: {str(e)}")
+                    ok = False
+                armed.report['stages'][stage] = (time.perf_counter() - stage_start) * 1000
+                if not ok:
+                    armed.report['reason'] = stage
+                    break
+            else:
+                armed.report['ok'] = True
+        armed.report['total_ms'] = (time.perf_counter() - start) * 1000
+        armed.report['point'] = armed.point
+
+        stages = "，".join(f"{name} {ms:.0f}ms" for name, ms in armed.report['stages'].items())
+        if armed.report['ok']:
+            logger.info(f"[{self.job.name}] 点击准备完成，共 {armed.report['total_ms']:.0f}ms（{stages}）")
+        else:
+            logger.error(f"[{self.job.name}] 点击准备失败于 {armed.report['reason']} 阶段（{stages}）")
+        return armed
+
+    def _stage_switch_tab(self, armed):
+        self.job.ensure_target_tab()
+        connector = self.connector
+        if not connector.current_handle:
+            connector.current_handle = connector.driver.current_window_handle
+        armed.handle = connector.current_handle
+        armed.target_id = handle_to_target_id(connector.current_handle)
+        return True
+
+    def _stage_locator(self, armed):
+        # 多个XPath时的可点击检查要在目标标签页上进行，所以在切换标签页之后选择
+        # 不记录选中的序号，避免调度线程中的下一次点击把结果回填到这里选中的XPath
+        locator = self.job.next_locator(track=False)
+        if locator is None:
+            logger.error("未设置有效的定位方式和路径")
+            return False
+        armed.by, armed.value = locator
+        return True
+
+    def _stage_resolve(self, armed):
+        # 页面内等待元素存在、可见、可用；不使用缓存，确保拿到最新的元素
+        armed.element = self.connector.find_element(armed.by, armed.value, self.timeout, use_cache=False)
+        return armed.element is not None
+
+    def _stage_scroll(self, armed):
+        self.connector.driver.execute_script(
+            "arguments[0].scrollIntoView({block: 'center', inline: 'center'});", armed.element
+        )
+        return True
+
+    def _stage_warm(self, armed):
+        if armed.strategy == "cdp":
+            try:
+                armed.cdp_engine = self.connector.get_cdp_engine()
+            except Exception as e:
+                logger.warning(f"CDP直连不可用，改用脚本直接点击: {str(e)}")
+                armed.strategy = "direct"
+        armed.warm()
+        return True
+
+    def _stage_coordinates(self, armed):
+        info = self.connector.driver.execute_script(as_selenium_script(ELEMENT_CENTER_SCRIPT), armed.element) or {}
+        if not info.get('width') or not info.get('height'):
+            logger.error(f"元素不可见，无法计算点击坐标: {armed.by}, {armed.value}")
+            return False
+        if info.get('occluded'):
+            logger.warning(f"元素中心点被其他元素遮挡: {armed.by}, {armed.value}")
+        armed.point = (info['x'], info['y'])
+        if armed.strategy == "humanlike":
+            # 预先把鼠标移动到元素上，触发时只需按下鼠标
+            action = webdriver.ActionChains(self.connector.driver)
+            action.move_to_element(armed.element)
+            action.perform()
+        return True
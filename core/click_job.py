@@ -0,0 +1,904 @@
+import random
+import threading
+import time
+from logger import logger
+from core.url_matcher import compile_url_pattern
+from core.humanization import HumanizationTimeline
+from core.click_arming import ClickArming
+from core.timed_click import parse_fire_time
+from core.telemetry import ClickTelemetry
+from core.target_selector import WeightedTargetSelector
+from core.circuit_breaker import CircuitBreaker, HALF_OPEN
+from core.interval_controller import AIMDIntervalController
+from core.cancellation import CancelToken, ClickCancelled, cancel_scope
+from selenium.webdriver.common.by import By
+
+
+# 运行结束的原因
+STOP_REASONS = {
+    "stopped": "手动停止",
+    "max_clicks": "达到点击次数上限",
+    "max_duration": "达到运行时长上限",
+    "stop_at": "到达预定的结束时间",
+    "max_failures": "失败次数达到上限",
+    "no_target": "未设置目标网址",
+}
+
+# 有其他任务在调度器中排队时，每次点击等待元素就绪的最长秒数，避免一个任务的等待拖住所有任务
+SHARED_ELEMENT_TIMEOUT = 2.0
+
+
+class ClickJob:
+    """一个独立的自动点击任务
+
+    每个任务有自己的定位表达式、目标标签页、间隔设置、统计数据和启停状态，
+    多个任务共用同一个BrowserConnector和调度器。所有点击都在调度线程中串行执行，
+    每次点击前切换到任务自己的目标标签页，任务之间不会并发访问WebDriver；
+    定时点击在自己的线程中执行，通过connector.driver_lock与调度线程互斥。
+    """
+
+    def __init__(self, job_id, browser_connector, scheduler, name=None):
+        self.job_id = job_id
+        self.name = name or job_id
+        self.browser_connector = browser_connector
+        self.scheduler = scheduler
+        self.auto_delivery_enabled = False
+        self.auto_delivery_timer = None
+        self.delivery_interval = 3  # 固定间隔时间（秒）
+        self.enable_random_interval = False  # 是否启用随机间隔
+        self.min_random_interval = 1  # 最小随机间隔时间（秒）
+        self.max_random_interval = 5  # 最大随机间隔时间（秒）
+        self.adaptive_interval = False  # 是否按页面响应自适应调整间隔
+        self.adaptive_bounds = None  # 自适应间隔的 (最小, 最大)，None时使用随机间隔的范围
+        self.interval_controller = None  # 本次运行的自适应间隔控制器
+        self.retry_count = 0
+        self.max_retries = 5  # 连续失败多少次后熔断，暂停点击并定期探测
+        self.target_xpath = ""
+        self.target_xpaths = []  # 存储多个XPath
+        self.target_selector = ""
+        self.target_url = ""
+        self.locator_type = "xpath"
+        self.target_tab_url = ""
+        self.target_tab_pattern = None  # 编译后的目标标签页URL模式
+        self.pinned_handle = None  # 已解析到的目标标签页窗口句柄，之后的点击直接使用
+        self._pinned_navigations = None  # 固定时该标签页的导航次数
+        self._tab_stale = False  # 点击失败后需要重新校验固定的标签页
+        self.breaker = CircuitBreaker(self.max_retries, name=self.name)
+        self.cancel_token = CancelToken()  # 本次运行的取消令牌，停止时中断正在执行的点击
+        self.start_time = None
+        self.click_count = 0
+        self.click_strategy = "humanlike"  # 点击策略: "humanlike"、"direct" 或 "cdp"
+        self.use_fast_click = False  # 是否使用单次往返的快速点击
+        self.humanization_seed = None  # 拟人化时间线的随机种子，None表示每次运行随机
+        self.timeline = None  # 本次运行预先生成的拟人化时间线
+        self.current_step = None  # 当前点击对应的时间线步骤
+        self.schedule_mode = "fixed_delay"  # "fixed_delay": 点击完成后再等待间隔；"fixed_rate": 按计划时间递推，不受点击耗时影响
+        self._tick_deadline = None  # 上一次点击的计划时间（time.monotonic）
+        self._run_generation = 0  # 每次开始/停止都递增，旧的调度任务据此失效
+        # 运行限制，None表示不限制
+        self.max_clicks = None  # 点击次数上限
+        self.max_duration = None  # 运行时长上限（秒）
+        self.stop_at = None  # 结束时间（时间戳）
+        self.max_failures = None  # 累计失败次数上限
+        self.failure_count = 0
+        self.end_time = None
+        self.stop_reason = None
+        self.on_finished = None  # 运行结束时以统计数据(dict)为参数调用，可能在调度线程中调用
+        self._run_end = None  # 时长/结束时间限制对应的time.monotonic时刻
+        self._run_end_reason = None
+        self._run_end_timer = None  # 到达结束时刻时结束运行的计时器
+        self._finish_lock = threading.Lock()
+        self.telemetry = ClickTelemetry()  # 每次点击的计划时刻、实际执行时刻、完成时刻和结果
+        self._dispatch = None  # 正在执行的点击的 (计划时刻, 实际开始时刻)
+        self.rate_weight = 1.0  # 全局点击限流中的权重，权重越大分到的点击频率越高
+        self.element_timeout = 10  # 每次点击等待元素就绪的最长秒数
+        self.xpath_selector = None  # 多个XPath时的加权选择器
+        self._selected_target = None  # next_locator选中的XPath序号，点击结果出来后回填到选择器
+        self._rate_reserved = False  # 本次点击是否已预约到限流令牌
+        self._started_at = None  # 运行开始/结束的time.monotonic时刻，用于计算时长
+        self._ended_at = None
+
+    def set_target_url(self, url):
+        self.target_url = url
+
+    def set_target_xpath(self, xpath, locator_type=None):
+        self.target_xpath = xpath
+        self.target_xpaths = [xpath]  # 同步到多XPath列表
+        self.xpath_selector = None
+        if locator_type:
+            self.locator_type = locator_type
+
+    def set_target_xpaths(self, xpaths, weights=None):
+        """设置多个XPath及其静态权重（默认相同），目标和权重不变时保留已观测到的成功率和耗时"""
+        selector = self.xpath_selector
+        if weights is None:
+            weights = [1.0] * len(xpaths)
+        if len(xpaths) < 2:
+            self.xpath_selector = None
+        elif selector is None or selector.targets != list(xpaths) or selector.static_weights != [max(float(w), 0.0) for w in weights]:
+            self.xpath_selector = WeightedTargetSelector(xpaths, weights)
+        self.target_xpaths = xpaths
+        # 同时设置第一个XPath为默认的单XPath（保持兼容性）
+        if xpaths:
+            self.target_xpath = xpaths[0]
+
+    def set_locator_type(self, locator_type):
+        self.locator_type = locator_type
+
+    def set_click_strategy(self, strategy):
+        """设置点击策略
+
+        "humanlike" 模拟人类操作（默认），"direct" 脚本直接点击，
+        "cdp" 绕过msedgedriver直接通过调试端口派发鼠标事件
+        """
+        if strategy not in self.browser_connector.click_strategies:
+            logger.warning(f"未知的点击策略: {strategy}，使用humanlike")
+            strategy = "humanlike"
+        self.click_strategy = strategy
+        logger.info(f"[{self.name}] 点击策略已设置为: {strategy}")
+
+    def set_fast_click(self, enabled):
+        """启用后每次点击只需一次脚本调用（定位、检查、点击合并），元素不存在时不再等待"""
+        self.use_fast_click = bool(enabled)
+        logger.info(f"[{self.name}] 快速点击已{'启用' if self.use_fast_click else '关闭'}")
+
+    def set_target_tab_url(self, tab_url):
+        """设置目标标签页URL模式，并预先编译
+
+        支持 exact:/prefix:/glob:/re: 前缀，含 * 时按通配符处理，其余按子串匹配
+        """
+        self.target_tab_url = tab_url
+        self.pinned_handle = None
+        try:
+            self.target_tab_pattern = compile_url_pattern(tab_url) if tab_url else None
+        except Exception as e:
+            logger.error(f"目标标签页URL模式无效: {tab_url}, 错误: {str(e)}")
+            self.target_tab_pattern = None
+
+    def set_random_interval_range(self, min_interval, max_interval):
+        """设置随机间隔时间范围"""
+        try:
+            self.min_random_interval = float(min_interval)
+            self.max_random_interval = float(max_interval)
+
+            # 确保最小值不大于最大值
+            if self.min_random_interval > self.max_random_interval:
+                self.min_random_interval, self.max_random_interval = self.max_random_interval, self.min_random_interval
+        except ValueError:
+            # 如果输入无效，使用默认值
+            self.min_random_interval = 1
+            self.max_random_interval = 5
+            logger.warning("无效的随机间隔时间范围，使用默认值(1-5秒)")
+
+    def set_schedule_mode(self, mode):
+        """设置调度模式："fixed_delay" 或 "fixed_rate"（无漂移的固定频率）"""
+        if mode not in ("fixed_delay", "fixed_rate"):
+            logger.warning(f"未知的调度模式: {mode}，使用fixed_delay")
+            mode = "fixed_delay"
+        self.schedule_mode = mode
+
+    def set_run_limits(self, max_clicks=None, max_duration=None, stop_at=None, max_failures=None):
+        """设置运行限制，None表示不限制
+
+        max_clicks: 点击次数上限；max_duration: 运行时长上限（秒）；
+        stop_at: 结束时间（"HH:MM:SS"、datetime或时间戳）；max_failures: 累计失败次数上限
+        """
+        self.max_clicks = max_clicks
+        self.max_duration = max_duration
+        self.stop_at = parse_fire_time(stop_at) if stop_at is not None else None
+        self.max_failures = max_failures
+        logger.info(
+            f"[{self.name}] 运行限制: 次数={max_clicks or '不限'}，时长={max_duration or '不限'}秒，"
+            f"结束时间={stop_at or '不限'}，失败次数={max_failures or '不限'}"
+        )
+
+    def set_rate_weight(self, weight):
+        """设置任务在全局点击限流中的权重"""
+        self.rate_weight = max(float(weight), 0.01)
+
+    def set_adaptive_interval(self, enabled, min_interval=None, max_interval=None):
+        """启用后点击间隔由AIMD控制器按点击耗时和成功率在 [min_interval, max_interval] 之间调整
+
+        未指定范围时使用最小/最大随机间隔，下次开始运行时生效。
+        """
+        self.adaptive_interval = bool(enabled)
+        if min_interval is not None and max_interval is not None:
+            self.adaptive_bounds = (float(min_interval), float(max_interval))
+        else:
+            self.adaptive_bounds = None
+        logger.info(f"[{self.name}] 自适应间隔已{'启用' if self.adaptive_interval else '关闭'}")
+
+    def get_delivery_interval(self):
+        return self.delivery_interval
+
+    def toggle_auto_delivery(self):
+        if self.auto_delivery_enabled:
+            self.stop_auto_delivery()
+        else:
+            self.start()
+        return self.auto_delivery_enabled
+
+    def start(self):
+        """开始自动点击，第一次点击也由调度线程执行"""
+        self.begin_run()
+        self._schedule_at(self._tick_deadline, self._tick)
+
+    def begin_run(self):
+        """重置本次运行的状态，由调度方（调度线程或异步引擎）负责执行点击"""
+        self.auto_delivery_enabled = True
+        # 重置统计数据
+        self.start_time = time.time()
+        self.click_count = 0
+        self.retry_count = 0
+        self.failure_count = 0
+        self.end_time = None
+        self.stop_reason = None
+        self._started_at = time.monotonic()
+        self._ended_at = None
+        self.telemetry.reset()
+        self._dispatch = None
+        logger.info(f"[{self.name}] 重置点击统计数据")
+        # 预先生成本次运行的拟人化时间线
+        self.timeline = self._build_timeline()
+        self.current_step = None
+        self._run_generation += 1
+        self._tick_deadline = time.monotonic()
+        self._rate_reserved = False
+        self._tab_stale = True  # 上次运行固定的标签页在第一次点击前校验一次
+        self.breaker.failure_threshold = self.max_retries
+        self.breaker.reset()
+        self.cancel_token = CancelToken()
+        self.interval_controller = None
+        if self.adaptive_interval:
+            low, high = self.adaptive_bounds or (self.min_random_interval, self.max_random_interval)
+            # 从配置的间隔开始，不超出调整范围
+            self.interval_controller = AIMDIntervalController(low, high, initial_interval=self.configured_interval())
+
+        # 把时长和结束时间限制换算为单调时钟上的结束时刻，取较早的一个
+        self._run_end = None
+        self._run_end_reason = None
+        if self.max_duration:
+            self._run_end = self._tick_deadline + self.max_duration
+            self._run_end_reason = "max_duration"
+        if self.stop_at is not None:
+            stop_at_end = self._tick_deadline + (self.stop_at - time.time())
+            if self._run_end is None or stop_at_end < self._run_end:
+                self._run_end = stop_at_end
+                self._run_end_reason = "stop_at"
+        if self._run_end is not None:
+            # 结束时刻单独计时：到点时调度线程可能正在执行一次点击（例如等待元素），
+            # 由计时线程结束运行并取消令牌，正在执行的点击不会在结束时刻之后派发
+            self._run_end_timer = threading.Timer(
+                max(0, self._run_end - time.monotonic()), self._end_run_at_deadline,
+                (self._run_generation, self._run_end_reason)
+            )
+            self._run_end_timer.daemon = True
+            self._run_end_timer.start()
+
+    def _end_run_at_deadline(self, generation, reason):
+        if generation == self._run_generation:
+            self.finish_run(reason)
+
+    def stop_auto_delivery(self):
+        self.finish_run("stopped")
+
+    def finish_run(self, reason):
+        """结束本次运行并通知on_finished，重复调用时只有第一次生效"""
+        with self._finish_lock:
+            if self.end_time is not None and not self.auto_delivery_enabled:
+                return
+            self.auto_delivery_enabled = False
+            # 中断正在执行的点击：等待、悬停立即结束，尚未派发的点击不再执行
+            self.cancel_token.cancel()
+            # 使所有已安排的任务失效，避免停止后又被重新调度
+            self._run_generation += 1
+            if self.auto_delivery_timer:
+                self.auto_delivery_timer.cancel()
+                self.auto_delivery_timer = None
+            if self._run_end_timer:
+                self._run_end_timer.cancel()
+                self._run_end_timer = None
+            if self.start_time is None:
+                return
+            self.end_time = time.time()
+            self._ended_at = time.monotonic()
+            self.stop_reason = reason
+        logger.info(f"[{self.name}] 自动投放已停止: {STOP_REASONS.get(reason, reason)}")
+        if self.on_finished:
+            try:
+                self.on_finished(self.get_run_summary())
+            except Exception as e:
+                logger.error(f"[{self.name}] 处理运行结束回调时出错: {str(e)}")
+
+    def limit_reason(self, now=None):
+        """返回已达到的运行限制，未达到时返回None"""
+        if self.max_clicks is not None and self.click_count >= self.max_clicks:
+            return "max_clicks"
+        if self.max_failures is not None and self.failure_count >= self.max_failures:
+            return "max_failures"
+        if self._run_end is not None and (now or time.monotonic()) >= self._run_end:
+            return self._run_end_reason
+        return None
+
+    def check_limits(self):
+        """达到运行限制时结束运行并返回True"""
+        reason = self.limit_reason()
+        if reason:
+            self.finish_run(reason)
+            return True
+        return False
+
+    def _build_timeline(self):
+        """按当前的间隔和点击设置生成拟人化时间线，只有humanlike策略需要思考和悬停时间"""
+        timeline = HumanizationTimeline(
+            interval=self.delivery_interval,
+            random_interval=self.enable_random_interval,
+            min_interval=self.min_random_interval,
+            max_interval=self.max_random_interval,
+            humanize=self.click_strategy == "humanlike" and not self.use_fast_click,
+            seed=self.humanization_seed
+        )
+        logger.info(f"[{self.name}] 已生成拟人化时间线，随机种子: {timeline.seed}")
+        return timeline
+
+    def get_planned_timeline(self, count=20):
+        """查看本次运行接下来计划的点击步骤（思考时间、悬停时间、偏移、间隔）"""
+        if not self.timeline:
+            return []
+        return self.timeline.planned(count)
+
+    def get_next_interval(self):
+        """获取下一次点击的间隔时间"""
+        if self.interval_controller is not None:
+            interval = self.interval_controller.interval
+            logger.info(f"[{self.name}] 下次点击将在 {interval:.2f} 秒后执行(自适应间隔)")
+            return interval
+        if self.current_step is not None:
+            # 运行中修改了间隔设置（界面的间隔滑块、随机间隔开关）时按新设置重新生成时间线的间隔
+            if self.timeline is not None and self.timeline.set_intervals(
+                    self.delivery_interval, self.enable_random_interval,
+                    self.min_random_interval, self.max_random_interval):
+                logger.info(f"[{self.name}] 间隔设置已修改，时间线按新设置重新生成间隔")
+                self.current_step = self.current_step._replace(interval=self.timeline.draw_interval())
+            # 使用时间线中预先生成的间隔
+            interval = self.current_step.interval
+            logger.info(f"[{self.name}] 下次点击将在 {interval:.2f} 秒后执行(时间线)")
+            return interval
+        if self.enable_random_interval:
+            # 生成随机间隔时间
+            interval = random.uniform(self.min_random_interval, self.max_random_interval)
+            logger.info(f"[{self.name}] 下次点击将在 {interval:.2f} 秒后执行(随机间隔)")
+            return interval
+        else:
+            # 使用固定间隔时间
+            interval = self.delivery_interval
+            logger.info(f"[{self.name}] 下次点击将在 {interval} 秒后执行(固定间隔)")
+            return interval
+
+    def _click(self, by, value):
+        """按当前的点击设置执行一次点击"""
+        if self.use_fast_click:
+            backend = "cdp" if self.click_strategy == "cdp" else "selenium"
+            return self.browser_connector.locate_and_click(by, value, backend=backend)['clicked']
+        return self.browser_connector.click_element(
+            by, value, timeout=self._element_timeout(), strategy=self.click_strategy
+        )
+
+    def _element_timeout(self):
+        """本次点击等待元素就绪的最长秒数
+
+        所有任务在同一个调度线程中串行执行，有其他任务排队时缩短等待，元素迟迟不出现时尽快让出线程；
+        未找到的元素会进入负缓存，之后的点击不再等待
+        """
+        if self.scheduler.pending_count() > 0:
+            return min(self.element_timeout, SHARED_ELEMENT_TIMEOUT)
+        return self.element_timeout
+
+    def perform_click(self):
+        """执行点击操作"""
+        try:
+            if self.locator_type == "xpath" and self.target_xpath:
+                logger.info(f"使用XPath定位: {self.target_xpath}")
+                return self._click(By.XPATH, self.target_xpath)
+            elif self.locator_type == "css" and self.target_selector:
+                logger.info(f"使用CSS选择器定位: {self.target_selector}")
+                return self._click(By.CSS_SELECTOR, self.target_selector)
+            else:
+                logger.error("未设置有效的定位方式和路径")
+                return False
+        except ClickCancelled:
+            raise
+        except Exception as e:
+            logger.error(f"执行点击操作时出错: {str(e)}")
+            return False
+
+    def perform_random_click(self):
+        """从多个XPath中按权重随机选择一个执行点击操作"""
+        if not self.target_xpaths:
+            logger.error("未设置有效的XPath列表")
+            return False
+
+        index, selected_xpath = self._choose_target(self.resolve_live_targets())
+        if selected_xpath is None:
+            logger.warning(f"[{self.name}] 所有XPath当前都不可点击")
+            return False
+        logger.info(f"随机选择XPath: {selected_xpath}")
+
+        started = time.monotonic()
+        success = False
+        try:
+            success = self._click(By.XPATH, selected_xpath)
+            return success
+        except ClickCancelled:
+            raise
+        except Exception as e:
+            logger.error(f"执行随机点击操作时出错: {str(e)}")
+            return False
+        finally:
+            if self.xpath_selector is not None and not self.cancel_token.is_cancelled():
+                self.xpath_selector.record(index, success, time.monotonic() - started)
+
+    def _choose_target(self, live=None):
+        """返回 (序号, XPath)；按成功率和耗时调整后的权重选择，live为可选的候选序号列表"""
+        selector = self.xpath_selector
+        if selector is None or len(selector) != len(self.target_xpaths):
+            # 直接修改了target_xpaths时按相同权重重建
+            selector = self.xpath_selector = WeightedTargetSelector(self.target_xpaths)
+        return selector.choose(live)
+
+    def has_multiple_targets(self):
+        return len(self.target_xpaths) > 1
+
+    def target_locators(self):
+        return [(By.XPATH, xpath) for xpath in self.target_xpaths]
+
+    def live_targets(self, presence):
+        """从批量检查结果中取出可点击的XPath序号；结果无效时返回全部序号，不做过滤"""
+        if not presence or len(presence) != len(self.target_xpaths):
+            return list(range(len(self.target_xpaths)))
+        live = [i for i, state in enumerate(presence) if state and state.get('clickable')]
+        if len(live) < len(presence):
+            missing = [f"{self.target_xpaths[i]}({state.get('reason') if state else 'unknown'})"
+                       for i, state in enumerate(presence) if i not in live]
+            logger.info(f"[{self.name}] 当前不可点击的XPath: {', '.join(missing)}")
+        return live
+
+    def resolve_live_targets(self):
+        """一次脚本调用检查全部XPath，返回当前可点击的序号"""
+        backend = "cdp" if self.click_strategy == "cdp" else "selenium"
+        return self.live_targets(self.browser_connector.resolve_presence(self.target_locators(), backend=backend))
+
+    def get_target_stats(self):
+        """各XPath的静态权重、当前权重、成功率、平均耗时和被选中次数"""
+        return self.xpath_selector.get_stats() if self.xpath_selector else []
+
+    def ensure_target_tab(self):
+        """切换到任务的目标标签页，多个任务共用同一个WebDriver，每次点击前都要检查
+
+        第一次解析到目标标签页后固定它的窗口句柄，之后只在驱动不在该标签页时切换一次，不再读取当前URL；
+        点击失败或收到该标签页的导航事件后才重新校验URL。
+        """
+        handle = self.pinned_handle
+        if handle is not None:
+            try:
+                if self._pinned_tab_valid(handle):
+                    self.browser_connector.activate_handle(handle)
+                    return
+            except Exception as e:
+                logger.warning(f"[{self.name}] 切换到固定的标签页失败: {str(e)}")
+            logger.info(f"[{self.name}] 固定的标签页已失效，重新查找目标标签页")
+            self.pinned_handle = None
+
+        try:
+            current_url = self.browser_connector.get_current_url()
+            logger.info(f"[{self.name}] 当前页面URL: {current_url}")
+
+            # 如果设置了目标标签页URL模式，且当前URL不匹配，则尝试切换标签页
+            pattern = self.target_tab_pattern
+            if pattern and not pattern.matches(current_url):
+                logger.info(f"[{self.name}] 尝试切换到匹配 {self.target_tab_url} 的标签页")
+                if not self.browser_connector.switch_to_tab_by_url(pattern):
+                    logger.warning(f"未找到匹配 {self.target_tab_url} 的标签页，将在当前标签页操作")
+                    return
+                # 切换标签页后重新获取URL
+                current_url = self.browser_connector.get_current_url()
+                logger.info(f"[{self.name}] 切换后的页面URL: {current_url}")
+            self.pin_tab(self.browser_connector.active_handle())
+        except Exception as url_error:
+            logger.warning(f"获取或切换URL时出错: {str(url_error)}")
+            # 继续执行，不因URL错误而中断自动点击
+
+    def probe_locators(self):
+        """熔断探测时检查的定位表达式"""
+        if self.has_multiple_targets():
+            return self.target_locators()
+        if self.locator_type == "xpath" and self.target_xpath:
+            return [(By.XPATH, self.target_xpath)]
+        if self.locator_type == "css" and self.target_selector:
+            return [(By.CSS_SELECTOR, self.target_selector)]
+        return []
+
+    def probe(self):
+        """熔断打开时的廉价探测：浏览器会话存活、目标标签页可用、至少一个目标元素可点击，不执行点击"""
+        connector = self.browser_connector
+        try:
+            if not connector.is_connected() and not connector.reconnect():
+                return False
+            connector.heartbeat()
+            self.ensure_target_tab()
+            backend = "cdp" if self.click_strategy == "cdp" else "selenium"
+            presence = connector.resolve_presence(self.probe_locators(), backend=backend)
+            return any(state and state.get('clickable') for state in presence or [])
+        except Exception as e:
+            logger.warning(f"[{self.name}] 熔断探测失败: {str(e)}")
+            return False
+
+    def pin_tab(self, handle):
+        """固定任务的目标标签页"""
+        self.pinned_handle = handle
+        self._pinned_navigations = self.browser_connector.tab_navigation_count(handle)
+        self._tab_stale = False
+        logger.info(f"[{self.name}] 已固定到标签页 {handle}")
+
+    def pinned_tab(self):
+        """固定的标签页无需校验即可使用时返回其窗口句柄，否则返回None（不与驱动交互）"""
+        handle = self.pinned_handle
+        if handle is None or self._tab_stale:
+            return None
+        navigations = self.browser_connector.tab_navigation_count(handle)
+        if navigations is None or navigations != self._pinned_navigations:
+            return None
+        return handle
+
+    def _pinned_tab_valid(self, handle):
+        """固定的标签页是否仍可使用：没有导航事件且最近的点击没有失败时直接使用，否则校验一次URL"""
+        navigations = self.browser_connector.tab_navigation_count(handle)
+        if navigations is None:
+            logger.info(f"[{self.name}] 固定的标签页已关闭")
+            return False
+        if not self._tab_stale and navigations == self._pinned_navigations:
+            return True
+        pattern = self.target_tab_pattern
+        if pattern is not None:
+            url = self.browser_connector.get_tab_url(handle)
+            if url is None or not pattern.matches(url):
+                logger.info(f"[{self.name}] 固定的标签页已不匹配 {self.target_tab_url}: {url}")
+                return False
+        self._pinned_navigations = navigations
+        self._tab_stale = False
+        return True
+
+    def _tick(self):
+        """执行一次自动点击，并安排下一次"""
+        # 如果未启用自动投放，则直接返回
+        if not self.auto_delivery_enabled or self.check_limits():
+            return
+
+        # 熔断打开时只做廉价探测，不执行点击
+        if self.breaker.is_open():
+            self.breaker.record_probe(self.probe())
+            self._schedule_next_tick()
+            return
+
+        # 全局限流：令牌不足时按预约的时间重新排队，不占用调度线程
+        if not self._rate_reserved:
+            delay = self.browser_connector.rate_limiter.reserve_click(self.job_id, self.rate_weight)
+            if delay > 0:
+                self._rate_reserved = True
+                self._schedule(delay, self._tick)
+                return
+        self._rate_reserved = False
+
+        self.mark_dispatch()
+        try:
+            # 初始化开始时间（如果尚未初始化）
+            if self.start_time is None:
+                self.start_time = time.time()
+                logger.info("开始记录点击统计数据")
+
+            # 检查浏览器连接状态
+            if not self.browser_connector.is_connected():
+                logger.warning("浏览器未连接，尝试重新连接...")
+                # 使用缓存的驱动路径重新连接，与健康检查线程共享同一次重连；
+                # 失败时按一次点击异常计入熔断器，熔断打开后由探测继续尝试重连，恢复后自动继续
+                if not self.browser_connector.reconnect():
+                    raise ConnectionError("重新连接浏览器失败")
+
+            # 检查目标网址
+            if not self.target_url:
+                logger.error(f"[{self.name}] 未设置目标网址")
+                self.finish_run("no_target")
+                return
+
+            self.ensure_target_tab()
+
+            logger.info(f"[{self.name}] 执行自动投放点击，定位方式: {self.locator_type}")
+
+            step = self.timeline.next_step() if self.timeline else None
+            self.current_step = step
+            if step is not None and step.hover_pause > 0:
+                # 分阶段点击：先定位并移动到元素上，悬停时间到后再由调度器完成点击，期间不占用线程
+                handle = self.browser_connector.active_handle()
+                finish = self._begin_click(step)
+                if finish is not None:
+                    begun = time.monotonic()
+                    self._schedule(step.hover_pause, lambda: self._finish_click(finish, handle, begun))
+                    return
+                success = False
+            elif len(self.target_xpaths) > 1:
+                # 多个XPath时使用随机点击
+                success = self.perform_random_click()
+            else:
+                # 单个XPath时使用普通点击
+                success = self.perform_click()
+
+            if not self.record_click_result(success):
+                return
+        except ClickCancelled:
+            logger.info(f"[{self.name}] 任务已停止，正在执行的点击已取消")
+            return
+        except Exception as e:
+            logger.error(f"自动投放执行错误: {str(e)}")
+            if not self.record_click_error():
+                return
+
+        self._schedule_next_tick()
+
+    def next_locator(self, live=None, track=True):
+        """返回本次点击使用的 (定位方式, 定位表达式)
+
+        多个XPath时先批量检查哪些当前可点击（调用方已检查过时通过live传入可点击的序号），
+        只在可点击的XPath中按权重随机选择一个；都不可点击时返回None。
+        track为False时不记录选中的序号，点击结果不回填到加权选择器（定时点击）。
+        """
+        if len(self.target_xpaths) > 1:
+            if live is None:
+                live = self.resolve_live_targets()
+            index, selected_xpath = self._choose_target(live)
+            if track:
+                self._selected_target = index
+            if selected_xpath is None:
+                logger.warning(f"[{self.name}] 所有XPath当前都不可点击")
+                return None
+            logger.info(f"随机选择XPath: {selected_xpath}")
+            return By.XPATH, selected_xpath
+        if self.locator_type == "xpath" and self.target_xpath:
+            return By.XPATH, self.target_xpath
+        if self.locator_type == "css" and self.target_selector:
+            return By.CSS_SELECTOR, self.target_selector
+        return None
+
+    def _begin_click(self, step):
+        """按拟人化时间线的当前步骤开始一次分阶段点击，返回完成点击的回调"""
+        locator = self.next_locator()
+        if locator is None:
+            logger.error("未设置有效的定位方式和路径")
+            return None
+        by, value = locator
+        return self.browser_connector.begin_click(
+            by, value, timeout=self._element_timeout(), strategy=self.click_strategy, step=step
+        )
+
+    def prepare_click(self, timeout=10):
+        """执行定时点击的准备流水线（切换标签页、定位、滚动、预热、计算坐标），返回ArmedClick"""
+        return ClickArming(self, timeout).run()
+
+    def _finish_click(self, finish, handle, begun):
+        """悬停时间结束后完成点击，并安排下一次点击
+
+        悬停期间调度线程会执行其他任务，驱动可能已切换到其他标签页，点击前切回开始点击时的标签页；
+        该标签页在悬停期间发生了导航时放弃本次点击
+        """
+        # 悬停期间已达到时长限制时不再点击
+        if not self.auto_delivery_enabled or self.check_limits():
+            return
+        self.exclude_pause(time.monotonic() - begun)
+        try:
+            if handle == self.pinned_handle and self.pinned_tab() is None:
+                logger.warning(f"[{self.name}] 悬停期间目标标签页已变化，放弃本次点击")
+                self._tab_stale = True
+                success = False
+            else:
+                self.browser_connector.activate_handle(handle)
+                success = finish()
+            if not self.record_click_result(success):
+                return
+        except ClickCancelled:
+            logger.info(f"[{self.name}] 任务已停止，悬停后的点击已取消")
+            return
+        except Exception as e:
+            logger.error(f"自动投放执行错误: {str(e)}")
+            if not self.record_click_error():
+                return
+        self._schedule_next_tick()
+
+    def mark_dispatch(self, intended=None):
+        """记录本次点击的计划时刻（默认为调度时计算的时刻）和实际开始执行的时刻"""
+        self._dispatch = (self._tick_deadline if intended is None else intended, time.monotonic())
+
+    def exclude_pause(self, seconds):
+        """从本次点击的耗时中扣除主动等待的时间（悬停），遥测和自适应间隔只统计页面和驱动的响应时间"""
+        if self._dispatch is not None and seconds > 0:
+            intended, dispatched = self._dispatch
+            # 计划时刻一起后移，调度延迟保持不变
+            self._dispatch = (intended + seconds, dispatched + seconds)
+
+    def _record_telemetry(self, outcome, dispatch=None):
+        if dispatch is None:
+            self._record_target(outcome == "success")
+            dispatch, self._dispatch = self._dispatch, None
+        if dispatch is None:
+            if self.interval_controller is not None:
+                self.interval_controller.record(outcome == "success")
+            return
+        intended, dispatched = dispatch
+        completed = time.monotonic()
+        self.telemetry.record(intended, dispatched, completed, outcome)
+        if self.interval_controller is not None:
+            self.interval_controller.record(outcome == "success", completed - dispatched)
+
+    def _record_target(self, success):
+        """把next_locator选中的XPath的点击结果和耗时回填到加权选择器"""
+        index, self._selected_target = self._selected_target, None
+        if index is None or self.xpath_selector is None:
+            return
+        latency = time.monotonic() - self._dispatch[1] if self._dispatch else None
+        self.xpath_selector.record(index, success, latency)
+
+    def configured_interval(self):
+        """配置的平均点击间隔（秒）"""
+        if self.enable_random_interval:
+            return (self.min_random_interval + self.max_random_interval) / 2
+        return self.delivery_interval
+
+    def get_telemetry(self):
+        """调度延迟、点击耗时、漂移和实际/配置频率的聚合统计"""
+        summary = self.telemetry.summary(self.configured_interval())
+        summary['job_id'] = self.job_id
+        summary['name'] = self.name
+        return summary
+
+    def record_click_result(self, success, dispatch=None):
+        """记录点击结果，返回是否继续自动投放
+
+        dispatch为 (计划时刻, 实际开始时刻)，由不经过调度线程的点击（定时点击）传入，
+        不使用也不影响调度线程中正在进行的点击的记录
+        """
+        self._record_telemetry("success" if success else "failure", dispatch)
+        if success:
+            logger.info(f"[{self.name}] 自动投放点击成功")
+            # 增加点击计数
+            self.click_count += 1
+            logger.info(f"[{self.name}] 当前点击次数: {self.click_count}")
+            # 重置重试计数
+            self.retry_count = 0
+            self.breaker.record_success()
+            # 达到次数上限时立即结束，不再安排下一次点击
+            return not self.check_limits()
+
+        self.retry_count += 1
+        self.failure_count += 1
+        self._tab_stale = True  # 下次点击前重新校验固定的标签页
+        logger.warning(f"[{self.name}] 自动投放点击失败，第{self.retry_count}次重试")
+        # 连续失败多次时熔断，暂停点击并定期探测，恢复后自动继续
+        self.breaker.record_failure()
+        return not self.check_limits()
+
+    def record_click_error(self):
+        """记录点击过程中的异常，返回是否继续自动投放"""
+        self._record_telemetry("error")
+        # 发生异常时增加重试计数
+        self.retry_count += 1
+        self.failure_count += 1
+        self._tab_stale = True
+        self.breaker.record_failure()
+        return not self.check_limits()
+
+    def _schedule(self, delay, func):
+        """在delay秒后执行func"""
+        self._schedule_at(time.monotonic() + delay, func)
+
+    def _schedule_at(self, deadline, func):
+        """在time.monotonic()到达deadline时由调度线程执行func"""
+        if self.auto_delivery_timer:
+            self.auto_delivery_timer.cancel()
+        self.auto_delivery_timer = self.scheduler.call_at(deadline, self._run_scheduled, self._run_generation, func)
+
+    def _run_scheduled(self, generation, func):
+        """执行调度任务，任务所属的运行已停止或重新开始时直接丢弃"""
+        if generation != self._run_generation or not self.auto_delivery_enabled:
+            return
+        # 执行期间连接器和点击策略中的等待都检查本次运行的取消令牌；
+        # 持有驱动锁，定时点击的准备和触发不会在切换标签页和点击之间插入
+        with self.browser_connector.driver_lock, cancel_scope(self.cancel_token):
+            func()
+
+    def _schedule_next_tick(self):
+        """设置下一次点击，下一次点击晚于运行结束时刻时改为在结束时刻结束运行"""
+        deadline = self.next_deadline()
+        if self._run_end is not None and deadline >= self._run_end:
+            reason = self._run_end_reason
+            self._schedule_at(self._run_end, lambda: self.finish_run(reason))
+            return
+        self._schedule_at(deadline, self._tick)
+
+    def next_wakeup(self):
+        """下一次点击的计划时间，早于它到达运行结束时刻时返回结束时刻"""
+        deadline = self.next_deadline()
+        if self._run_end is not None:
+            deadline = min(deadline, self._run_end)
+        return deadline
+
+    def next_deadline(self):
+        """计算下一次点击的计划时间（time.monotonic），包含退避和下一步的思考时间
+
+        熔断打开时返回下一次探测的时间，试探恢复时立即放行一次点击。
+        """
+        if self.breaker.is_open() or self.breaker.state == HALF_OPEN:
+            probe_at = self.breaker.probe_at
+            self._tick_deadline = max(time.monotonic(), probe_at or 0)
+            return self._tick_deadline
+
+        # 如果启用了随机间隔，每次都重新生成随机间隔
+        if self.enable_random_interval or self.interval_controller is not None:
+            # 自适应间隔由控制器自己处理失败后的退避
+            delay = self.get_next_interval()
+        else:
+            # 实现指数退避策略，最多延迟到30秒
+            base_interval = self.get_next_interval()
+            delay = min(base_interval * (2 ** min(self.retry_count, 5)), 30)
+
+        # 下一步的思考时间并入等待时间，不在点击时sleep
+        if self.timeline:
+            delay += self.timeline.current().think_time
+
+        now = time.monotonic()
+        if self.schedule_mode == "fixed_rate" and self._tick_deadline is not None:
+            # 按上一次的计划时间递推，点击耗时不会累积成漂移
+            deadline = self._tick_deadline + delay
+            if deadline < now:
+                logger.warning(f"[{self.name}] 点击耗时超过间隔，落后计划 {now - deadline:.2f} 秒，立即执行下一次点击")
+                deadline = now
+        else:
+            deadline = now + delay
+        self._tick_deadline = deadline
+        return deadline
+
+    def get_statistics(self):
+        if self.start_time is None:
+            return 0, 0
+        # 使用单调时钟计算时长，不受系统时间调整影响；运行结束后时长不再增加
+        if self._started_at is not None:
+            elapsed_time = (self._ended_at or time.monotonic()) - self._started_at
+        else:
+            elapsed_time = time.time() - self.start_time
+        return elapsed_time, self.click_count
+
+    def get_run_summary(self):
+        """本次运行的统计数据，运行结束时传给on_finished"""
+        elapsed_time, click_count = self.get_statistics()
+        return {
+            'job_id': self.job_id,
+            'name': self.name,
+            'elapsed_time': elapsed_time,
+            'click_count': click_count,
+            'failure_count': self.failure_count,
+            'breaker': self.breaker.get_stats(),
+            'adaptive': self.interval_controller.get_stats() if self.interval_controller else None,
+            'reason': self.stop_reason,
+            'reason_text': STOP_REASONS.get(self.stop_reason, self.stop_reason or ""),
+        }
+
+    def get_status(self):
+        """返回任务的状态摘要，供界面列出所有任务"""
+        elapsed_time, click_count = self.get_statistics()
+        return {
+            'id': self.job_id,
+            'name': self.name,
+            'running': self.auto_delivery_enabled,
+            'target_tab_url': self.target_tab_url,
+            'click_count': click_count,
+            'retry_count': self.retry_count,
+            'breaker': self.breaker.state,
+            'elapsed_time': elapsed_time,
+        }
@@ -0,0 +1,150 @@
+import random
+from selenium import webdriver
+from logger import logger
+from core.cancellation import ClickCancelled, current_token
+
+
+class ClickStrategy:
+    """点击策略基类
+
+    子类实现 click(connector, by, value, timeout)，返回是否点击成功。
+    通过 BrowserConnector.register_click_strategy 注册后即可按名称选择。
+    """
+
+    name = ""
+    description = ""
+
+    def click(self, connector, by, value, timeout=10):
+        raise NotImplementedError
+
+    def begin(self, connector, by, value, timeout=10, step=None):
+        """开始一次分阶段点击，返回完成点击的回调，准备失败时返回None
+
+        默认没有准备阶段，回调中执行完整的点击
+        """
+        return lambda: self.click(connector, by, value, timeout)
+
+
+class HumanlikeClickStrategy(ClickStrategy):
+    """模拟人类操作：随机思考时间，带随机偏移的鼠标移动、悬停后点击（ActionChains）"""
+
+    name = "humanlike"
+    description = "带反检测措施"
+
+    def click(self, connector, by, value, timeout=10):
+        return connector.click_located_element(by, value, timeout, self.perform, self.description)
+
+    def perform(self, connector, element):
+        token = current_token()
+        # 添加随机延迟，模拟人类思考时间（任务停止时立即中断）
+        token.sleep(random.uniform(0.3, 1.5))
+
+        # 模拟鼠标移动到元素（带随机偏移）
+        action = webdriver.ActionChains(connector.driver)
+        # 随机偏移量，模拟人类点击不精确性
+        x_offset = random.randint(-5, 5)
+        y_offset = random.randint(-5, 5)
+        action.move_to_element_with_offset(element, x_offset, y_offset)
+        action.perform()
+        # 悬停片刻，在本地等待而不是放进ActionChains，停止时可以中断且不会再点击
+        token.sleep(random.uniform(0.1, 0.5))
+        action = webdriver.ActionChains(connector.driver)
+        action.click()
+        action.perform()
+
+    def begin(self, connector, by, value, timeout=10, step=None):
+        """按预先生成的拟人化参数分两步点击：先移动到元素上，悬停时间由调用方安排，再点击
+
+        思考时间和悬停时间都不在这里sleep
+        """
+        if step is None:
+            return super().begin(connector, by, value, timeout, step)
+
+        located = []
+
+        def move(connector, element):
+            action = webdriver.ActionChains(connector.driver)
+            action.move_to_element_with_offset(element, step.x_offset, step.y_offset)
+            action.perform()
+            located.append(element)
+
+        if not connector.perform_on_element(by, value, timeout, move):
+            return None
+        element = located[-1]
+
+        def finish():
+            try:
+                current_token().raise_if_cancelled()
+                # 悬停期间其他任务可能移动过鼠标或切换过标签页，点击前重新移动到同一位置
+                action = webdriver.ActionChains(connector.driver)
+                action.move_to_element_with_offset(element, step.x_offset, step.y_offset)
+                action.click()
+                action.perform()
+                logger.info(f"点击元素: {by}, {value} ({self.description})")
+                return True
+            except ClickCancelled:
+                raise
+            except Exception as e:
+                logger.error(f"点击元素失败: {by}, {value}, 错误: {str(e)}")
+                return False
+        return finish
+
+
+class DirectClickStrategy(ClickStrategy):
+    """通过脚本直接调用 element.click()，没有任何延迟"""
+
+    name = "direct"
+    description = "脚本直接点击"
+
+    def click(self, connector, by, value, timeout=10):
+        return connector.click_located_element(by, value, timeout, self.perform, self.description)
+
+    def perform(self, connector, element):
+        connector.driver.execute_script("arguments[0].click();", element)
+
+    def begin(self, connector, by, value, timeout=10, step=None):
+        """预先定位元素并滚动到可见区域，返回的回调只执行一次脚本点击"""
+        located = []
+
+        def prepare(connector, element):
+            connector.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", element)
+            located.append(element)
+
+        if not connector.perform_on_element(by, value, timeout, prepare):
+            return None
+        element = located[-1]
+
+        def finish():
+            try:
+                current_token().raise_if_cancelled()
+                self.perform(connector, element)
+                logger.info(f"点击元素: {by}, {value} ({self.description})")
+                return True
+            except ClickCancelled:
+                raise
+            except Exception as e:
+                logger.error(f"点击元素失败: {by}, {value}, 错误: {str(e)}")
+                return False
+        return finish
+
+
+class CDPInputClickStrategy(ClickStrategy):
+    """通过CDP的 Input.dispatchMouseEvent 派发鼠标事件，绕过msedgedriver"""
+
+    name = "cdp"
+    description = "CDP直连"
+
+    def click(self, connector, by, value, timeout=10):
+        return connector.cdp_click_element(by, value, timeout)
+
+    def begin(self, connector, by, value, timeout=10, step=None):
+        """预先定位元素并计算点击坐标，返回的回调只派发鼠标事件"""
+        return connector.cdp_begin_click(by, value, timeout, step)
+
+
+# 内置点击策略
+DEFAULT_CLICK_STRATEGIES = (
+    HumanlikeClickStrategy(),
+    DirectClickStrategy(),
+    CDPInputClickStrategy(),
+)
@@ -0,0 +1,113 @@
+import threading
+from logger import logger
+
+# 表示浏览器会话已丢失、需要重新连接的错误信息
+SESSION_LOST_ERRORS = (
+    "invalid session id",
+    "chrome not reachable",
+    "no such session",
+    "disconnected",
+    "connection refused",
+    "max retries exceeded",
+)
+
+
+def is_session_lost_error(error):
+    """判断异常是否表示浏览器会话已丢失"""
+    error_msg = str(error).lower()
+    return any(keyword in error_msg for keyword in SESSION_LOST_ERRORS)
+
+
+class _Flight:
+    __slots__ = ("done", "result")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class SingleFlight:
+    """合并并发调用：同一时刻只执行一次func，其余调用者等待并共享同一个结果"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flight = None
+
+    def in_flight(self):
+        return self._flight is not None
+
+    def do(self, func):
+        with self._lock:
+            flight = self._flight
+            leader = flight is None
+            if leader:
+                flight = self._flight = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            return flight.result
+
+        try:
+            flight.result = func()
+        except Exception as e:
+            logger.error(f"执行失败: {str(e)}")
+            flight.result = False
+        finally:
+            with self._lock:
+                self._flight = None
+            flight.done.set()
+        return flight.result
+
+
+class ConnectionMonitor:
+    """后台连接健康检查线程
+
+    定期对浏览器会话做心跳检查，发现会话丢失时通过连接器的reconnect()自动重连。
+    重连使用single-flight语义，与点击线程、界面刷新发起的重连共享同一次尝试。
+    """
+
+    def __init__(self, connector, interval=5.0):
+        self.connector = connector
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.is_running():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="ConnectionMonitor", daemon=True)
+        self._thread.start()
+        logger.info(f"连接健康检查已启动，间隔 {self.interval} 秒")
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"连接健康检查出错: {str(e)}")
+
+    def check(self):
+        """执行一次健康检查，返回连接是否可用"""
+        if not self.connector.is_connected():
+            if not self.connector.can_reconnect():
+                return False
+            logger.warning("健康检查发现浏览器未连接，尝试自动重连")
+            return self.connector.reconnect()
+
+        try:
+            self.connector.heartbeat()
+            return True
+        except Exception as e:
+            if is_session_lost_error(e):
+                logger.warning(f"健康检查发现浏览器会话已丢失: {str(e)}")
+                return self.connector.reconnect()
+            logger.warning(f"健康检查失败: {str(e)}")
+            return False
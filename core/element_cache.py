@@ -0,0 +1,118 @@
+import threading
+import time
+from collections import OrderedDict
+from logger import logger
+
+
+class ElementCache:
+    """按 (标签页, 定位方式, 定位表达式) 缓存已定位到的元素
+
+    以下情况会使缓存失效:
+        - 使用缓存元素时出现 StaleElementReferenceException（由调用方调用invalidate）
+        - 命中时元素已被隐藏、禁用或移出文档（由调用方检查后调用invalidate）
+        - 标签页发生导航（URL变化，由CDP的Target事件通知）
+        - 页面DOM版本号变化（可选，check_dom_version=True时每次命中都会校验）
+
+    同时记录近期没有找到的定位表达式（负缓存），在negative_ttl秒内不再等待完整超时。
+    负缓存在标签页导航、关闭时清除；调用方命中负缓存后应先做一次不等待的检查，
+    元素已经出现（DOM已变化）时调用clear_missing提前清除。
+    """
+
+    def __init__(self, max_entries=256, negative_ttl=5.0):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (tab, by, value) -> (element, dom_version)
+        self._missing = {}  # (tab, by, value) -> 负缓存过期的time.monotonic时刻
+        self.negative_ttl = negative_ttl
+        self.negative_hits = 0
+        self._tab_urls = {}  # tab -> 最近一次已知的URL
+        self.max_entries = max_entries
+        self.check_dom_version = False
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, tab, by, value):
+        """返回 (element, dom_version)，未命中时返回None"""
+        key = (tab, by, value)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, tab, by, value, element, dom_version=None):
+        key = (tab, by, value)
+        with self._lock:
+            self._entries[key] = (element, dom_version)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, tab, by, value):
+        with self._lock:
+            self._entries.pop((tab, by, value), None)
+
+    def invalidate_tab(self, tab):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == tab]:
+                del self._entries[key]
+            for key in [key for key in self._missing if key[0] == tab]:
+                del self._missing[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._missing.clear()
+            self._tab_urls.clear()
+
+    def mark_missing(self, tab, by, value):
+        """记录定位表达式在该标签页中未找到"""
+        if self.negative_ttl <= 0:
+            return
+        with self._lock:
+            if len(self._missing) >= self.max_entries:
+                now = time.monotonic()
+                for key in [key for key, expires in self._missing.items() if expires <= now]:
+                    del self._missing[key]
+            self._missing[(tab, by, value)] = time.monotonic() + self.negative_ttl
+
+    def is_missing(self, tab, by, value):
+        """定位表达式近期是否未找到（负缓存未过期）"""
+        key = (tab, by, value)
+        with self._lock:
+            expires = self._missing.get(key)
+            if expires is None:
+                return False
+            if expires <= time.monotonic():
+                del self._missing[key]
+                return False
+            self.negative_hits += 1
+            return True
+
+    def clear_missing(self, tab, by, value):
+        with self._lock:
+            self._missing.pop((tab, by, value), None)
+
+    def note_url(self, tab, url):
+        """记录标签页的URL，URL变化（发生导航）时清除该标签页的缓存"""
+        with self._lock:
+            previous = self._tab_urls.get(tab)
+            self._tab_urls[tab] = url
+        if previous is not None and previous != url:
+            logger.info(f"标签页 {tab} 已导航到 {url}，清除元素缓存")
+            self.invalidate_tab(tab)
+
+    # CDP事件回调
+    def on_target_info_changed(self, params, session_id=None):
+        target_info = params.get('targetInfo', {})
+        if target_info.get('targetId'):
+            self.note_url(target_info['targetId'].upper(), target_info.get('url', ''))
+
+    def on_target_destroyed(self, params, session_id=None):
+        target_id = params.get('targetId')
+        if target_id:
+            self.invalidate_tab(target_id.upper())
+            with self._lock:
+                self._tab_urls.pop(target_id.upper(), None)
@@ -0,0 +1,117 @@
+import random
+from collections import namedtuple
+
+# 一次点击的拟人化参数（时间单位：秒，offset为相对本次运行开始的计划时间）
+HumanizationStep = namedtuple(
+    "HumanizationStep",
+    "index start_offset think_time hover_pause x_offset y_offset interval",
+)
+
+
+class HumanizationTimeline:
+    """预先生成整个运行过程的拟人化时间线
+
+    每一步包含：思考时间、悬停时间、点击偏移量、到下一次点击的间隔。
+    使用带种子的随机数生成器按批生成，相同的种子得到完全相同的时间线，
+    执行时由调度器按时间线安排各阶段，不在工作线程中sleep。
+    """
+
+    def __init__(self, interval=3, random_interval=False, min_interval=1, max_interval=5,
+                 humanize=True, think_range=(0.3, 1.5), hover_range=(0.1, 0.5), max_offset=5,
+                 seed=None, batch_size=256):
+        self.interval = interval
+        self.random_interval = random_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.humanize = humanize
+        self.think_range = think_range
+        self.hover_range = hover_range
+        self.max_offset = max_offset
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.batch_size = batch_size
+        # 每一列参数使用独立的随机数序列，生成结果与批大小无关
+        self._rngs = {
+            column: random.Random(f"{self.seed}:{column}")
+            for column in ("interval", "think", "hover", "x", "y")
+        }
+        self._steps = []
+        self._base = 0  # _steps[0] 对应的步骤序号（已执行的旧步骤会被丢弃）
+        self._cursor = 0
+        self._next_start = 0.0
+
+    def _extend(self, count):
+        """批量生成count个步骤：每一列参数一次性生成后再组合"""
+        rngs = self._rngs
+        intervals = self._draw_intervals(count)
+        if self.humanize:
+            thinks = [rngs["think"].uniform(*self.think_range) for _ in range(count)]
+            hovers = [rngs["hover"].uniform(*self.hover_range) for _ in range(count)]
+            x_offsets = [rngs["x"].randint(-self.max_offset, self.max_offset) for _ in range(count)]
+            y_offsets = [rngs["y"].randint(-self.max_offset, self.max_offset) for _ in range(count)]
+        else:
+            thinks = hovers = [0.0] * count
+            x_offsets = y_offsets = [0] * count
+
+        start = self._next_start
+        base = self._base + len(self._steps)
+        for i in range(count):
+            self._steps.append(HumanizationStep(
+                base + i, start, thinks[i], hovers[i], x_offsets[i], y_offsets[i], intervals[i]
+            ))
+            start += thinks[i] + hovers[i] + intervals[i]
+        self._next_start = start
+
+    def _draw_intervals(self, count):
+        if self.random_interval:
+            rng = self._rngs["interval"]
+            return [rng.uniform(self.min_interval, self.max_interval) for _ in range(count)]
+        return [self.interval] * count
+
+    def draw_interval(self):
+        """按当前的间隔设置取一个间隔"""
+        return self._draw_intervals(1)[0]
+
+    def set_intervals(self, interval, random_interval, min_interval, max_interval):
+        """运行中修改间隔设置：尚未执行的步骤按新设置重新生成间隔列，其他列不变
+
+        返回设置是否有变化
+        """
+        settings = (interval, random_interval, min_interval, max_interval)
+        if settings == (self.interval, self.random_interval, self.min_interval, self.max_interval):
+            return False
+        self.interval, self.random_interval, self.min_interval, self.max_interval = settings
+        pending = self._steps[self._cursor - self._base:]
+        if pending:
+            start = pending[0].start_offset
+            for i, (step, value) in enumerate(zip(pending, self._draw_intervals(len(pending)))):
+                self._steps[self._cursor - self._base + i] = step._replace(start_offset=start, interval=value)
+                start += step.think_time + step.hover_pause + value
+            self._next_start = start
+        return True
+
+    def step(self, index):
+        """返回第index步，不足时按批继续生成"""
+        if index < self._base:
+            raise IndexError(f"时间线第 {index} 步已被丢弃")
+        while index >= self._base + len(self._steps):
+            self._extend(self.batch_size)
+        return self._steps[index - self._base]
+
+    def current(self):
+        return self.step(self._cursor)
+
+    def next_step(self):
+        """取出下一步并前移游标"""
+        step = self.step(self._cursor)
+        self._cursor += 1
+        # 长时间运行时丢弃已执行的步骤，避免时间线无限增长
+        consumed = self._cursor - self._base
+        if consumed > self.batch_size:
+            del self._steps[:consumed]
+            self._base = self._cursor
+        return step
+
+    def planned(self, count=20, start=None):
+        """返回从start（默认为当前游标）开始的count个计划步骤，供界面或日志查看"""
+        start = self._cursor if start is None else start
+        return [self.step(i)._asdict() for i in range(start, start + count)]
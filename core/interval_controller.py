@@ -0,0 +1,81 @@
+import threading
+from logger import logger
+
+
+class AIMDIntervalController:
+    """按页面响应自适应调整点击间隔（加性增、乘性减）
+
+    以点击频率(1/间隔)为控制量：
+        点击成功且耗时正常时，频率增加一个固定步长（increase_steps次健康点击后从最低频率升到最高频率）；
+        点击失败或平滑后的耗时超过基准耗时的latency_tolerance倍时，频率乘以decrease_factor，
+        之后cooldown次点击内不再降低，避免同一次拥塞被重复惩罚。
+    基准耗时取平滑耗时的最小值并缓慢上调，页面整体变慢后会重新学习。
+    间隔始终限制在 [min_interval, max_interval] 之间。
+    """
+
+    def __init__(self, min_interval, max_interval, initial_interval=None, increase_steps=20,
+                 decrease_factor=0.5, latency_tolerance=1.5, cooldown=3, alpha=0.2):
+        min_interval, max_interval = sorted((float(min_interval), float(max_interval)))
+        self.min_interval = max(min_interval, 0.01)
+        self.max_interval = max(max_interval, self.min_interval)
+        self.min_rate = 1.0 / self.max_interval
+        self.max_rate = 1.0 / self.min_interval
+        self.increase_step = (self.max_rate - self.min_rate) / max(increase_steps, 1)
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.cooldown = cooldown
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        initial = initial_interval if initial_interval else self.max_interval
+        self.rate = min(max(1.0 / max(initial, 0.01), self.min_rate), self.max_rate)
+        self.latency = None  # 点击耗时（秒）的指数移动平均
+        self.baseline = None  # 基准耗时
+        self.increases = 0
+        self.decreases = 0
+        self._cooldown_left = 0
+
+    @property
+    def interval(self):
+        return 1.0 / self.rate
+
+    def record(self, success, latency=None):
+        """记录一次点击的结果和耗时，调整下一次的间隔"""
+        with self._lock:
+            if latency is not None:
+                self.latency = latency if self.latency is None else self.latency + self.alpha * (latency - self.latency)
+                if self.baseline is None or self.latency < self.baseline:
+                    self.baseline = self.latency
+                else:
+                    self.baseline += 0.01 * (self.latency - self.baseline)
+            slow = (self.latency is not None and self.baseline
+                    and self.latency > self.baseline * self.latency_tolerance)
+
+            if not success or slow:
+                if self._cooldown_left > 0:
+                    self._cooldown_left -= 1
+                    return
+                self.rate = max(self.rate * self.decrease_factor, self.min_rate)
+                self.decreases += 1
+                self._cooldown_left = self.cooldown
+                interval = self.interval
+                reason = "点击失败" if not success else f"耗时上升到 {self.latency * 1000:.0f}ms"
+            else:
+                if self._cooldown_left > 0:
+                    self._cooldown_left -= 1
+                    return
+                self.rate = min(self.rate + self.increase_step, self.max_rate)
+                self.increases += 1
+                return
+        logger.info(f"自适应间隔: {reason}，间隔增加到 {interval:.2f} 秒")
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'interval': self.interval,
+                'min_interval': self.min_interval,
+                'max_interval': self.max_interval,
+                'latency_ms': self.latency * 1000 if self.latency is not None else None,
+                'baseline_ms': self.baseline * 1000 if self.baseline is not None else None,
+                'increases': self.increases,
+                'decreases': self.decreases,
+            }
@@ -0,0 +1,302 @@
+import json
+
+# 在页面中按Selenium的定位方式(By.XPATH / By.CSS_SELECTOR / By.ID)查找元素
+FIND_ELEMENT_JS = """
+function findElement(by, value) {
+    if (by === 'xpath') {
+        return document.evaluate(value, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    }
+    if (by === 'id') {
+        return document.getElementById(value);
+    }
+    return document.querySelector(value);
+}
+"""
+
+# 定位元素、滚动到可见区域并返回元素中心坐标
+LOCATE_SCRIPT = """
+function(by, value) {
+    %s
+    var el = null;
+    try {
+        el = findElement(by, value);
+    } catch (e) {
+        return {found: false, reason: 'invalid_locator'};
+    }
+    if (!el) {
+        return {found: false, reason: 'not_found'};
+    }
+    el.scrollIntoView({block: 'center', inline: 'center'});
+    var rect = el.getBoundingClientRect();
+    if (rect.width === 0 || rect.height === 0) {
+        return {found: true, reason: 'not_visible'};
+    }
+    if (el.disabled) {
+        return {found: true, reason: 'disabled'};
+    }
+    return {found: true, reason: 'ok', x: rect.left + rect.width / 2, y: rect.top + rect.height / 2};
+}
+""" % FIND_ELEMENT_JS
+
+# 直接调用element.click()
+JS_CLICK_SCRIPT = """
+function(by, value) {
+    %s
+    var el = findElement(by, value);
+    if (!el || el.disabled) {
+        return false;
+    }
+    el.click();
+    return true;
+}
+""" % FIND_ELEMENT_JS
+
+# 一次调用完成：定位、可见/可用/遮挡检查、滚动到可见区域、点击，并返回结构化结果
+LOCATE_AND_CLICK_SCRIPT = """
+function(by, value) {
+    %s
+    var start = performance.now();
+    function done(found, clicked, reason) {
+        return {found: found, clicked: clicked, reason: reason, elapsed_ms: performance.now() - start};
+    }
+    var el = null;
+    try {
+        el = findElement(by, value);
+    } catch (e) {
+        return done(false, false, 'invalid_locator');
+    }
+    if (!el) {
+        return done(false, false, 'not_found');
+    }
+    var style = window.getComputedStyle(el);
+    if (style.display === 'none' || style.visibility === 'hidden' || !el.getClientRects().length) {
+        return done(true, false, 'not_visible');
+    }
+    if (el.disabled || el.getAttribute('aria-disabled') === 'true') {
+        return done(true, false, 'disabled');
+    }
+    el.scrollIntoView({block: 'center', inline: 'center'});
+    var rect = el.getBoundingClientRect();
+    var top = document.elementFromPoint(rect.left + rect.width / 2, rect.top + rect.height / 2);
+    if (top && top !== el && !el.contains(top)) {
+        return done(true, false, 'occluded');
+    }
+    el.click();
+    return done(true, true, 'clicked');
+}
+""" % FIND_ELEMENT_JS
+
+# 返回页面DOM版本号：首次调用时注入MutationObserver，有节点被移除时版本号递增
+DOM_VERSION_SCRIPT = """
+function() {
+    if (!window.__tagClickDomVersion) {
+        window.__tagClickDomVersion = Date.now();
+        new MutationObserver(function(mutations) {
+            for (var i = 0; i < mutations.length; i++) {
+                if (mutations[i].removedNodes.length) {
+                    window.__tagClickDomVersion++;
+                    return;
+                }
+            }
+        }).observe(document, {childList: true, subtree: true});
+    }
+    return window.__tagClickDomVersion;
+}
+"""
+
+# 等待元素就绪（存在、可见、可用）：先立即检查一次，之后由MutationObserver在DOM变化时触发检查，
+# 返回Promise，结果为 {ready, reason, waited_ms[, element]}。
+# waitId不为空时把中断函数登记到window.__tagClickWaits[waitId]，ABORT_WAIT_SCRIPT调用它使等待以'cancelled'结束
+WAIT_FOR_ELEMENT_SCRIPT = """
+function(by, value, timeoutMs, returnElement, waitId) {
+    %s
+    var start = performance.now();
+    function check() {
+        var el = findElement(by, value);
+        if (!el) {
+            return null;
+        }
+        var style = window.getComputedStyle(el);
+        if (style.display === 'none' || style.visibility === 'hidden' || !el.getClientRects().length) {
+            return null;
+        }
+        if (el.disabled || el.getAttribute('aria-disabled') === 'true') {
+            return null;
+        }
+        return el;
+    }
+    var waits = window.__tagClickWaits || (window.__tagClickWaits = {});
+    return new Promise(function(resolve) {
+        var observer = null;
+        var timer = null;
+        var done = false;
+        function finish(ready, reason, el) {
+            if (done) {
+                return;
+            }
+            done = true;
+            if (waitId) {
+                delete waits[waitId];
+            }
+            if (observer) {
+                observer.disconnect();
+            }
+            if (timer) {
+                clearTimeout(timer);
+            }
+            var result = {ready: ready, reason: reason, waited_ms: performance.now() - start};
+            if (returnElement && el) {
+                result.element = el;
+            }
+            resolve(result);
+        }
+        function evaluate() {
+            var el;
+            try {
+                el = check();
+            } catch (e) {
+                finish(false, 'invalid_locator');
+                return true;
+            }
+            if (el) {
+                finish(true, 'ready', el);
+                return true;
+            }
+            return false;
+        }
+        if (waitId) {
+            // 中断请求先于等待到达页面时直接结束
+            if (waits[waitId] === 'aborted') {
+                delete waits[waitId];
+                finish(false, 'cancelled');
+                return;
+            }
+            waits[waitId] = function() {
+                finish(false, 'cancelled');
+            };
+        }
+        if (evaluate()) {
+            return;
+        }
+        observer = new MutationObserver(function() {
+            evaluate();
+        });
+        observer.observe(document.documentElement || document, {
+            childList: true,
+            subtree: true,
+            attributes: true,
+            attributeFilter: ['style', 'class', 'hidden', 'disabled', 'aria-disabled']
+        });
+        timer = setTimeout(function() {
+            finish(false, 'timeout');
+        }, timeoutMs);
+    });
+}
+""" % FIND_ELEMENT_JS
+
+# 中断WAIT_FOR_ELEMENT_SCRIPT中编号为waitId的等待，等待尚未开始时留下标记
+ABORT_WAIT_SCRIPT = """
+function(waitId) {
+    var waits = window.__tagClickWaits || (window.__tagClickWaits = {});
+    if (typeof waits[waitId] === 'function') {
+        waits[waitId]();
+    } else {
+        waits[waitId] = 'aborted';
+    }
+}
+"""
+
+# 一次调用检查多个定位表达式，locators为 [[by, value], ...]，
+# 按顺序返回每个表达式的 {present, visible, enabled, clickable, reason}，不等待、不滚动
+PRESENCE_SCRIPT = """
+function(locators) {
+    %s
+    var results = [];
+    for (var i = 0; i < locators.length; i++) {
+        var result = {present: false, visible: false, enabled: false, clickable: false, reason: 'not_found'};
+        results.push(result);
+        var el = null;
+        try {
+            el = findElement(locators[i][0], locators[i][1]);
+        } catch (e) {
+            result.reason = 'invalid_locator';
+            continue;
+        }
+        if (!el) {
+            continue;
+        }
+        result.present = true;
+        var style = window.getComputedStyle(el);
+        if (style.display === 'none' || style.visibility === 'hidden' || !el.getClientRects().length) {
+            result.reason = 'not_visible';
+            continue;
+        }
+        result.visible = true;
+        if (el.disabled || el.getAttribute('aria-disabled') === 'true') {
+            result.reason = 'disabled';
+            continue;
+        }
+        result.enabled = true;
+        // 元素在视口内时检查中心点是否被遮挡，视口外的元素点击前会滚动，按可点击处理
+        var rect = el.getBoundingClientRect();
+        var x = rect.left + rect.width / 2;
+        var y = rect.top + rect.height / 2;
+        if (x >= 0 && y >= 0 && x < window.innerWidth && y < window.innerHeight) {
+            var top = document.elementFromPoint(x, y);
+            if (top && top !== el && !el.contains(top)) {
+                result.reason = 'occluded';
+                continue;
+            }
+        }
+        result.clickable = true;
+        result.reason = 'ok';
+    }
+    return results;
+}
+""" % FIND_ELEMENT_JS
+
+# 检查已定位的元素是否仍在文档中、可见且可用，与等待元素就绪时的判断一致
+ELEMENT_READY_SCRIPT = """
+function(el) {
+    if (!el || !el.isConnected) {
+        return false;
+    }
+    var style = window.getComputedStyle(el);
+    if (style.display === 'none' || style.visibility === 'hidden' || !el.getClientRects().length) {
+        return false;
+    }
+    return !(el.disabled || el.getAttribute('aria-disabled') === 'true');
+}
+"""
+
+# 返回元素中心点的视口坐标（与CDP Input.dispatchMouseEvent的坐标系一致），并检查该点是否被遮挡
+ELEMENT_CENTER_SCRIPT = """
+function(el) {
+    var rect = el.getBoundingClientRect();
+    var x = rect.left + rect.width / 2;
+    var y = rect.top + rect.height / 2;
+    var top = document.elementFromPoint(x, y);
+    return {x: x, y: y, width: rect.width, height: rect.height, occluded: !!(top && top !== el && !el.contains(top))};
+}
+"""
+
+
+def as_selenium_script(function_source):
+    """包装为 driver.execute_script 使用的脚本，参数通过arguments传入"""
+    return "return (%s).apply(null, arguments);" % function_source
+
+
+def as_selenium_async_script(function_source):
+    """包装为 driver.execute_async_script 使用的脚本，函数返回的Promise完成时回调Selenium"""
+    return (
+        "var callback = arguments[arguments.length - 1];"
+        "var args = Array.prototype.slice.call(arguments, 0, -1);"
+        "Promise.resolve((%s).apply(null, args)).then(callback, function(e) {"
+        "    callback({ready: false, reason: 'error: ' + e});"
+        "});"
+    ) % function_source
+
+
+def as_expression(function_source, *args):
+    """包装为 Runtime.evaluate 使用的表达式，参数以JSON字面量内联"""
+    return "(%s)(%s)" % (function_source, ", ".join(json.dumps(arg) for arg in args))
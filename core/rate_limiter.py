@@ -0,0 +1,111 @@
+import threading
+import time
+from logger import logger
+from core.cancellation import current_token
+
+
+class TokenBucket:
+    """令牌桶：以rate个/秒的速度补充令牌，最多积累capacity个
+
+    reserve采用预约方式：令牌不足时余额记为负数并返回需要等待的时间，
+    之后的请求排在它后面，多个请求方按预约顺序依次获得令牌，不会同时涌入。
+    """
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError(f"令牌补充速度必须大于0: {rate}")
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens=1.0):
+        """预约tokens个令牌，返回需要等待的秒数，0表示立即可用"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, tokens=1.0):
+        """阻塞直到获得令牌，返回等待的秒数"""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+class RateLimiter:
+    """连接级别的限流，所有任务和标签页共用
+
+    click_bucket限制全局每秒点击次数，并在最近活跃的任务之间按权重分配：
+    权重为w的任务最多获得 w/总权重 的点击频率，空闲任务的份额自动分给其他任务；
+    command_bucket限制每秒发往msedgedriver的WebDriver命令数。未设置时不限流。
+    """
+
+    ACTIVE_WINDOW = 2.0  # 超过这么多秒没有点击的任务不再参与分配
+
+    def __init__(self):
+        self.click_bucket = None
+        self.command_bucket = None
+        self._lock = threading.Lock()
+        self._clients = {}  # 任务标识 -> [权重, 最近一次点击时刻, 下一次允许点击的时刻]
+        self.queued_commands = 0  # 因限流而等待过的WebDriver命令数
+        self.queued_clicks = 0  # 因限流而推迟过的点击数
+
+    def configure(self, clicks_per_sec=None, commands_per_sec=None, burst=None):
+        """设置全局点击频率和WebDriver命令频率上限，None表示不限制；burst为允许的突发数量"""
+        self.click_bucket = TokenBucket(clicks_per_sec, burst) if clicks_per_sec else None
+        self.command_bucket = TokenBucket(commands_per_sec, burst) if commands_per_sec else None
+        logger.info(f"限流设置: 点击 {clicks_per_sec or '不限'} 次/秒，WebDriver命令 {commands_per_sec or '不限'} 个/秒")
+
+    def reserve_click(self, key=None, weight=1.0):
+        """为一次点击预约令牌，返回需要推迟的秒数；调用方应按返回值重新排队，而不是占用线程等待"""
+        bucket = self.click_bucket
+        if bucket is None:
+            return 0.0
+        # 份额内的时间槽和全局令牌都是预约的，返回后调用方按时执行即可，无需再次预约
+        delay = max(self._pace(bucket.rate, key, weight), bucket.reserve(1.0))
+        if delay > 0:
+            self.queued_clicks += 1
+        return delay
+
+    def _pace(self, rate, key, weight):
+        """按权重份额为该任务预约下一个时间槽，返回距离该时间槽的秒数"""
+        now = time.monotonic()
+        weight = max(float(weight), 0.01)
+        with self._lock:
+            client = self._clients.setdefault(key, [weight, now, now])
+            client[0], client[1] = weight, now
+            for other in [k for k, c in self._clients.items() if now - c[1] > self.ACTIVE_WINDOW]:
+                del self._clients[other]
+            total = sum(c[0] for c in self._clients.values())
+            spacing = total / (weight * rate)
+            slot = max(client[2], now)
+            client[2] = slot + spacing
+            return slot - now
+
+    def acquire_command(self):
+        """WebDriver命令是同步调用，只能在发送前等待令牌；点击任务停止时立即中断等待"""
+        bucket = self.command_bucket
+        if bucket is None:
+            return
+        delay = bucket.reserve()
+        if delay > 0:
+            self.queued_commands += 1
+            current_token().sleep(delay)
+
+    def wrap_driver(self, driver):
+        """让driver的所有WebDriver命令经过限流，限流设置可随时修改"""
+        execute = driver.execute
+
+        def limited_execute(driver_command, params=None):
+            self.acquire_command()
+            return execute(driver_command, params)
+
+        driver.execute = limited_execute
+        return driver
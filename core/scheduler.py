@@ -0,0 +1,178 @@
+import heapq
+import itertools
+import threading
+import time
+from logger import logger
+
+
+class TimerHandle:
+    """已安排任务的句柄，可随时取消"""
+
+    __slots__ = ("deadline", "func", "args", "cancelled")
+
+    def __init__(self, deadline, func, args):
+        self.deadline = deadline
+        self.func = func
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class PeriodicHandle:
+    """周期任务的句柄
+
+    mode="fixed_rate": 按计划时间递推下一次（deadline += interval），执行耗时不会累积成漂移；
+    mode="fixed_delay": 上一次执行结束后再等待interval。
+    interval可以是数字或返回数字的函数（每次调度时重新取值）。
+    func返回False时周期任务自动结束。
+    """
+
+    def __init__(self, scheduler, func, interval, mode):
+        if mode not in ("fixed_rate", "fixed_delay"):
+            raise ValueError(f"未知的调度模式: {mode}")
+        self.scheduler = scheduler
+        self.func = func
+        self.interval = interval
+        self.mode = mode
+        self.cancelled = False
+        self.run_count = 0
+        self.skipped = 0  # fixed_rate模式下因执行过慢而跳过的周期数
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def _next_interval(self):
+        return self.interval() if callable(self.interval) else self.interval
+
+    def _arm(self, deadline):
+        with self._lock:
+            if not self.cancelled:
+                self._timer = self.scheduler.call_at(deadline, self._run, deadline)
+
+    def _run(self, deadline):
+        if self.cancelled:
+            return
+        self.run_count += 1
+        try:
+            keep_running = self.func()
+        except Exception as e:
+            logger.error(f"周期任务执行出错: {str(e)}")
+            keep_running = True
+        if keep_running is False or self.cancelled:
+            return
+
+        interval = self._next_interval()
+        now = time.monotonic()
+        if self.mode == "fixed_rate":
+            next_deadline = deadline + interval
+            if next_deadline < now and interval > 0:
+                # 执行时间超过了周期，跳过已错过的周期，保持原有的相位
+                missed = int((now - next_deadline) // interval) + 1
+                self.skipped += missed
+                next_deadline += missed * interval
+        else:
+            next_deadline = now + interval
+        self._arm(next_deadline)
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            if self._timer:
+                self._timer.cancel()
+
+
+class ClickScheduler:
+    """单线程调度器：用堆按截止时间(time.monotonic)排序所有待执行任务
+
+    替代每次点击都创建一个threading.Timer线程的做法，所有任务共用一个常驻线程。
+    任务默认在调度线程中执行；提供executor时提交给executor执行，避免耗时任务阻塞其他任务。
+    """
+
+    def __init__(self, name="ClickScheduler", executor=None):
+        self.name = name
+        self.executor = executor
+        self._heap = []
+        self._seq = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        with self._condition:
+            if not self._running:
+                self._start_locked()
+
+    def stop(self):
+        """停止调度线程，未执行的任务全部丢弃"""
+        with self._condition:
+            self._running = False
+            self._heap.clear()
+            self._condition.notify_all()
+
+    def is_running(self):
+        return self._running
+
+    def call_at(self, deadline, func, *args):
+        """在time.monotonic()到达deadline时执行func(*args)"""
+        handle = TimerHandle(deadline, func, args)
+        with self._condition:
+            if not self._running:
+                self._start_locked()
+            heapq.heappush(self._heap, (deadline, next(self._seq), handle))
+            self._condition.notify()
+        return handle
+
+    def call_later(self, delay, func, *args):
+        """delay秒后执行func(*args)"""
+        return self.call_at(time.monotonic() + max(0, delay), func, *args)
+
+    def call_periodic(self, func, interval, mode="fixed_rate", first_delay=0):
+        """周期执行func，返回可取消的PeriodicHandle"""
+        handle = PeriodicHandle(self, func, interval, mode)
+        handle._arm(time.monotonic() + max(0, first_delay))
+        return handle
+
+    def pending_count(self):
+        with self._condition:
+            return sum(1 for _, _, handle in self._heap if not handle.cancelled)
+
+    def _start_locked(self):
+        """在已持有锁的情况下启动调度线程"""
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        current = threading.current_thread()
+        while True:
+            with self._condition:
+                # stop()之后又重新启动时，旧线程直接退出
+                while self._running and self._thread is current:
+                    # 丢弃已取消的任务
+                    while self._heap and self._heap[0][2].cancelled:
+                        heapq.heappop(self._heap)
+                    if not self._heap:
+                        self._condition.wait()
+                        continue
+                    remaining = self._heap[0][0] - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if not self._running or self._thread is not current:
+                    return
+                _, _, handle = heapq.heappop(self._heap)
+
+            if handle.cancelled:
+                continue
+            if self.executor is not None:
+                self.executor.submit(self._execute, handle)
+            else:
+                self._execute(handle)
+
+    @staticmethod
+    def _execute(handle):
+        try:
+            handle.func(*handle.args)
+        except Exception as e:
+            logger.error(f"调度任务执行出错: {str(e)}")
@@ -0,0 +1,136 @@
+import threading
+from logger import logger
+from core.url_matcher import UrlTrie, compile_url_pattern
+
+
+class TabIndex:
+    """内存中的标签页索引，由CDP的Target事件实时维护
+
+    按targetId、URL、标题分别建立索引，查询时无需与驱动交互。
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._tabs = {}  # targetId -> 标签页信息
+        self._by_url = {}  # url -> {targetId}
+        self._by_title = {}  # title -> {targetId}
+        self._url_trie = UrlTrie()  # 规范化URL前缀树
+        self._navigations = {}  # targetId -> URL变化次数，用于判断固定到该标签页的任务是否需要重新校验
+        self.live = False  # 是否正在接收Target事件
+
+    def __len__(self):
+        with self._lock:
+            return len(self._tabs)
+
+    def reset(self, targets):
+        """用完整的target列表重建索引"""
+        with self._lock:
+            self._tabs = {}
+            self._by_url = {}
+            self._by_title = {}
+            self._url_trie = UrlTrie()
+            for target in targets:
+                self._upsert(target)
+
+    def upsert(self, target_info):
+        """新增或更新一个标签页，非page类型的target会被忽略"""
+        with self._lock:
+            self._upsert(target_info)
+
+    def remove(self, target_id):
+        with self._lock:
+            tab = self._tabs.pop(target_id.upper(), None)
+            self._navigations.pop(target_id.upper(), None)
+            if tab:
+                self._unlink(tab)
+
+    def get(self, target_id):
+        with self._lock:
+            tab = self._tabs.get(target_id.upper()) if target_id else None
+            return dict(tab) if tab else None
+
+    def navigation_count(self, target_id):
+        """标签页发生导航（URL变化）的次数，标签页不存在时返回None"""
+        with self._lock:
+            if not target_id or target_id.upper() not in self._tabs:
+                return None
+            return self._navigations.get(target_id.upper(), 0)
+
+    def contains(self, target_id):
+        with self._lock:
+            return bool(target_id) and target_id.upper() in self._tabs
+
+    def all(self):
+        with self._lock:
+            return [dict(tab) for tab in self._tabs.values()]
+
+    def find_by_url(self, url):
+        """按完整URL精确查找"""
+        with self._lock:
+            return [dict(self._tabs[tid]) for tid in self._by_url.get(url, ())]
+
+    def find_by_title(self, title):
+        """按标题精确查找"""
+        with self._lock:
+            return [dict(self._tabs[tid]) for tid in self._by_title.get(title, ())]
+
+    def find_by_url_pattern(self, url_pattern):
+        """查找URL匹配模式的标签页，结果按URL排序以保证选择结果稳定
+
+        url_pattern 可以是字符串或已编译的UrlPattern：
+        精确/前缀/通配符模式先在前缀树中缩小候选范围，子串和正则模式逐个检查所有标签页
+        """
+        pattern = compile_url_pattern(url_pattern)
+        with self._lock:
+            if pattern.kind == 'exact':
+                candidates = self._url_trie.exact(pattern.body)
+            elif pattern.literal_prefix:
+                candidates = self._url_trie.with_prefix(pattern.literal_prefix)
+            else:
+                candidates = self._tabs.keys()
+            tabs = [self._tabs[tid] for tid in candidates if pattern.matches(self._tabs[tid]['url'])]
+            return [dict(tab) for tab in sorted(tabs, key=lambda tab: (tab['url'], tab['id']))]
+
+    def _upsert(self, target_info):
+        if target_info.get('type', 'page') != 'page':
+            return
+        target_id = target_info.get('targetId') or target_info.get('id')
+        if not target_id:
+            return
+        target_id = target_id.upper()
+        old = self._tabs.get(target_id)
+        if old:
+            self._unlink(old)
+            if old['url'] != target_info.get('url', ''):
+                self._navigations[target_id] = self._navigations.get(target_id, 0) + 1
+        tab = {
+            'id': target_id,
+            'url': target_info.get('url', ''),
+            'title': target_info.get('title', ''),
+        }
+        self._tabs[target_id] = tab
+        self._by_url.setdefault(tab['url'], set()).add(target_id)
+        self._by_title.setdefault(tab['title'], set()).add(target_id)
+        self._url_trie.insert(tab['url'], target_id)
+
+    def _unlink(self, tab):
+        self._url_trie.remove(tab['url'], tab['id'])
+        for mapping, key in ((self._by_url, tab['url']), (self._by_title, tab['title'])):
+            ids = mapping.get(key)
+            if ids:
+                ids.discard(tab['id'])
+                if not ids:
+                    del mapping[key]
+
+    # CDP事件回调
+    def on_target_created(self, params, session_id=None):
+        self.upsert(params.get('targetInfo', {}))
+
+    def on_target_info_changed(self, params, session_id=None):
+        self.upsert(params.get('targetInfo', {}))
+
+    def on_target_destroyed(self, params, session_id=None):
+        target_id = params.get('targetId')
+        if target_id:
+            self.remove(target_id)
+            logger.info(f"标签页已关闭: {target_id}")
@@ -0,0 +1,124 @@
+import random
+import threading
+from logger import logger
+
+
+class AliasTable:
+    """Walker/Vose别名表：构建O(n)，每次按权重抽样O(1)"""
+
+    def __init__(self, weights):
+        count = len(weights)
+        if count == 0:
+            raise ValueError("权重列表不能为空")
+        total = float(sum(weights))
+        if total <= 0:
+            # 权重全为0时退化为均匀抽样
+            weights, total = [1.0] * count, float(count)
+
+        scaled = [w * count / total for w in weights]
+        self.prob = [1.0] * count
+        self.alias = list(range(count))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        # 剩余的项因浮点误差概率略小于或大于1，均视为1
+
+    def sample(self, rng=random):
+        column = rng.randrange(len(self.prob))
+        return column if rng.random() < self.prob[column] else self.alias[column]
+
+
+class WeightedTargetSelector:
+    """多个定位表达式之间的加权随机选择
+
+    有效权重 = 静态权重 × 成功率 × 耗时系数：
+        成功率和点击耗时都用指数移动平均跟踪，元素不在页面上、点击失败或耗时很长的表达式会自动降低权重；
+        权重有下限min_share，失效的表达式仍会偶尔被选中，恢复后权重随之回升。
+    结果变化时只标记别名表需要重建，下次选择时重建一次，选择本身为O(1)。
+    """
+
+    def __init__(self, targets, weights=None, alpha=0.3, min_share=0.05):
+        self.targets = list(targets)
+        if weights is None:
+            weights = [1.0] * len(self.targets)
+        if len(weights) != len(self.targets):
+            raise ValueError("权重数量与定位表达式数量不一致")
+        self.static_weights = [max(float(w), 0.0) for w in weights]
+        self.alpha = alpha
+        self.min_share = min_share
+        self.success_rate = [1.0] * len(self.targets)  # 成功率的指数移动平均，初始按全部成功处理
+        self.latency = [None] * len(self.targets)  # 点击耗时（秒）的指数移动平均
+        self.picks = [0] * len(self.targets)
+        self._lock = threading.Lock()
+        self._table = None
+        self._subset = None  # (候选序号元组, 别名表)，候选集合不变时复用
+
+    def __len__(self):
+        return len(self.targets)
+
+    def choose(self, candidates=None):
+        """按有效权重选择一个定位表达式，返回 (序号, 定位表达式)
+
+        candidates为可选的序号列表（例如当前页面上可点击的表达式），只在其中选择；为空列表时返回 (None, None)。
+        """
+        with self._lock:
+            if candidates is None or len(candidates) == len(self.targets):
+                if self._table is None:
+                    self._table = AliasTable(self.effective_weights())
+                index = self._table.sample()
+            elif not candidates:
+                return None, None
+            else:
+                key = tuple(candidates)
+                if self._subset is None or self._subset[0] != key:
+                    weights = self.effective_weights()
+                    self._subset = (key, AliasTable([weights[i] for i in key]))
+                index = key[self._subset[1].sample()]
+            self.picks[index] += 1
+        return index, self.targets[index]
+
+    def record(self, index, success, latency=None):
+        """记录一次点击的结果和耗时，更新该定位表达式的权重"""
+        if index is None or not 0 <= index < len(self.targets):
+            return
+        with self._lock:
+            self.success_rate[index] += self.alpha * ((1.0 if success else 0.0) - self.success_rate[index])
+            if latency is not None:
+                previous = self.latency[index]
+                self.latency[index] = latency if previous is None else previous + self.alpha * (latency - previous)
+            self._table = None
+            self._subset = None
+        if not success:
+            logger.info(f"定位表达式权重下调: {self.targets[index]}，成功率 {self.success_rate[index]:.2f}")
+
+    def effective_weights(self):
+        """静态权重与观测到的成功率、耗时合成后的权重"""
+        known = [value for value in self.latency if value]
+        # 以所有表达式的平均耗时为基准，耗时越长系数越小
+        baseline = sum(known) / len(known) if known else None
+        weights = []
+        for static, rate, latency in zip(self.static_weights, self.success_rate, self.latency):
+            factor = baseline / latency if baseline and latency else 1.0
+            weights.append(static * max(rate * min(factor, 2.0), self.min_share))
+        return weights
+
+    def get_stats(self):
+        with self._lock:
+            weights = self.effective_weights()
+            return [
+                {
+                    'target': target,
+                    'static_weight': static,
+                    'weight': weight,
+                    'success_rate': rate,
+                    'latency_ms': latency * 1000 if latency is not None else None,
+                    'picks': picks,
+                }
+                for target, static, weight, rate, latency, picks in zip(
+                    self.targets, self.static_weights, weights, self.success_rate, self.latency, self.picks)
+            ]
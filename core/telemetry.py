@@ -0,0 +1,111 @@
+import math
+import threading
+import time
+from collections import deque, Counter
+
+
+def percentile(sorted_values, fraction):
+    """最近秩法计算百分位数，sorted_values须已排序"""
+    if not sorted_values:
+        return None
+    rank = math.ceil(fraction * len(sorted_values))
+    return sorted_values[min(len(sorted_values), max(1, rank)) - 1]
+
+
+def _distribution(values):
+    values = sorted(values)
+    if not values:
+        return {'mean': None, 'p50': None, 'p95': None, 'p99': None, 'max': None}
+    return {
+        'mean': sum(values) / len(values),
+        'p50': percentile(values, 0.50),
+        'p95': percentile(values, 0.95),
+        'p99': percentile(values, 0.99),
+        'max': values[-1],
+    }
+
+
+class ClickTelemetry:
+    """记录每次计划点击的时间数据，用于区分慢在调度器、驱动还是页面
+
+    每条记录包含（均为time.monotonic时刻）：
+        intended  计划执行的时刻
+        dispatched  实际开始执行的时刻（lateness = dispatched - intended，反映调度器的延迟）
+        completed  点击完成的时刻（click = completed - dispatched，反映驱动和页面的耗时）
+        outcome  结果："success"、"failure" 或 "error"
+    聚合统计基于最近window条记录。
+    """
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=window)
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._outcomes = Counter()
+            self._first = None  # 本次运行的第一条记录
+            self._last = None
+
+    def record(self, intended, dispatched, completed, outcome):
+        sample = (intended, dispatched, completed, outcome)
+        with self._lock:
+            self._samples.append(sample)
+            self._outcomes[outcome] += 1
+            if self._first is None:
+                self._first = sample
+            self._last = sample
+
+    def summary(self, configured_interval=None):
+        """返回聚合统计（时间单位为毫秒，频率单位为次/秒）
+
+        lateness: 调度延迟分布；click: 点击耗时分布；
+        drift_ms: 本次运行最后一次与第一次的调度延迟之差（正数表示越来越落后于计划）；
+        achieved_rate / configured_rate: 实际与配置的点击频率
+        """
+        with self._lock:
+            samples = list(self._samples)
+            outcomes = dict(self._outcomes)
+            first, last = self._first, self._last
+
+        lateness = [(dispatched - intended) * 1000 for intended, dispatched, _, _ in samples]
+        click = [(completed - dispatched) * 1000 for _, dispatched, completed, _ in samples]
+        total = sum(outcomes.values())
+
+        achieved_rate = None
+        if len(samples) > 1:
+            span = samples[-1][1] - samples[0][1]
+            if span > 0:
+                achieved_rate = (len(samples) - 1) / span
+
+        drift_ms = None
+        if first is not None and last is not first:
+            drift_ms = ((last[1] - last[0]) - (first[1] - first[0])) * 1000
+
+        return {
+            'samples': total,
+            'window': len(samples),
+            'outcomes': outcomes,
+            'success_rate': outcomes.get("success", 0) / total if total else None,
+            'lateness_ms': _distribution(lateness),
+            'click_ms': _distribution(click),
+            'drift_ms': drift_ms,
+            'achieved_rate': achieved_rate,
+            'configured_rate': 1 / configured_interval if configured_interval else None,
+        }
+
+    def recent(self, count=50):
+        """最近count条原始记录，时间为相对本次运行第一条记录计划时刻的秒数"""
+        with self._lock:
+            samples = list(self._samples)[-count:]
+            origin = self._first[0] if self._first else time.monotonic()
+        return [
+            {
+                'intended': intended - origin,
+                'lateness_ms': (dispatched - intended) * 1000,
+                'click_ms': (completed - dispatched) * 1000,
+                'outcome': outcome,
+            }
+            for intended, dispatched, completed, outcome in samples
+        ]
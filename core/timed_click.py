@@ -0,0 +1,188 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from logger import logger
+from core.cancellation import CancelToken, cancel_scope
+
+
+def parse_fire_time(value, now=None):
+    """把触发时间转换为时间戳（与time.time()相同的时间基准）
+
+    支持 "HH:MM:SS"、"HH:MM:SS.mmm"（今天的该时刻，已过则为明天）、
+    "YYYY-MM-DD HH:MM:SS[.mmm]"、datetime对象和时间戳数字
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+
+    text = str(value).strip()
+    for fmt in ("%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S"):
+        try:
+            return datetime.strptime(text, fmt).timestamp()
+        except ValueError:
+            pass
+
+    now = now or datetime.now()
+    for fmt in ("%H:%M:%S.%f", "%H:%M:%S", "%H:%M"):
+        try:
+            moment = datetime.strptime(text, fmt).time()
+        except ValueError:
+            continue
+        target = datetime.combine(now.date(), moment)
+        if target <= now:
+            target += timedelta(days=1)
+        return target.timestamp()
+    raise ValueError(f"无法识别的触发时间: {value}")
+
+
+def wait_until(deadline, spin_window=0.015, cancelled=None):
+    """等待到单调时钟(time.perf_counter)的deadline，返回实际的结束时刻
+
+    先用sleep粗略等待，最后spin_window秒忙等：系统sleep的唤醒误差可达数毫秒（Windows上约15ms），
+    忙等只占用最后很短的一段CPU时间。cancelled为threading.Event时，粗略等待期间可被取消（返回None）。
+    """
+    while True:
+        remaining = deadline - time.perf_counter()
+        if remaining <= spin_window:
+            break
+        if cancelled is not None:
+            if cancelled.wait(remaining - spin_window):
+                return None
+        else:
+            time.sleep(remaining - spin_window)
+    while True:
+        now = time.perf_counter()
+        if now >= deadline:
+            return now
+
+
+class TimedClick:
+    """在指定时刻执行一次点击
+
+    在独立线程中等待：触发前prepare_lead秒执行准备流水线（ClickArming），
+    触发前warm_lead秒再预热一次连接，触发时刻只执行最终的点击，
+    report中记录实际的触发偏差，arming中记录各准备阶段的耗时。
+    从准备开始到点击完成一直持有驱动锁，与调度线程中的点击任务互斥；
+    其他任务的点击拖延到触发时刻之后才释放锁时，report中标记为late。
+    """
+
+    def __init__(self, job, fire_at, prepare_lead=2.0, spin_window=0.015, warm_lead=0.2, on_done=None):
+        self.job = job
+        self.fire_at = parse_fire_time(fire_at)
+        self.prepare_lead = prepare_lead
+        self.spin_window = spin_window
+        self.warm_lead = warm_lead
+        self.on_done = on_done  # 完成后以report为参数调用（在等待线程中）
+        self.report = None
+        self._cancelled = threading.Event()
+        self._token = CancelToken(self._cancelled)  # 取消时同时中断准备阶段中的页面内等待
+        self._thread = None
+
+    def arm(self):
+        """开始等待触发时刻"""
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self._cancelled.clear()
+        self._thread = threading.Thread(target=self._run, name=f"TimedClick-{self.job.job_id}", daemon=True)
+        self._thread.start()
+        fire_text = datetime.fromtimestamp(self.fire_at).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        logger.info(f"[{self.job.name}] 已预约在 {fire_text} 点击")
+        return self
+
+    def cancel(self):
+        self._token.cancel()
+
+    def is_armed(self):
+        return self._thread is not None and self._thread.is_alive() and not self._cancelled.is_set()
+
+    def _wall_deadline(self, wall_time):
+        """把墙上时间换算为单调时钟的时刻，每次调用都重新换算，系统时间被校准时也能跟上"""
+        return time.perf_counter() + (wall_time - time.time())
+
+    def _run(self):
+        # 粗略等待到准备时刻
+        if self._cancelled.wait(max(0, self.fire_at - self.prepare_lead - time.time())):
+            logger.info(f"[{self.job.name}] 定时点击已取消")
+            return
+
+        # 从准备开始持有驱动锁直到点击完成：调度线程中正在执行的点击先完成，
+        # 之后其他任务不会切换标签页、移动鼠标或占用驱动，触发时也不必等锁
+        lock_requested = time.perf_counter()
+        with self.job.browser_connector.driver_lock:
+            lock_wait_ms = (time.perf_counter() - lock_requested) * 1000
+            if self._cancelled.is_set():
+                logger.info(f"[{self.job.name}] 定时点击已取消")
+                return
+            late = time.time() > self.fire_at
+            if late:
+                logger.warning(
+                    f"[{self.job.name}] 等待驱动锁 {lock_wait_ms:.0f}ms，已超过触发时刻，定时点击将延迟执行"
+                )
+
+            # 定位元素最多等到触发时刻，不能因为等待元素而错过触发时刻
+            timeout = max(0.5, min(10, self.fire_at - time.time()))
+            # 准备阶段的元素等待在取消定时点击时立即中断
+            with cancel_scope(self._token):
+                armed = self.job.prepare_click(timeout)
+            if self._cancelled.is_set():
+                logger.info(f"[{self.job.name}] 定时点击已取消")
+                return
+            prepare_ms = armed.report['total_ms']
+
+            warm = False
+            if self.fire_at - time.time() > self.warm_lead:
+                if wait_until(self._wall_deadline(self.fire_at - self.warm_lead), 0, self._cancelled) is None:
+                    logger.info(f"[{self.job.name}] 定时点击已取消")
+                    return
+                warm = armed.report['ok']
+
+            # 触发前再预热一次，避免连接在等待期间变冷
+            if warm:
+                try:
+                    armed.warm()
+                except Exception as e:
+                    logger.warning(f"[{self.job.name}] 触发前预热连接失败: {str(e)}")
+
+            deadline = self._wall_deadline(self.fire_at)
+            fired = wait_until(deadline, self.spin_window, self._cancelled)
+            if fired is None:
+                logger.info(f"[{self.job.name}] 定时点击已取消")
+                return
+
+            success = False
+            # 与调度线程中的点击共用运行限制，已达到点击次数等限制时不再触发
+            limit = self.job.limit_reason()
+            if limit:
+                logger.warning(f"[{self.job.name}] 已达到运行限制({limit})，跳过定时点击")
+            else:
+                try:
+                    success = bool(armed.fire())
+                except Exception as e:
+                    logger.error(f"[{self.job.name}] 定时点击失败: {str(e)}")
+            done = time.perf_counter()
+            if not limit:
+                # 通过任务的结果记录入口计数，点击次数、失败次数、熔断和运行限制与调度线程一致；
+                # 遥测数据使用time.monotonic时刻
+                shift = time.monotonic() - time.perf_counter()
+                self.job.record_click_result(success, dispatch=(deadline + shift, fired + shift))
+
+        self.report = {
+            'fire_at': self.fire_at,
+            'success': success,
+            'prepared': armed.report['ok'],
+            'prepare_ms': prepare_ms,
+            'arming': armed.report,  # 各准备阶段的耗时
+            'offset_ms': (fired - deadline) * 1000,  # 开始点击相对触发时刻的偏差
+            'click_ms': (done - fired) * 1000,  # 最终点击本身的耗时
+            'skipped': limit,  # 因达到运行限制而跳过时为限制原因
+            'lock_wait_ms': lock_wait_ms,  # 准备前等待驱动锁的耗时
+            'late': late,  # 拿到驱动锁时已超过触发时刻
+        }
+        logger.info(
+            f"[{self.job.name}] 定时点击{'成功' if success else '失败'}，"
+            f"触发偏差 {self.report['offset_ms']:.3f}ms，点击耗时 {self.report['click_ms']:.1f}ms，"
+            f"准备耗时 {prepare_ms:.0f}ms"
+        )
+        if self.on_done:
+            self.on_done(self.report)
@@ -0,0 +1,160 @@
+import re
+import fnmatch
+from urllib.parse import urlsplit, urlunsplit
+
+# 模式前缀 -> 匹配方式
+PATTERN_KINDS = {
+    "exact:": "exact",
+    "prefix:": "prefix",
+    "glob:": "glob",
+    "re:": "regex",
+    "contains:": "contains",
+}
+
+
+def normalize_url(url):
+    """规范化URL：协议和主机名小写，去掉片段(#...)和末尾的斜杠"""
+    if not url:
+        return ""
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url.strip()
+    if not parts.scheme:
+        return url.strip().rstrip("/")
+    path = parts.path.rstrip("/")
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, parts.query, ""))
+
+
+class UrlPattern:
+    """编译后的标签页URL匹配模式
+
+    支持的写法:
+        exact:https://a.com/x   完整URL精确匹配（规范化后比较）
+        prefix:https://a.com/   URL前缀匹配，以 / 结尾或只有主机名时只在路径分段处匹配（不匹配 https://a.com.evil.net/）
+        glob:*.a.com/item/*     通配符匹配，未加前缀但含 * 时也按通配符处理
+        re:^https://a\\.com/\\d+  正则表达式匹配
+        其他                     子串匹配（与旧版行为一致）
+    """
+
+    def __init__(self, pattern):
+        self.raw = pattern
+        self.kind = "contains"
+        body = pattern.strip()
+        for prefix, kind in PATTERN_KINDS.items():
+            if body.startswith(prefix):
+                self.kind = kind
+                body = body[len(prefix):]
+                break
+        else:
+            if "*" in body:
+                self.kind = "glob"
+        self.body = body
+
+        self._regex = None
+        self._segment_boundary = False
+        if self.kind == "prefix":
+            parts = urlsplit(body)
+            self._segment_boundary = body.endswith("/") or not (parts.path.strip("/") or parts.query)
+        if self.kind == "regex":
+            self._regex = re.compile(body)
+        elif self.kind == "glob":
+            self._regex = re.compile(fnmatch.translate(normalize_url(body)))
+        elif self.kind in ("exact", "prefix"):
+            self.body = normalize_url(body)
+
+    @property
+    def literal_prefix(self):
+        """模式对应的URL固定前缀，可用于在前缀树中缩小候选范围"""
+        if self.kind in ("exact", "prefix"):
+            return self.body
+        if self.kind == "glob":
+            return re.split(r"[*?\[]", normalize_url(self.body), 1)[0]
+        return ""
+
+    def matches(self, url):
+        if not url:
+            return False
+        if self.kind == "contains":
+            return self.body in url
+        normalized = normalize_url(url)
+        if self.kind == "exact":
+            return normalized == self.body
+        if self.kind == "prefix":
+            if not normalized.startswith(self.body):
+                return False
+            # 规范化会去掉末尾的斜杠，前缀之后必须是新的路径分段、查询串或URL结尾
+            return not self._segment_boundary or normalized[len(self.body):len(self.body) + 1] in ("", "/", "?")
+        if self.kind == "glob":
+            return self._regex.match(normalized) is not None
+        return self._regex.search(url) is not None
+
+    def __repr__(self):
+        return f"UrlPattern({self.kind}:{self.body})"
+
+
+def compile_url_pattern(pattern):
+    """将字符串编译为UrlPattern，已编译的直接返回"""
+    if pattern is None or isinstance(pattern, UrlPattern):
+        return pattern
+    return UrlPattern(pattern)
+
+
+class _TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children = {}
+        self.ids = set()
+
+
+class UrlTrie:
+    """按规范化URL建立的前缀树，用于快速找出某个前缀下的所有标签页"""
+
+    def __init__(self):
+        self._root = _TrieNode()
+
+    def insert(self, url, tab_id):
+        node = self._root
+        for ch in normalize_url(url):
+            node = node.children.setdefault(ch, _TrieNode())
+        node.ids.add(tab_id)
+
+    def remove(self, url, tab_id):
+        key = normalize_url(url)
+        path = [self._root]
+        for ch in key:
+            node = path[-1].children.get(ch)
+            if node is None:
+                return
+            path.append(node)
+        path[-1].ids.discard(tab_id)
+        # 清理不再使用的分支
+        for i in range(len(key), 0, -1):
+            node = path[i]
+            if node.ids or node.children:
+                break
+            del path[i - 1].children[key[i - 1]]
+
+    def exact(self, url):
+        node = self._root
+        for ch in normalize_url(url):
+            node = node.children.get(ch)
+            if node is None:
+                return set()
+        return set(node.ids)
+
+    def with_prefix(self, prefix):
+        """返回规范化URL以prefix开头的所有标签页ID"""
+        node = self._root
+        for ch in prefix:
+            node = node.children.get(ch)
+            if node is None:
+                return set()
+        result = set()
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            result.update(node.ids)
+            stack.extend(node.children.values())
+        return result
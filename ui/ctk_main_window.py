@@ -115,8 +115,8 @@ class CTkAutoClickerMainWindow(ctk.CTk):
         """关闭窗口时的处理"""
         logger.info("系统正在关闭...")
 
-        # 停止自动投放
-        self.auto_click_manager.stop_auto_delivery()
+        # 停止所有自动点击任务
+        self.auto_click_manager.stop_all_jobs()
 
         # 关闭浏览器
         self.auto_click_manager.close_browser()
@@ -1,11 +1,16 @@
 import random
 import customtkinter as ctk
+from tkinter import messagebox
 from logger import logger
 
 class CTkMultiButtonRandomClickPanel(ctk.CTkFrame):
     def __init__(self, master, auto_click_manager, on_back_callback):
         super().__init__(master=master)
         self.auto_click_manager = auto_click_manager
+        # 使用独立的点击任务，不与其他面板共享目标和统计数据
+        self.job = auto_click_manager.get_or_create_job("multi_button", "多按钮随机点击")
+        # 任务结束（手动停止或达到运行限制）时显示统计
+        self.job.on_finished = self._on_job_finished
         self.on_back_callback = on_back_callback
         self.pack(fill="both", expand=True)
         
@@ -13,6 +18,8 @@ class CTkMultiButtonRandomClickPanel(ctk.CTkFrame):
         self.browser_tabs = []
         # 存储多个XPath
         self.xpath_entries = []
+        # XPath输入框 -> 对应的权重输入框
+        self.xpath_weight_entries = {}
         
         # 初始化UI组件
         self._init_ui()
@@ -117,7 +124,7 @@ class CTkMultiButtonRandomClickPanel(ctk.CTkFrame):
         self.url_entry.pack(side="left", fill="x", expand=True, padx=10)
         
         # 目标XPath输入区域
-        xpath_label = ctk.CTkLabel(self.target_frame, text="目标XPath (点击'+添加'按钮添加更多):")
+        xpath_label = ctk.CTkLabel(self.target_frame, text="目标XPath及权重 (点击'+添加'按钮添加更多，权重越大越常被选中):")
         xpath_label.pack(anchor="w", padx=10, pady=5)
         
         # 初始XPath输入框
@@ -179,6 +186,13 @@ class CTkMultiButtonRandomClickPanel(ctk.CTkFrame):
         )
         self.enable_random_interval.pack(anchor="w", padx=10, pady=5)
         
+        # 自适应间隔：按页面响应在最低/最高间隔之间自动调整
+        self.enable_adaptive_interval = ctk.CTkCheckBox(
+            random_interval_frame,
+            text="自适应间隔（按页面响应在最低/最高间隔之间自动调整）"
+        )
+        self.enable_adaptive_interval.pack(anchor="w", padx=10, pady=5)
+        
         # 最低和最高间隔输入框
         min_max_frame = ctk.CTkFrame(random_interval_frame, fg_color="transparent")
         min_max_frame.pack(fill="x", padx=10, pady=5)
@@ -197,6 +211,22 @@ class CTkMultiButtonRandomClickPanel(ctk.CTkFrame):
         self.max_interval_entry.pack(side="left", padx=10)
         self.max_interval_entry.insert(0, "10")
         
+        # 运行限制：点击次数上限和运行时长，留空表示不限制
+        limits_frame = ctk.CTkFrame(self.action_frame, fg_color="transparent")
+        limits_frame.pack(fill="x", padx=20, pady=5)
+
+        max_clicks_label = ctk.CTkLabel(limits_frame, text="点击次数上限:")
+        max_clicks_label.pack(side="left")
+
+        self.max_clicks_entry = ctk.CTkEntry(limits_frame, width=80, placeholder_text="不限")
+        self.max_clicks_entry.pack(side="left", padx=10)
+
+        max_minutes_label = ctk.CTkLabel(limits_frame, text="运行时长(分钟):")
+        max_minutes_label.pack(side="left", padx=(20, 0))
+
+        self.max_minutes_entry = ctk.CTkEntry(limits_frame, width=80, placeholder_text="不限")
+        self.max_minutes_entry.pack(side="left", padx=10)
+        
         # 按钮容器
         buttons_frame = ctk.CTkFrame(self.action_frame, fg_color="transparent")
         buttons_frame.pack(fill="x", padx=10, pady=10)
@@ -225,7 +255,7 @@ class CTkMultiButtonRandomClickPanel(ctk.CTkFrame):
         self.refresh_tabs()
         
         # 默认时间间隔设置为2秒
-        self.auto_click_manager.delivery_interval = 2
+        self.job.delivery_interval = 2
 
     def on_back(self):
         """返回上一级菜单"""
@@ -237,7 +267,7 @@ class CTkMultiButtonRandomClickPanel(ctk.CTkFrame):
         interval = int(float(value))
         self.interval_value_label.configure(text=f"{interval}秒")
         if self.auto_click_manager:
-            self.auto_click_manager.delivery_interval = interval
+            self.job.delivery_interval = interval
     
     def toggle_random_interval(self):
         """切换随机间隔设置"""
@@ -267,7 +297,7 @@ class CTkMultiButtonRandomClickPanel(ctk.CTkFrame):
             return random_interval
         except ValueError:
             # 如果输入无效，返回默认值
-            return self.auto_click_manager.delivery_interval if self.auto_click_manager else 2
+            return self.job.delivery_interval
     
     def refresh_tabs(self):
         """刷新标签页列表"""
@@ -330,7 +360,7 @@ class CTkMultiButtonRandomClickPanel(ctk.CTkFrame):
                     self.url_entry.delete(0, 'end')
                     self.url_entry.insert(0, current_url)
                     # 设置目标标签页URL
-                    self.auto_click_manager.set_target_tab_url(current_url)
+                    self.job.set_target_tab_url(current_url)
             except Exception as e:
                 logger.error(f"切换标签页失败: {str(e)}")
     
@@ -342,6 +372,11 @@ class CTkMultiButtonRandomClickPanel(ctk.CTkFrame):
         xpath_entry = ctk.CTkEntry(entry_frame, placeholder_text="输入XPath，例如: //button[@id='submit']")
         xpath_entry.pack(side="left", fill="x", expand=True, padx=(0, 5))
         
+        # 权重输入框，留空按1处理
+        weight_entry = ctk.CTkEntry(entry_frame, width=50, placeholder_text="权重")
+        weight_entry.pack(side="left", padx=(0, 5))
+        self.xpath_weight_entries[xpath_entry] = weight_entry
+        
         # 删除按钮
         remove_button = ctk.CTkButton(
             entry_frame,
@@ -358,6 +393,7 @@ class CTkMultiButtonRandomClickPanel(ctk.CTkFrame):
         if len(self.xpath_entries) > 1:  # 确保至少保留一个输入框
             frame.destroy()
             self.xpath_entries.remove(entry)
+            self.xpath_weight_entries.pop(entry, None)
         else:
             # 显示提示消息
             from CTkMessagebox import CTkMessagebox
@@ -367,13 +403,28 @@ class CTkMultiButtonRandomClickPanel(ctk.CTkFrame):
                 icon="warning"
             )
     
+    def get_xpath_targets(self):
+        """返回填写了的XPath及其权重，权重留空或无效时按1处理"""
+        xpaths, weights = [], []
+        for entry in self.xpath_entries:
+            if not entry.get():
+                continue
+            try:
+                weight = float(self.xpath_weight_entries[entry].get() or 1)
+            except ValueError:
+                logger.warning(f"XPath权重无效，按1处理: {self.xpath_weight_entries[entry].get()}")
+                weight = 1.0
+            xpaths.append(entry.get())
+            weights.append(max(weight, 0.0))
+        return xpaths, weights
+
     def toggle_auto_click(self):
         """切换自动点击状态"""
         # 获取目标URL
         target_url = self.url_entry.get()
         
-        # 获取所有XPath
-        xpaths = [entry.get() for entry in self.xpath_entries if entry.get()]
+        # 获取所有XPath及权重
+        xpaths, weights = self.get_xpath_targets()
         
         if not xpaths:
             from CTkMessagebox import CTkMessagebox
@@ -385,20 +436,22 @@ class CTkMultiButtonRandomClickPanel(ctk.CTkFrame):
             return
         
         # 设置目标
-        self.auto_click_manager.set_target_url(target_url)
-        self.auto_click_manager.set_target_xpaths(xpaths)  # 注意这里使用新方法
+        self.job.set_target_url(target_url)
+        self.job.set_target_xpaths(xpaths, weights)  # 注意这里使用新方法
         
         # 设置随机间隔参数
         if self.enable_random_interval.get() == 1:
             min_interval = self.min_interval_entry.get()
             max_interval = self.max_interval_entry.get()
-            self.auto_click_manager.set_random_interval_range(min_interval, max_interval)
-            self.auto_click_manager.enable_random_interval = True
+            self.job.set_random_interval_range(min_interval, max_interval)
+            self.job.enable_random_interval = True
         else:
-            self.auto_click_manager.enable_random_interval = False
+            self.job.enable_random_interval = False
+        self.apply_adaptive_interval()
+        self.apply_run_limits()
         
         # 切换自动点击状态
-        is_enabled = self.auto_click_manager.toggle_auto_delivery()
+        is_enabled = self.job.toggle_auto_delivery()
         
         if is_enabled:
             self.start_button.configure(
@@ -414,13 +467,11 @@ class CTkMultiButtonRandomClickPanel(ctk.CTkFrame):
                 hover_color="#059669"
             )
             logger.info("停止多按钮随机点击")
-            # 添加这一行调用统计方法
-            self.show_statistics()
 
     def test_random_click(self):
         """测试随机点击"""
-        # 获取所有XPath
-        xpaths = [entry.get() for entry in self.xpath_entries if entry.get()]
+        # 获取所有XPath及权重
+        xpaths, weights = self.get_xpath_targets()
         
         if not xpaths:
             from CTkMessagebox import CTkMessagebox
@@ -433,12 +484,12 @@ class CTkMultiButtonRandomClickPanel(ctk.CTkFrame):
         
         # 设置目标
         target_url = self.url_entry.get()
-        self.auto_click_manager.set_target_url(target_url)
-        self.auto_click_manager.set_target_xpaths(xpaths)
+        self.job.set_target_url(target_url)
+        self.job.set_target_xpaths(xpaths, weights)
         
         # 执行随机点击
         try:
-            result = self.auto_click_manager.perform_random_click()
+            result = self.job.perform_random_click()
             if result:
                 logger.info("测试随机点击成功")
             else:
@@ -446,21 +497,68 @@ class CTkMultiButtonRandomClickPanel(ctk.CTkFrame):
         except Exception as e:
             logger.error(f"测试随机点击时发生错误: {str(e)}")
 
-    # 添加停止方法
+    # 添加停止方法，停止后由_on_job_finished显示统计
     def stop_auto_click(self):
-        if self.auto_click_manager.is_auto_delivery_running:
-            self.auto_click_manager.stop_auto_delivery()
-            self.start_button.configure(state="normal")
-            self.stop_button.configure(state="disabled")
-            self.show_statistics()
+        if self.job.auto_delivery_enabled:
+            self.job.stop_auto_delivery()
+
+    def apply_adaptive_interval(self):
+        """读取自适应间隔设置，使用最低/最高间隔作为调整范围"""
+        if self.enable_adaptive_interval.get() != 1:
+            self.job.set_adaptive_interval(False)
+            return
+        try:
+            min_interval = float(self.min_interval_entry.get())
+            max_interval = float(self.max_interval_entry.get())
+        except ValueError:
+            logger.warning("无效的最低/最高间隔，使用任务当前的间隔范围")
+            min_interval = max_interval = None
+        self.job.set_adaptive_interval(True, min_interval, max_interval)
+
+    def apply_run_limits(self):
+        """读取点击次数上限和运行时长，留空或无效时不限制"""
+        max_clicks = None
+        max_duration = None
+        try:
+            if self.max_clicks_entry.get().strip():
+                max_clicks = int(self.max_clicks_entry.get())
+        except ValueError:
+            logger.warning("无效的点击次数上限，将不限制点击次数")
+        try:
+            if self.max_minutes_entry.get().strip():
+                max_duration = float(self.max_minutes_entry.get()) * 60
+        except ValueError:
+            logger.warning("无效的运行时长，将不限制运行时长")
+        self.job.set_run_limits(max_clicks=max_clicks, max_duration=max_duration)
+
+    def _on_job_finished(self, summary):
+        """任务结束时调用（可能在调度线程中），转到界面线程更新按钮并显示统计"""
+        try:
+            self.after(0, self._show_run_finished, summary)
+        except Exception as e:
+            logger.warning(f"面板已关闭，无法显示点击统计: {str(e)}")
+
+    def _show_run_finished(self, summary):
+        self.start_button.configure(
+            text="▶️ 开始随机点击",
+            fg_color="#10B981",  # 绿色
+            hover_color="#059669"
+        )
+        self.show_statistics(summary)
 
     # 添加显示统计方法
-    def show_statistics(self):
-        elapsed_time, click_count = self.auto_click_manager.get_statistics()
+    def show_statistics(self, summary=None):
+        if summary is None:
+            summary = self.job.get_run_summary()
+        elapsed_time = summary['elapsed_time']
+        click_count = summary['click_count']
         minutes = int(elapsed_time // 60)
         seconds = int(elapsed_time % 60)
         time_str = f"{minutes}:{seconds:02d}"
         messagebox.showinfo(
             "点击统计",
             f"点击时长: {time_str}\n累计点击次数: {click_count}"
+            + (f"\n结束原因: {summary['reason_text']}" if summary.get('reason_text') else "")
+            + (f"\n熔断次数: {summary['breaker']['open_count']}，熔断时长: {int(summary['breaker']['downtime'])}秒"
+               if summary.get('breaker', {}).get('open_count') else "")
         )
\ No newline at end of file
@@ -7,6 +7,10 @@ class CTkSingleButtonAutoClickPanel(ctk.CTkFrame):
     def __init__(self, parent, auto_click_manager, on_back_callback):
         super().__init__(parent)
         self.auto_click_manager = auto_click_manager
+        # 使用独立的点击任务，不与其他面板共享目标和统计数据
+        self.job = auto_click_manager.get_or_create_job("single_button", "单按钮自动点击")
+        # 任务结束（手动停止或达到运行限制）时显示统计
+        self.job.on_finished = self._on_job_finished
         self.on_back_callback = on_back_callback
         self.pack(fill="both", expand=True)
         
@@ -168,6 +172,13 @@ class CTkSingleButtonAutoClickPanel(ctk.CTkFrame):
         )
         self.enable_random_interval.pack(anchor="w", padx=10, pady=5)
         
+        # 自适应间隔：按页面响应在最低/最高间隔之间自动调整
+        self.enable_adaptive_interval = ctk.CTkCheckBox(
+            random_interval_frame,
+            text="自适应间隔（按页面响应在最低/最高间隔之间自动调整）"
+        )
+        self.enable_adaptive_interval.pack(anchor="w", padx=10, pady=5)
+        
         # 最低和最高间隔输入框
         min_max_frame = ctk.CTkFrame(random_interval_frame, fg_color="transparent")
         min_max_frame.pack(fill="x", padx=10, pady=5)
@@ -186,6 +197,22 @@ class CTkSingleButtonAutoClickPanel(ctk.CTkFrame):
         self.max_interval_entry.pack(side="left", padx=10)
         self.max_interval_entry.insert(0, "10")
         
+        # 运行限制：点击次数上限和运行时长，留空表示不限制
+        limits_frame = ctk.CTkFrame(self.action_frame, fg_color="transparent")
+        limits_frame.pack(fill="x", padx=20, pady=5)
+
+        max_clicks_label = ctk.CTkLabel(limits_frame, text="点击次数上限:")
+        max_clicks_label.pack(side="left")
+
+        self.max_clicks_entry = ctk.CTkEntry(limits_frame, width=80, placeholder_text="不限")
+        self.max_clicks_entry.pack(side="left", padx=10)
+
+        max_minutes_label = ctk.CTkLabel(limits_frame, text="运行时长(分钟):")
+        max_minutes_label.pack(side="left", padx=(20, 0))
+
+        self.max_minutes_entry = ctk.CTkEntry(limits_frame, width=80, placeholder_text="不限")
+        self.max_minutes_entry.pack(side="left", padx=10)
+        
         # 按钮容器
         buttons_frame = ctk.CTkFrame(self.action_frame, fg_color="transparent")
         buttons_frame.pack(fill="x", padx=10, pady=10)
@@ -232,7 +259,7 @@ class CTkSingleButtonAutoClickPanel(ctk.CTkFrame):
         interval = int(value)
         self.interval_value_label.configure(text=f"{interval}秒")
         if self.auto_click_manager:
-            self.auto_click_manager.delivery_interval = interval
+            self.job.delivery_interval = interval
     
     def toggle_random_interval(self):
         """切换随机间隔设置"""
@@ -262,7 +289,7 @@ class CTkSingleButtonAutoClickPanel(ctk.CTkFrame):
             return random_interval
         except ValueError:
             # 如果输入无效，返回默认值
-            return self.auto_click_manager.delivery_interval if self.auto_click_manager else 3
+            return self.job.delivery_interval
     
     def refresh_tabs(self):
         """刷新标签页列表"""
@@ -329,7 +356,7 @@ class CTkSingleButtonAutoClickPanel(ctk.CTkFrame):
                             self.url_entry.delete(0, 'end')
                             self.url_entry.insert(0, self.browser_tabs[index]['url'])
                             # 设置目标标签页URL
-                            self.auto_click_manager.set_target_tab_url(self.browser_tabs[index]['url'])
+                            self.job.set_target_tab_url(self.browser_tabs[index]['url'])
                     else:
                         tab_info = f"标签页 {index+1}"
                         
@@ -344,20 +371,22 @@ class CTkSingleButtonAutoClickPanel(ctk.CTkFrame):
         target_xpath = self.xpath_entry.get()
         
         # 设置目标
-        self.auto_click_manager.set_target_url(target_url)
-        self.auto_click_manager.set_target_xpath(target_xpath)
+        self.job.set_target_url(target_url)
+        self.job.set_target_xpath(target_xpath)
         
         # 设置随机间隔参数
         if self.enable_random_interval.get() == 1:
             min_interval = self.min_interval_entry.get()
             max_interval = self.max_interval_entry.get()
-            self.auto_click_manager.set_random_interval_range(min_interval, max_interval)
-            self.auto_click_manager.enable_random_interval = True
+            self.job.set_random_interval_range(min_interval, max_interval)
+            self.job.enable_random_interval = True
         else:
-            self.auto_click_manager.enable_random_interval = False
+            self.job.enable_random_interval = False
+        self.apply_adaptive_interval()
+        self.apply_run_limits()
 
         # 切换自动点击状态
-        is_enabled = self.auto_click_manager.toggle_auto_delivery()
+        is_enabled = self.job.toggle_auto_delivery()
         
         if is_enabled:
             self.start_button.configure(
@@ -381,12 +410,12 @@ class CTkSingleButtonAutoClickPanel(ctk.CTkFrame):
         target_xpath = self.xpath_entry.get()
         
         # 设置目标
-        self.auto_click_manager.set_target_url(target_url)
-        self.auto_click_manager.set_target_xpath(target_xpath)
+        self.job.set_target_url(target_url)
+        self.job.set_target_xpath(target_xpath)
         
         # 执行单次点击
         try:
-            result = self.auto_click_manager.perform_click()
+            result = self.job.perform_click()
             if result:
                 logger.info("测试点击成功")
             else:
@@ -400,23 +429,25 @@ class CTkSingleButtonAutoClickPanel(ctk.CTkFrame):
         target_xpath = self.xpath_entry.get()
 
         # 设置目标
-        self.auto_click_manager.set_target_url(target_url)
-        self.auto_click_manager.set_target_xpath(target_xpath)
+        self.job.set_target_url(target_url)
+        self.job.set_target_xpath(target_xpath)
         
         # 设置随机间隔参数
         if self.enable_random_interval.get() == 1:
             min_interval = self.min_interval_entry.get()
             max_interval = self.max_interval_entry.get()
-            self.auto_click_manager.set_random_interval_range(min_interval, max_interval)
-            self.auto_click_manager.enable_random_interval = True
+            self.job.set_random_interval_range(min_interval, max_interval)
+            self.job.enable_random_interval = True
         else:
-            self.auto_click_manager.enable_random_interval = False
+            self.job.enable_random_interval = False
+        self.apply_adaptive_interval()
+        self.apply_run_limits()
 
         # 启动自动点击
-        self.auto_click_manager.toggle_auto_delivery()
+        self.job.toggle_auto_delivery()
 
         # 更新UI状态
-        if self.auto_click_manager.auto_delivery_enabled:
+        if self.job.auto_delivery_enabled:
             self.start_button.configure(state="disabled")
             self.stop_button.configure(state="normal")
             logger.info("已启动单按钮自动点击")
@@ -424,17 +455,60 @@ class CTkSingleButtonAutoClickPanel(ctk.CTkFrame):
     # 修复停止方法中的属性错误
     def stop_auto_click(self):
         # 修改前：if self.auto_click_manager.is_auto_delivery_running:
-        if self.auto_click_manager.auto_delivery_enabled:
-            self.auto_click_manager.stop_auto_delivery()
+        if self.job.auto_delivery_enabled:
+            self.job.stop_auto_delivery()
             self.start_button.configure(state="normal")
             self.stop_button.configure(state="disabled")
-            self.show_statistics()
             logger.info("已停止单按钮自动点击")
 
+    def apply_adaptive_interval(self):
+        """读取自适应间隔设置，使用最低/最高间隔作为调整范围"""
+        if self.enable_adaptive_interval.get() != 1:
+            self.job.set_adaptive_interval(False)
+            return
+        try:
+            min_interval = float(self.min_interval_entry.get())
+            max_interval = float(self.max_interval_entry.get())
+        except ValueError:
+            logger.warning("无效的最低/最高间隔，使用任务当前的间隔范围")
+            min_interval = max_interval = None
+        self.job.set_adaptive_interval(True, min_interval, max_interval)
+
+    def apply_run_limits(self):
+        """读取点击次数上限和运行时长，留空或无效时不限制"""
+        max_clicks = None
+        max_duration = None
+        try:
+            if self.max_clicks_entry.get().strip():
+                max_clicks = int(self.max_clicks_entry.get())
+        except ValueError:
+            logger.warning("无效的点击次数上限，将不限制点击次数")
+        try:
+            if self.max_minutes_entry.get().strip():
+                max_duration = float(self.max_minutes_entry.get()) * 60
+        except ValueError:
+            logger.warning("无效的运行时长，将不限制运行时长")
+        self.job.set_run_limits(max_clicks=max_clicks, max_duration=max_duration)
+
+    def _on_job_finished(self, summary):
+        """任务结束时调用（可能在调度线程中），转到界面线程更新按钮并显示统计"""
+        try:
+            self.after(0, self._show_run_finished, summary)
+        except Exception as e:
+            logger.warning(f"面板已关闭，无法显示点击统计: {str(e)}")
+
+    def _show_run_finished(self, summary):
+        self.start_button.configure(state="normal")
+        self.stop_button.configure(state="disabled")
+        self.show_statistics(summary)
+
     # 添加显示统计方法
-    def show_statistics(self):
+    def show_statistics(self, summary=None):
         # 获取统计数据
-        elapsed_time, click_count = self.auto_click_manager.get_statistics()
+        if summary is None:
+            summary = self.job.get_run_summary()
+        elapsed_time = summary['elapsed_time']
+        click_count = summary['click_count']
 
         # 格式化时间
         minutes = int(elapsed_time // 60)
@@ -445,5 +519,8 @@ class CTkSingleButtonAutoClickPanel(ctk.CTkFrame):
         messagebox.showinfo(
             "点击统计",
             f"点击时长: {formatted_time}\n累计点击次数: {click_count}"
+            + (f"\n结束原因: {summary['reason_text']}" if summary.get('reason_text') else "")
+            + (f"\n熔断次数: {summary['breaker']['open_count']}，熔断时长: {int(summary['breaker']['downtime'])}秒"
+               if summary.get('breaker', {}).get('open_count') else "")
         )
         logger.info(f"显示点击统计: 时长={formatted_time}, 次数={click_count}")